@@ -1,12 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
 from datetime import timedelta
 from marshmallow import ValidationError
-# from backend.core.static_analysis.analyzer import run_static_analysis
+from backend.core.static_analysis.analyzer import run_quick_checks
 from backend.services.model_service import ModelService
 from backend.schemas.validation import CodeReviewSchema, ModelSchema, ModelUpdateSchema
 from backend.auth.service import AuthService
-from backend.config.env import get_max_code_length
 
 # Затем создаем экземпляры Blueprint и сервисов
 api = Blueprint('api', __name__)
@@ -52,8 +51,8 @@ def review_code():
             language = validated_data.get('language', '')
             model_id = validated_data.get('model_id') or data.get('model')
             
-            # Проверяем наличие обязательных полей
-            if not code:
+            # Проверяем наличие обязательных полей (в режиме diff код может быть задан только diff)
+            if not code and not (data.get('mode') == 'diff' and data.get('diff')):
                 return jsonify({"success": False, "error": "Отсутствует код для анализа"}), 400
             if not language:
                 return jsonify({"success": False, "error": "Отсутствует язык программирования"}), 400
@@ -65,31 +64,65 @@ def review_code():
             print(f"Ошибка валидации: {err.messages}")
             return jsonify({"success": False, "error": "Ошибка валидации", "details": err.messages}), 400
         
-        # Проверка размера кода
-        max_code_length = get_max_code_length()
-        if len(code) > max_code_length:
-            return jsonify({
-                "success": False, 
-                "error": f"Размер кода превышает допустимый лимит ({max_code_length} символов)"
-            }), 413
-            
         # Получаем код, язык программирования и модель
-        code = validated_data['code']
+        code = validated_data.get('code', '')
         language = validated_data['language']
         model_id = validated_data.get('model_id') or data.get('model')
         
         # Получаем предпочтительный язык ответа
         response_language = data.get('response_language', 'russian')
         
+        # Режим анализа: full - весь код целиком, incremental - по функциям и классам с кэшем,
+        # diff - только изменённые фрагменты
+        mode = data.get('mode', 'full')
+        
         # Анализ кода с использованием выбранной модели
         try:
-            # Передаем параметр языка ответа
-            result = model_service.analyze_code(
+            if mode == 'diff':
+                try:
+                    report = model_service.analyze_code_diff(
+                        language,
+                        code=code or None,
+                        diff=data.get('diff'),
+                        old_code=data.get('old_code'),
+                        model_id=model_id,
+                        context=int(data['context']) if data.get('context') is not None else None,
+                        enclosing=data.get('scope') == 'function',
+                        response_language=response_language
+                    )
+                except ValueError as diff_error:
+                    return jsonify({"success": False, "error": str(diff_error)}), 400
+                return jsonify({
+                    "success": True,
+                    "result": report["result"],
+                    "hunks": report["hunks"],
+                    "changed_lines": report["changed_lines"],
+                    "reviewed_lines": report["reviewed_lines"]
+                })
+            
+            if mode == 'incremental':
+                report = model_service.analyze_code_incremental(
+                    code,
+                    language,
+                    model_id=model_id,
+                    response_language=response_language
+                )
+                return jsonify({
+                    "success": True,
+                    "result": report["result"],
+                    "units": report["units"],
+                    "reused_units": report["reused_units"],
+                    "analyzed_units": report["analyzed_units"]
+                })
+            
+            # Передаем параметр языка ответа; статический анализ выполняется одновременно с подготовкой запроса
+            analysis = model_service.analyze_code_with_metadata(
                 code, 
                 language, 
                 model_id=model_id,
                 response_language=response_language
             )
+            result = analysis["result"]
             
             # Убедимся, что результат - это строка
             if not isinstance(result, str):
@@ -99,7 +132,21 @@ def review_code():
                 else:
                     result = str(result)
             
-            return jsonify({"success": True, "result": result})
+            # Итоговый отчёт содержит и замечания анализаторов, и ответ модели
+            response = {"success": True, "result": result, "static_findings": analysis.get("static_findings", [])}
+            if analysis.get("static_tools"):
+                response["static_tools"] = analysis["static_tools"]
+            if analysis.get("stale"):
+                # Результат из кэша устарел и уже обновляется в фоне
+                response["stale"] = True
+            if analysis.get("approximate"):
+                # Результат получен для почти одинакового кода
+                response["approximate"] = True
+                response["similarity"] = round(analysis["similarity"], 3)
+            if analysis.get("chunks"):
+                # Большой файл проанализирован по частям
+                response["chunks"] = analysis["chunks"]
+            return jsonify(response)
         except Exception as model_error:
             print(f"Ошибка в анализе модели: {str(model_error)}")
             # Используем заглушку в случае ошибки модели
@@ -181,6 +228,213 @@ def profile():
         return jsonify({"error": f"Внутренняя ошибка сервера: {str(e)}"}), 500
 
 
+def _parse_review_request(model_service):
+    """
+    Разбор и проверка параметров запроса на анализ кода.
+    
+    Returns:
+        Кортеж (параметры, None) или (None, ответ с ошибкой)
+    """
+    if not request.is_json:
+        return None, (jsonify({"success": False, "error": "Ожидается JSON"}), 400)
+    
+    data = request.get_json() or {}
+    params = {
+        "code": data.get('code', ''),
+        "language": data.get('language', ''),
+        "model_id": data.get('model_id') or data.get('model') or model_service.get_default_model(),
+        "response_language": data.get('response_language', 'russian'),
+        "mode": data.get('mode', 'full')
+    }
+    
+    if not params["code"]:
+        return None, (jsonify({"success": False, "error": "Отсутствует код для анализа"}), 400)
+    if not params["language"]:
+        return None, (jsonify({"success": False, "error": "Отсутствует язык программирования"}), 400)
+    
+    return params, None
+
+
+def _sse(event: str, data: dict) -> str:
+    """Форматирование события Server-Sent Events."""
+    import json
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@api.route('/review/stream', methods=['POST'])
+@api.route('/api/review/stream', methods=['POST'])
+def review_code_stream():
+    """Потоковый анализ кода: фрагменты ответа модели передаются как Server-Sent Events."""
+    from backend.services import model_service
+    
+    params, error_response = _parse_review_request(model_service)
+    if error_response is not None:
+        return error_response
+    
+    def generate():
+        try:
+            # Замечания быстрой проверки отправляются первым событием, пока работают анализаторы и модель;
+            # событие static с полным списком замечаний приходит позже и заменяет их
+            findings = run_quick_checks(params["code"], params["language"])
+            if findings:
+                yield _sse("static_quick", {"findings": findings})
+            for event in model_service.stream_review(
+                params["code"],
+                params["language"],
+                model_id=params["model_id"],
+                response_language=params["response_language"]
+            ):
+                yield _sse(event["event"], event["data"])
+        except Exception as e:
+            print(f"Ошибка в review_code_stream: {str(e)}")
+            yield _sse("error", {"error": f"Произошла ошибка при анализе кода: {str(e)}"})
+    
+    # Отключаем буферизацию ответа в прокси (nginx), чтобы фрагменты доходили сразу
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
+@api.route('/review/jobs', methods=['POST'])
+@api.route('/api/review/jobs', methods=['POST'])
+def create_review_job():
+    """Постановка анализа кода в очередь Celery; возвращает идентификатор задачи."""
+    from backend.services import model_service
+    from backend.services.model_service import review_code_task
+    
+    params, error_response = _parse_review_request(model_service)
+    if error_response is not None:
+        return error_response
+    
+    try:
+        job = review_code_task.delay(
+            params["code"],
+            params["language"],
+            model_id=params["model_id"],
+            response_language=params["response_language"],
+            mode=params["mode"]
+        )
+    except Exception as e:
+        print(f"Ошибка при постановке задачи анализа в очередь: {str(e)}")
+        return jsonify({"success": False, "error": f"Не удалось поставить задачу в очередь: {str(e)}"}), 503
+    
+    return jsonify({
+        "success": True,
+        "job_id": job.id,
+        "status": "pending",
+        "status_url": f"/api/review/jobs/{job.id}"
+    }), 202
+
+
+@api.route('/review/jobs/<job_id>', methods=['GET'])
+@api.route('/api/review/jobs/<job_id>', methods=['GET'])
+def get_review_job(job_id):
+    """
+    Состояние задачи анализа кода.
+    
+    Параметр wait (секунды) включает долгий опрос: ответ возвращается, как только
+    задача завершится, но не позже wait секунд (не больше REVIEW_JOB_MAX_WAIT).
+    На время ожидания запрос занимает поток сервера, поэтому ожидание ограничено
+    несколькими секундами, а сервер должен работать с потоками или gevent.
+    """
+    from celery.exceptions import TimeoutError as CeleryTimeoutError
+    from celery.result import AsyncResult
+    from backend.celery_app import celery
+    from backend.config.env import get_review_job_settings
+    
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0), get_review_job_settings()["max_wait"])
+    except ValueError:
+        return jsonify({"success": False, "error": "Параметр wait должен быть числом"}), 400
+    
+    job = AsyncResult(job_id, app=celery)
+    if wait > 0:
+        # Ожидание результата через бэкенд Celery вместо периодического опроса
+        try:
+            job.get(timeout=wait, propagate=False)
+        except CeleryTimeoutError:
+            pass
+    
+    state = job.state
+    response = {"success": True, "job_id": job_id, "status": state.lower()}
+    if state == "SUCCESS":
+        response["progress"] = 1.0
+        response.update(job.result)
+    elif state in ("FAILURE", "REVOKED"):
+        response["progress"] = 1.0
+        response["error"] = str(job.result)
+    elif state == "PROGRESS":
+        response["progress"] = (job.info or {}).get("progress", 0.0)
+    else:
+        # PENDING - задача в очереди, неизвестна или её результат уже истёк
+        response["progress"] = 0.0
+    
+    return jsonify(response)
+
+
+@api.route('/review/batch', methods=['POST'])
+@api.route('/api/review/batch', methods=['POST'])
+def review_batch():
+    """Пакетный анализ нескольких файлов с параллельной обработкой."""
+    from backend.services import model_service
+    from backend.config.env import get_batch_settings
+    
+    if not request.is_json:
+        return jsonify({"success": False, "error": "Ожидается JSON"}), 400
+    
+    data = request.get_json() or {}
+    files = data.get('files')
+    if not isinstance(files, list) or not files:
+        return jsonify({"success": False, "error": "Ожидается непустой список файлов files"}), 400
+    
+    max_files = get_batch_settings()["max_files"]
+    if len(files) > max_files:
+        return jsonify({"success": False, "error": f"Слишком много файлов в пакете (не более {max_files})"}), 413
+    
+    model_id = data.get('model_id') or data.get('model') or model_service.get_default_model()
+    response_language = data.get('response_language', 'russian')
+    
+    # Некорректные файлы не прерывают пакет, а попадают в результаты с ошибкой
+    valid = []
+    errors = {}
+    for index, item in enumerate(files):
+        if not isinstance(item, dict) or not item.get('code') or not item.get('language'):
+            errors[index] = "Отсутствует код или язык программирования"
+        elif not isinstance(item['code'], str) or not isinstance(item['language'], str):
+            errors[index] = "Код и язык программирования должны быть строками"
+        elif item.get('path') is not None and not isinstance(item['path'], str):
+            errors[index] = "Путь к файлу должен быть строкой"
+        else:
+            valid.append(index)
+    
+    # Ошибки отдельных файлов возвращаются в их результатах, здесь - только сбой всего пакета
+    try:
+        report = model_service.analyze_batch(
+            [files[index] for index in valid],
+            model_id=model_id,
+            response_language=response_language
+        )
+    except Exception as e:
+        print(f"Ошибка в review_batch: {str(e)}")
+        return jsonify({"success": False, "error": f"Произошла ошибка при пакетном анализе: {str(e)}"}), 500
+    
+    results = [None] * len(files)
+    for index, result in zip(valid, report["files"]):
+        results[index] = result
+    for index, error in errors.items():
+        path = files[index].get('path') if isinstance(files[index], dict) else None
+        if not isinstance(path, str):
+            path = None
+        results[index] = {"path": path, "success": False, "error": error}
+    
+    summary = report["summary"]
+    summary["total"] = len(files)
+    summary["failed"] += len(errors)
+    
+    return jsonify({"success": True, "model": model_id, "files": results, "summary": summary})
+
+
 @api.route('/models', methods=['GET'])
 def get_models():
     """Получение списка доступных моделей."""
@@ -194,10 +448,15 @@ def get_models():
         print(f"Доступные модели: {models}")
         print(f"Модель по умолчанию: {default_model}")
         
+        # Состояние вышестоящих API-серверов по данным фоновой проверки и запросов
+        from backend.core.ml_analysis.upstream_health import get_upstream_health
+        upstreams = get_upstream_health().snapshot()
+        
         return jsonify({
             "success": True,
             "models": models,
-            "default_model": default_model
+            "default_model": default_model,
+            "upstreams": upstreams
         })
     except Exception as e:
         print(f"Ошибка при получении моделей: {str(e)}")
@@ -1,5 +1,5 @@
 from celery import Celery
-from backend.config.env import get_redis_url
+from backend.config.env import get_redis_url, get_review_job_settings
 
 celery = Celery(
     __name__,
@@ -14,6 +14,10 @@ celery.conf.update(
     accept_content=['json'],
     timezone='UTC',
     enable_utc=True,
+    # Состояние STARTED позволяет отличить задачу в работе от задачи в очереди
+    task_track_started=True,
+    # Результаты задач анализа удаляются из Redis по истечении срока
+    result_expires=get_review_job_settings()["result_ttl"],
 )
 
 if __name__ == '__main__':
@@ -128,6 +128,110 @@ def get_request_timeout() -> int:
     """Получение таймаута для запросов в секундах"""
     return int(get_env_variable("REQUEST_TIMEOUT", 60))
 
+def get_http_pool_settings() -> Dict[str, Any]:
+    """Получение настроек пула HTTP-соединений к API моделей"""
+    return {
+        "max_connections": int(get_env_variable("HTTP_POOL_MAX_CONNECTIONS", 20)),
+        "max_keepalive_connections": int(get_env_variable("HTTP_POOL_MAX_KEEPALIVE", 10)),
+        "keepalive_expiry": float(get_env_variable("HTTP_POOL_KEEPALIVE_EXPIRY", 60)),
+        "http2": get_env_variable("HTTP_POOL_HTTP2", "True").lower() in ("true", "1", "yes")
+    }
+
+def get_circuit_breaker_settings() -> Dict[str, Any]:
+    """Получение настроек выключателя для вышестоящих API-серверов"""
+    return {
+        "failure_threshold": int(get_env_variable("CIRCUIT_FAILURE_THRESHOLD", 3)),
+        "error_rate_threshold": float(get_env_variable("CIRCUIT_ERROR_RATE_THRESHOLD", 0.5)),
+        "window": int(get_env_variable("CIRCUIT_WINDOW", 20)),
+        "min_samples": int(get_env_variable("CIRCUIT_MIN_SAMPLES", 5)),
+        "open_timeout": float(get_env_variable("CIRCUIT_OPEN_TIMEOUT", 30))
+    }
+
+def get_upstream_probe_settings() -> Dict[str, Any]:
+    """Получение настроек фоновой проверки доступности вышестоящих API-серверов"""
+    return {
+        "interval": float(get_env_variable("UPSTREAM_PROBE_INTERVAL", 60)),
+        "timeout": float(get_env_variable("UPSTREAM_PROBE_TIMEOUT", 5))
+    }
+
+def get_hedging_settings() -> Dict[str, Any]:
+    """Получение настроек дублирующих (hedged) запросов к вышестоящим API-серверам"""
+    return {
+        "enabled": get_env_variable("HEDGING_ENABLED", "False").lower() in ("true", "1", "yes"),
+        "percentile": float(get_env_variable("HEDGING_PERCENTILE", 95)),
+        "min_delay": float(get_env_variable("HEDGING_MIN_DELAY", 1.0)),
+        "default_delay": float(get_env_variable("HEDGING_DEFAULT_DELAY", 10.0)),
+        "max_hedges": int(get_env_variable("HEDGING_MAX_HEDGES", 1)),
+        "budget_ratio": float(get_env_variable("HEDGING_BUDGET_RATIO", 0.1)),
+        "budget_burst": float(get_env_variable("HEDGING_BUDGET_BURST", 5)),
+        "max_workers": int(get_env_variable("HEDGING_MAX_WORKERS", 16)),
+        # Потоки для дублей; если все заняты (в том числе проигравшими запросами), дубль не отправляется
+        "max_hedge_workers": int(get_env_variable("HEDGING_MAX_HEDGE_WORKERS", 4))
+    }
+
+def get_review_job_settings() -> Dict[str, Any]:
+    """Получение настроек фоновых задач анализа кода"""
+    return {
+        "result_ttl": int(get_env_variable("REVIEW_JOB_RESULT_TTL", 3600)),
+        "max_wait": float(get_env_variable("REVIEW_JOB_MAX_WAIT", 5))
+    }
+
+def get_batch_settings() -> Dict[str, Any]:
+    """Получение настроек пакетного анализа файлов"""
+    return {
+        "max_files": int(get_env_variable("BATCH_MAX_FILES", 200)),
+        "max_workers": int(get_env_variable("BATCH_MAX_WORKERS", 8)),
+        "model_concurrency": int(get_env_variable("BATCH_MODEL_CONCURRENCY", 4))
+    }
+
+def get_local_batch_settings() -> Dict[str, Any]:
+    """Получение настроек пакетной генерации локальных моделей"""
+    return {
+        "enabled": get_env_variable("LOCAL_BATCH_ENABLED", "True").lower() in ("true", "1", "yes"),
+        "max_batch_size": int(get_env_variable("LOCAL_BATCH_MAX_SIZE", 8)),
+        # Сколько секунд ждать следующие запросы после первого
+        "window": float(get_env_variable("LOCAL_BATCH_WINDOW", 0.02)),
+        "max_batch_tokens": int(get_env_variable("LOCAL_BATCH_MAX_TOKENS", 8192))
+    }
+
+def get_diff_context_lines() -> int:
+    """Получение числа строк контекста вокруг изменений в режиме анализа diff"""
+    return int(get_env_variable("DIFF_CONTEXT_LINES", 3))
+
+def get_review_chunk_size() -> int:
+    """Получение размера части (в символах), на которые делится большой файл при анализе"""
+    return int(get_env_variable("REVIEW_CHUNK_SIZE", 12000))
+
+def get_linter_pool_settings() -> Dict[str, Any]:
+    """Получение настроек пула процессов pylint/flake8"""
+    return {
+        "workers": int(get_env_variable("LINTER_POOL_WORKERS", 2)),
+        "max_tasks_per_worker": int(get_env_variable("LINTER_POOL_MAX_TASKS", 500))
+    }
+
+def get_static_analysis_settings() -> Dict[str, Any]:
+    """Получение настроек запуска инструментов статического анализа"""
+    return {
+        "max_processes": int(get_env_variable("STATIC_ANALYSIS_MAX_PROCESSES", 4)),
+        "timeout": float(get_env_variable("STATIC_ANALYSIS_TIMEOUT", 30)),
+        # Память одного запуска анализатора в мегабайтах (0 - без ограничения)
+        "memory_limit": int(get_env_variable("STATIC_ANALYSIS_MEMORY_LIMIT", 1024)),
+        "cache_enabled": get_env_variable("STATIC_ANALYSIS_CACHE_ENABLED", "True").lower() in ("true", "1", "yes"),
+        "scratch_dir": get_env_variable("STATIC_ANALYSIS_SCRATCH_DIR", ""),
+        "checkstyle_jar": get_env_variable("CHECKSTYLE_JAR", ""),
+        "checkstyle_config": get_env_variable("CHECKSTYLE_CONFIG_FILE", "/google_checks.xml"),
+        "roslyn_analyzer": get_env_variable("ROSLYN_ANALYZER", "")
+    }
+
+def get_static_review_settings() -> Dict[str, Any]:
+    """Получение настроек передачи замечаний статического анализа в запрос к модели"""
+    return {
+        "enabled": get_env_variable("STATIC_REVIEW_ENABLED", "True").lower() in ("true", "1", "yes"),
+        # Сколько ждать анализаторы перед запросом к модели (секунды)
+        "wait": float(get_env_variable("STATIC_REVIEW_WAIT", 10)),
+        "max_findings": int(get_env_variable("STATIC_REVIEW_MAX_FINDINGS", 30))
+    }
+
 def get_max_code_length() -> int:
     """Получение максимальной длины кода для анализа"""
     return int(get_env_variable("MAX_CODE_LENGTH", 100000))
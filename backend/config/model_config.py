@@ -6,7 +6,7 @@ import json
 from pathlib import Path
 from typing import Dict, Any, Optional
 
-from backend.config.env import get_env_variable, BASE_DIR
+from backend.config.env import get_env_variable, get_redis_url, BASE_DIR
 
 # Пути для конфигурации моделей
 CONFIG_DIR = Path(__file__).resolve().parent
@@ -16,8 +16,34 @@ PROMPTS_CONFIG_FILE = CONFIG_DIR / "prompts_config.json"
 # Настройки кэша по умолчанию
 DEFAULT_CACHE_SETTINGS = {
     "enabled": True,
+    # Нижний уровень кэша: "disk" (файл на запись), "segment" (один файл с дописыванием)
+    # или "redis" (общий для всех узлов)
+    "backend": get_env_variable("CACHE_BACKEND", "disk"),
     "cache_dir": str(BASE_DIR / "cache"),
-    "expiry_time": 3600  # 1 час в секундах
+    "expiry_time": int(get_env_variable("CACHE_EXPIRY", 3600)),  # 1 час в секундах
+    # Ограничения горячего уровня кэша в памяти процесса
+    "memory_max_entries": int(get_env_variable("CACHE_MEMORY_MAX_ENTRIES", 1024)),
+    "memory_max_bytes": int(get_env_variable("CACHE_MEMORY_MAX_BYTES", 64 * 1024 * 1024)),  # 64 МБ
+    # Ограничение размера дискового уровня кэша
+    "disk_max_bytes": int(get_env_variable("CACHE_DISK_MAX_BYTES", 512 * 1024 * 1024)),  # 512 МБ
+    # Настройки файла-сегмента (по умолчанию cache_dir/reviews.seg)
+    "segment_file": get_env_variable("CACHE_SEGMENT_FILE", ""),
+    "segment_compression": get_env_variable("CACHE_SEGMENT_COMPRESSION", "zlib"),  # zlib или zstd
+    "compaction_interval": int(get_env_variable("CACHE_COMPACTION_INTERVAL", 300)),  # секунды
+    "compaction_ratio": float(get_env_variable("CACHE_COMPACTION_RATIO", 0.5)),
+    # Настройки общего кэша в Redis
+    "redis_url": get_env_variable("CACHE_REDIS_URL", get_redis_url()),
+    "redis_prefix": get_env_variable("CACHE_REDIS_PREFIX", "review-cache:"),
+    # Stale-while-revalidate: устаревшая запись в окне отсрочки возвращается сразу
+    # и обновляется в фоне
+    "stale_while_revalidate": get_env_variable("CACHE_STALE_WHILE_REVALIDATE", "False").lower() in ("true", "1", "yes"),
+    "stale_grace_time": int(get_env_variable("CACHE_STALE_GRACE_TIME", 3600)),  # секунды
+    # Повторное использование результатов для почти одинакового кода (MinHash по шинглам токенов)
+    "similarity_enabled": get_env_variable("CACHE_SIMILARITY_ENABLED", "False").lower() in ("true", "1", "yes"),
+    "similarity_threshold": float(get_env_variable("CACHE_SIMILARITY_THRESHOLD", 0.9)),
+    "similarity_max_entries": int(get_env_variable("CACHE_SIMILARITY_MAX_ENTRIES", 10000)),
+    # Максимальное время ожидания одинакового запроса, выполняемого другим процессом
+    "single_flight_lock_ttl": int(get_env_variable("SINGLE_FLIGHT_LOCK_TTL", 180))
 }
 
 def get_model_parameters(provider: str, model_name: str = None) -> Optional[Dict[str, Any]]:
@@ -30,6 +56,14 @@ def get_model_parameters(provider: str, model_name: str = None) -> Optional[Dict
     }
     return defaults.get(provider, {})
 
+# Версия шаблонов запросов. Увеличивайте при изменении промптов в адаптерах,
+# чтобы кэшированные результаты старых промптов перестали использоваться.
+PROMPT_TEMPLATE_VERSION = "2"
+
+def get_prompt_template_version() -> str:
+    """Получение версии шаблонов запросов для ключей кэша."""
+    return get_env_variable("PROMPT_TEMPLATE_VERSION", PROMPT_TEMPLATE_VERSION)
+
 def get_prompt_template(provider: str) -> Dict[str, str]:
     """Получение шаблона запроса для конкретного провайдера."""
     default_template = """Проанализируйте следующий код на {language} и предложите улучшения:
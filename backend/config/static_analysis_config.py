@@ -51,9 +51,9 @@ ESLINT_CONFIG = {
 TSLINT_CONFIG = {
     "extends": ["tslint:recommended"],
     "rules": {
-        "no-console": false,
-        "member-ordering": false,
-        "object-literal-sort-keys": false
+        "no-console": False,
+        "member-ordering": False,
+        "object-literal-sort-keys": False
     }
 }
 
@@ -88,6 +88,49 @@ STATIC_ANALYZER_COMMANDS = {
     "eslint": "eslint --format=json {options} {file_path}",
     "tslint": "tslint --format=json {options} {file_path}",
     "checkstyle": "java -jar {checkstyle_jar} -c {config_file} {file_path}",
-    "cppcheck": "cppcheck --enable=all --template='{file}:{line}:{severity}:{message}' {file_path}",
+    "cppcheck": "cppcheck --enable=all {options} --template='{file}:{line}:{severity}:{message}' {file_path}",
     "roslyn": "dotnet {roslyn_analyzer} {file_path}"
-}
\ No newline at end of file
+}
+
+# Инструменты статического анализа по языкам (запускаются параллельно)
+LANGUAGE_ANALYZERS = {
+    "python": ["pylint", "flake8"],
+    "javascript": ["eslint"],
+    "typescript": ["eslint", "tslint"],
+    "java": ["checkstyle"],
+    "cpp": ["cppcheck"],
+    "c": ["cppcheck"],
+    "csharp": ["roslyn"]
+}
+
+# Расширения файлов исходного кода по языкам
+LANGUAGE_EXTENSIONS = {
+    "python": "py",
+    "javascript": "js",
+    "typescript": "ts",
+    "java": "java",
+    "cpp": "cpp",
+    "c": "c",
+    "csharp": "cs"
+}
+
+# Ограничение времени работы инструментов в секундах (для остальных - STATIC_ANALYSIS_TIMEOUT)
+STATIC_ANALYZER_TIMEOUTS = {
+    "pylint": 20,
+    "flake8": 10,
+    "eslint": 30,
+    "tslint": 30,
+    "checkstyle": 60,
+    "cppcheck": 60,
+    "roslyn": 120
+}
+
+# Анализаторы на виртуальных машинах Node.js, JVM и .NET резервируют при запуске гигабайты
+# адресного пространства: их память ограничивается сегментом данных (RLIMIT_DATA),
+# а не всем адресным пространством (RLIMIT_AS)
+DATA_LIMITED_ANALYZERS = {"eslint", "tslint", "checkstyle", "roslyn"}
+
+# Конфигурация быстрой проверки Python-кода по AST
+AST_CHECKER_CONFIG = {
+    "max_function_lines": 50
+}
@@ -0,0 +1,13 @@
+"""
+Кэширование результатов анализа кода.
+"""
+from backend.core.cache.base import CacheBackend, CacheEntry, is_expired
+from backend.core.cache.memory import MemoryCache
+from backend.core.cache.disk import DiskCache
+from backend.core.cache.redis_cache import RedisCache
+from backend.core.cache.segment import SegmentCache
+from backend.core.cache.tiered import TieredCache, create_review_cache, get_review_cache, reset_review_cache
+from backend.core.cache.normalize import normalize_code, tokenize_code
+from backend.core.cache.keys import make_review_cache_key, make_static_analysis_cache_key
+from backend.core.cache.single_flight import SingleFlight, get_single_flight
+from backend.core.cache.similarity import SimilarityIndex, SimilarityMatch, get_similarity_index
@@ -0,0 +1,81 @@
+"""
+Базовые определения для уровней кэша результатов анализа.
+"""
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Optional
+
+# Запись кэша - словарь с полями "result", "timestamp" и дополнительными метаданными
+CacheEntry = Dict[str, Any]
+
+
+def is_expired(entry: CacheEntry, ttl: float, now: Optional[float] = None) -> bool:
+    """
+    Проверка срока действия записи кэша.
+
+    Args:
+        entry: Запись кэша
+        ttl: Время жизни записи в секундах
+        now: Текущее время (если None, используется time.time())
+
+    Returns:
+        True, если запись устарела
+    """
+    if now is None:
+        now = time.time()
+    return now - entry.get("timestamp", 0) > ttl
+
+
+class CacheBackend(ABC):
+    """Базовый класс для уровней кэша."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Получение записи из кэша.
+
+        Args:
+            key: Ключ кэша
+
+        Returns:
+            Запись кэша или None, если запись не найдена или устарела
+        """
+        pass
+
+    @abstractmethod
+    def set(self, key: str, entry: CacheEntry) -> None:
+        """
+        Сохранение записи в кэш.
+
+        Args:
+            key: Ключ кэша
+            entry: Запись кэша
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Удаление записи из кэша.
+
+        Args:
+            key: Ключ кэша
+        """
+        pass
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, CacheEntry]:
+        """
+        Получение нескольких записей из кэша.
+
+        Args:
+            keys: Ключи кэша
+
+        Returns:
+            Словарь найденных записей по ключам
+        """
+        found = {}
+        for key in keys:
+            entry = self.get(key)
+            if entry is not None:
+                found[key] = entry
+        return found
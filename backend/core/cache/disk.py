@@ -0,0 +1,143 @@
+"""
+Дисковый уровень кэша: одна JSON-запись на файл в директории кэша.
+"""
+import os
+import json
+import logging
+import threading
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+from backend.core.cache.base import CacheBackend, CacheEntry, is_expired
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache(CacheBackend):
+    """Файловый кэш с ограничением суммарного размера директории."""
+
+    def __init__(self, cache_dir: Union[str, Path], max_bytes: int = 512 * 1024 * 1024, ttl: float = 3600):
+        """
+        Инициализация дискового кэша.
+
+        Args:
+            cache_dir: Директория для файлов кэша
+            max_bytes: Максимальный суммарный размер файлов кэша в байтах
+            ttl: Время жизни записи в секундах
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # Индекс размеров файлов в порядке их записи (от старых к новым)
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _load_index(self) -> None:
+        """Построение индекса по существующим файлам кэша."""
+        files = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(files):
+            self._index[key] = size
+            self._total_bytes += size
+
+        # Директория могла вырасти сверх лимита до включения ограничения
+        with self._lock:
+            self._evict()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        try:
+            with open(self._path(key), "r") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ошибка при чтении кэша: {str(e)}")
+            return None
+
+        if is_expired(entry, self.ttl):
+            self.delete(key)
+            return None
+
+        return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        data = json.dumps(entry).encode("utf-8")
+
+        if len(data) > self.max_bytes:
+            return
+
+        # Пишем во временный файл и атомарно переименовываем,
+        # чтобы параллельные читатели не видели частично записанный файл
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            previous = self._index.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous
+            self._index[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        """Удаление файла записи и её учёт в индексе (вызывается под блокировкой)."""
+        size = self._index.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Ошибка при удалении файла кэша: {str(e)}")
+
+    def _evict(self) -> None:
+        """Удаление самых старых записей до соблюдения лимита (вызывается под блокировкой)."""
+        while self._total_bytes > self.max_bytes and self._index:
+            oldest_key = next(iter(self._index))
+            self._remove(oldest_key)
+
+    def purge_expired(self) -> int:
+        """
+        Удаление всех устаревших записей.
+
+        Returns:
+            Количество удалённых записей
+        """
+        removed = 0
+        for key in list(self._index):
+            if self.get(key) is None:
+                self.delete(key)
+                removed += 1
+        return removed
+
+    @property
+    def total_bytes(self) -> int:
+        """Суммарный размер файлов кэша в байтах."""
+        return self._total_bytes
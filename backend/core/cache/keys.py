@@ -0,0 +1,59 @@
+"""
+Построение ключей кэша результатов анализа.
+"""
+import hashlib
+
+from backend.config.model_config import get_prompt_template_version
+from backend.core.cache.normalize import normalize_code
+
+
+def make_review_cache_key(model_id: str, language: str, code: str, response_language: str = "russian",
+                          static_digest: bool = False) -> str:
+    """
+    Создание ключа кэша для запроса анализа.
+
+    Код нормализуется перед хэшированием, поэтому изменения форматирования
+    и комментариев не меняют ключ. Версия шаблонов запросов входит в ключ,
+    чтобы изменение промпта не возвращало результаты для старого промпта.
+
+    Args:
+        model_id: Идентификатор модели
+        language: Язык программирования
+        code: Исходный код для анализа
+        response_language: Язык ответа
+        static_digest: Промпт включает сводку статического анализа. Сама сводка
+            определяется кодом, поэтому в ключ входит только этот признак
+
+    Returns:
+        Ключ кэша
+    """
+    language = (language or "").lower()
+    code_hash = hashlib.sha256(normalize_code(code, language).encode()).hexdigest()
+    content = f"{get_prompt_template_version()}:{model_id}:{language}:{response_language}:{code_hash}"
+    if static_digest:
+        content += ":static"
+    return hashlib.md5(content.encode()).hexdigest()
+
+
+def make_static_analysis_cache_key(tool: str, tool_version: str, config: str, language: str, code: str) -> str:
+    """
+    Создание ключа кэша результата статического анализа.
+
+    Замечания анализаторов привязаны к номерам строк и форматированию, поэтому
+    нормализуются только переводы строк. Версия и конфигурация инструмента входят
+    в ключ: обновление инструмента или правил не возвращает старые результаты.
+
+    Args:
+        tool: Имя инструмента
+        tool_version: Версия инструмента
+        config: Отпечаток конфигурации инструмента
+        language: Язык программирования
+        code: Исходный код
+
+    Returns:
+        Ключ кэша
+    """
+    code = code.replace("\r\n", "\n").replace("\r", "\n")
+    code_hash = hashlib.sha256(code.encode()).hexdigest()
+    content = f"{tool}:{tool_version}:{config}:{(language or '').lower()}:{code_hash}"
+    return "static-" + hashlib.sha256(content.encode()).hexdigest()
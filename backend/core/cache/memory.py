@@ -0,0 +1,98 @@
+"""
+Уровень кэша в памяти процесса с вытеснением по принципу LRU.
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from backend.core.cache.base import CacheBackend, CacheEntry, is_expired
+
+
+class MemoryCache(CacheBackend):
+    """LRU-кэш в памяти, ограниченный числом записей и суммарным размером."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, ttl: float = 3600):
+        """
+        Инициализация кэша в памяти.
+
+        Args:
+            max_entries: Максимальное количество записей
+            max_bytes: Максимальный суммарный размер записей в байтах
+            ttl: Время жизни записи в секундах
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[CacheEntry, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _estimate_size(entry: CacheEntry) -> int:
+        """Оценка размера записи в байтах по её JSON-представлению."""
+        return len(json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+
+            entry, size = item
+            if is_expired(entry, self.ttl):
+                del self._entries[key]
+                self._total_bytes -= size
+                return None
+
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry, size: Optional[int] = None) -> None:
+        """
+        Сохранение записи в кэш.
+
+        Args:
+            key: Ключ кэша
+            entry: Запись кэша
+            size: Размер записи в байтах (если None, будет вычислен)
+        """
+        if size is None:
+            size = self._estimate_size(entry)
+
+        # Запись, которая больше всего кэша, не сохраняем
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous[1]
+
+            self._entries[key] = (entry, size)
+            self._total_bytes += size
+
+            # Вытесняем наименее используемые записи
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            item = self._entries.pop(key, None)
+            if item is not None:
+                self._total_bytes -= item[1]
+
+    def clear(self) -> None:
+        """Очистка кэша."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        """Суммарный размер записей в байтах."""
+        return self._total_bytes
@@ -0,0 +1,103 @@
+"""
+Нормализация исходного кода перед построением ключа кэша.
+
+Переформатирование, пробелы в конце строк и правка комментариев
+не должны приводить к промаху кэша.
+"""
+import ast
+import io
+import re
+import textwrap
+import tokenize
+from typing import List
+
+# Комментарии по языкам; для остальных языков используется синтаксис C
+_LINE_COMMENTS = {
+    "python": ("#",),
+    "ruby": ("#",),
+    "php": ("//", "#"),
+}
+_DEFAULT_LINE_COMMENTS = ("//",)
+_BLOCK_COMMENT_LANGUAGES = {"javascript", "typescript", "java", "cpp", "c", "csharp", "c#", "php", "go", "kotlin", "swift"}
+
+_STRING_PATTERN = r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`(?:\\.|[^`\\])*`'
+_TOKEN_PATTERNS = {}
+
+
+def _token_re(language: str) -> "re.Pattern":
+    """Регулярное выражение токенизатора для языка (строки, комментарии, слова, символы)."""
+    pattern = _TOKEN_PATTERNS.get(language)
+    if pattern is None:
+        comments = [re.escape(marker) + r"[^\n]*" for marker in _LINE_COMMENTS.get(language, _DEFAULT_LINE_COMMENTS)]
+        if language in _BLOCK_COMMENT_LANGUAGES or language not in _LINE_COMMENTS:
+            comments.append(r"/\*.*?\*/")
+        pattern = re.compile(
+            rf"(?P<string>{_STRING_PATTERN})|(?P<comment>{'|'.join(comments)})|(?P<token>\w+|\S)",
+            re.S
+        )
+        _TOKEN_PATTERNS[language] = pattern
+    return pattern
+
+
+def _normalize_python(code: str) -> str:
+    """Нормализация Python-кода через AST, а для синтаксически неверного кода - через tokenize."""
+    source = textwrap.dedent(code)
+    try:
+        return ast.dump(ast.parse(source), annotate_fields=False)
+    except (SyntaxError, ValueError):
+        pass
+
+    skipped = {tokenize.COMMENT, tokenize.NL, tokenize.ENCODING, tokenize.ENDMARKER}
+    parts = []
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(source).readline):
+            if token.type in skipped:
+                continue
+            if token.type == tokenize.NEWLINE:
+                parts.append("\n")
+            elif token.type == tokenize.INDENT:
+                parts.append("<INDENT>")
+            elif token.type == tokenize.DEDENT:
+                parts.append("<DEDENT>")
+            else:
+                parts.append(token.string)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return _normalize_generic(code, "python")
+    return " ".join(parts)
+
+
+def tokenize_code(code: str, language: str) -> List[str]:
+    """
+    Разбиение кода на токены без комментариев и пробелов.
+
+    Args:
+        code: Исходный код
+        language: Язык программирования
+
+    Returns:
+        Список токенов (строковые литералы сохраняются целиком)
+    """
+    language = (language or "").lower()
+    return [match.group() for match in _token_re(language).finditer(code) if match.lastgroup != "comment"]
+
+
+def _normalize_generic(code: str, language: str) -> str:
+    """Нормализация кода на основе токенизатора: без комментариев и лишних пробелов."""
+    return " ".join(tokenize_code(code, language))
+
+
+def normalize_code(code: str, language: str) -> str:
+    """
+    Нормализация кода для построения ключа кэша.
+
+    Args:
+        code: Исходный код
+        language: Язык программирования
+
+    Returns:
+        Нормализованное представление кода
+    """
+    language = (language or "").lower()
+    if language == "python":
+        return _normalize_python(code)
+    return _normalize_generic(code, language)
@@ -0,0 +1,101 @@
+"""
+Уровень кэша в Redis, общий для всех веб-воркеров и узлов Celery.
+"""
+import json
+import zlib
+import logging
+from typing import Dict, Iterable, Optional
+
+from backend.core.cache.base import CacheBackend, CacheEntry, is_expired
+
+logger = logging.getLogger(__name__)
+
+
+class RedisCache(CacheBackend):
+    """Кэш в Redis со сжатыми значениями и TTL на стороне сервера."""
+
+    def __init__(self, redis_url: str, ttl: float = 3600, prefix: str = "review-cache:",
+                 compression_level: int = 6, client=None):
+        """
+        Инициализация кэша в Redis.
+
+        Args:
+            redis_url: URL подключения к Redis
+            ttl: Время жизни записи в секундах
+            prefix: Префикс ключей в Redis
+            compression_level: Уровень сжатия zlib (1-9)
+            client: Готовый клиент Redis (если None, будет создан по redis_url)
+        """
+        self.ttl = ttl
+        self.prefix = prefix
+        self.compression_level = compression_level
+
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ImportError("Пакет redis не установлен. Установите его с помощью 'pip install redis'")
+            client = redis.Redis.from_url(redis_url)
+        self.client = client
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _encode(self, entry: CacheEntry) -> bytes:
+        return zlib.compress(json.dumps(entry).encode("utf-8"), self.compression_level)
+
+    def _decode(self, data: Optional[bytes]) -> Optional[CacheEntry]:
+        if data is None:
+            return None
+        try:
+            entry = json.loads(zlib.decompress(data).decode("utf-8"))
+        except Exception as e:
+            logger.warning(f"Ошибка при разборе записи кэша Redis: {str(e)}")
+            return None
+        # Redis удаляет записи сам, но проверяем TTL и для записей с изменённой политикой
+        if is_expired(entry, self.ttl):
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        try:
+            data = self.client.get(self._key(key))
+        except Exception as e:
+            # Недоступность Redis не должна ломать анализ - считаем это промахом
+            logger.warning(f"Ошибка при чтении кэша Redis: {str(e)}")
+            return None
+        return self._decode(data)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, CacheEntry]:
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        try:
+            # Один сетевой обмен на все ключи
+            pipeline = self.client.pipeline(transaction=False)
+            for key in keys:
+                pipeline.get(self._key(key))
+            values = pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Ошибка при чтении кэша Redis: {str(e)}")
+            return {}
+
+        found = {}
+        for key, data in zip(keys, values):
+            entry = self._decode(data)
+            if entry is not None:
+                found[key] = entry
+        return found
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        try:
+            self.client.set(self._key(key), self._encode(entry), ex=max(int(self.ttl), 1))
+        except Exception as e:
+            logger.warning(f"Ошибка при сохранении в кэш Redis: {str(e)}")
+
+    def delete(self, key: str) -> None:
+        try:
+            self.client.delete(self._key(key))
+        except Exception as e:
+            logger.warning(f"Ошибка при удалении из кэша Redis: {str(e)}")
@@ -0,0 +1,319 @@
+"""
+Кэш в одном файле-сегменте: сжатые записи дописываются в конец файла,
+индекс смещений хранится в памяти, устаревшие записи удаляются фоновым уплотнением.
+"""
+import os
+import json
+import time
+import zlib
+import struct
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from backend.core.cache.base import CacheBackend, CacheEntry, is_expired
+
+try:
+    import fcntl
+except ImportError:  # Windows - межпроцессная блокировка недоступна
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"CRBSEG1\n"
+# Заголовок записи: кодек, длина ключа, длина значения, время создания
+_HEADER = struct.Struct(">BHId")
+
+_CODEC_ZLIB = 0
+_CODEC_ZSTD = 1
+_TOMBSTONE = 255
+
+# Положение значения в файле: смещение, длина, время создания, кодек
+IndexItem = Tuple[int, int, float, int]
+
+
+def _zstd():
+    """Модуль zstandard, если он установлен."""
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+class SegmentCache(CacheBackend):
+    """Кэш в одном файле с дописыванием записей и индексом в памяти."""
+
+    def __init__(self, path: Union[str, Path], max_bytes: int = 512 * 1024 * 1024, ttl: float = 3600,
+                 compression: str = "zlib", compaction_interval: float = 300, compaction_ratio: float = 0.5):
+        """
+        Инициализация кэша-сегмента.
+
+        Args:
+            path: Путь к файлу сегмента
+            max_bytes: Максимальный размер живых данных после уплотнения в байтах
+            ttl: Время жизни записи в секундах
+            compression: Сжатие новых записей ("zlib" или "zstd")
+            compaction_interval: Интервал фонового уплотнения в секундах (0 - отключено)
+            compaction_ratio: Доля мёртвых данных в файле, при которой выполняется уплотнение
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.compaction_ratio = compaction_ratio
+        self._lock = threading.RLock()
+        self._index: Dict[str, IndexItem] = {}
+        self._dead_bytes = 0
+        self._end = 0
+        self._fd = None
+        self._inode = None
+
+        self._codec = _CODEC_ZLIB
+        if compression == "zstd":
+            zstandard = _zstd()
+            if zstandard is not None:
+                self._codec = _CODEC_ZSTD
+                self._compressor = zstandard.ZstdCompressor()
+            else:
+                logger.warning("Пакет zstandard не установлен, используется сжатие zlib")
+
+        os.makedirs(self.path.parent, exist_ok=True)
+        with self._lock:
+            self._open()
+
+        self._stop = threading.Event()
+        self._compactor = None
+        if compaction_interval > 0:
+            self._compactor = threading.Thread(
+                target=self._compaction_loop, args=(compaction_interval,), daemon=True
+            )
+            self._compactor.start()
+
+    # Работа с файлом
+
+    def _open(self) -> None:
+        """Открытие файла сегмента и загрузка индекса (вызывается под блокировкой)."""
+        fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            stat = os.fstat(fd)
+            if stat.st_size == 0:
+                os.write(fd, _MAGIC)
+            elif os.pread(fd, len(_MAGIC), 0) != _MAGIC:
+                os.close(fd)
+                raise ValueError(f"Файл {self.path} не является сегментом кэша")
+
+            old_fd = self._fd
+            self._fd = fd
+            self._inode = stat.st_ino
+            self._index = {}
+            self._dead_bytes = 0
+            self._end = len(_MAGIC)
+            self._scan(os.fstat(fd).st_size)
+        finally:
+            if fcntl is not None and self._fd == fd:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+        # Закрытие старого файла снимает и его блокировку
+        if old_fd is not None:
+            os.close(old_fd)
+
+    def _acquire_file(self) -> int:
+        """Захват блокировки актуального файла сегмента (он мог быть заменён уплотнением)."""
+        while True:
+            fd = self._fd
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                current = os.stat(self.path).st_ino == self._inode
+            except FileNotFoundError:
+                current = False
+            if current:
+                return fd
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._open()
+
+    @contextmanager
+    def _file_lock(self):
+        """Межпроцессная блокировка файла на время записи или уплотнения."""
+        fd = self._acquire_file()
+        try:
+            yield
+        finally:
+            # После уплотнения файл уже переоткрыт, а старый закрыт вместе с блокировкой
+            if fcntl is not None and fd == self._fd:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _scan(self, size: int) -> None:
+        """Чтение заголовков записей от известного конца файла до size."""
+        offset = self._end
+        while offset + _HEADER.size <= size:
+            codec, key_len, value_len, timestamp = _HEADER.unpack(os.pread(self._fd, _HEADER.size, offset))
+            value_offset = offset + _HEADER.size + key_len
+            if value_offset + value_len > size:
+                break  # Запись ещё дописывается другим процессом или обрезана при сбое
+
+            key = os.pread(self._fd, key_len, offset + _HEADER.size).decode("utf-8")
+            previous = self._index.pop(key, None)
+            if previous is not None:
+                self._dead_bytes += previous[1] + _HEADER.size + key_len
+
+            if codec == _TOMBSTONE:
+                self._dead_bytes += _HEADER.size + key_len
+            else:
+                self._index[key] = (value_offset, value_len, timestamp, codec)
+
+            offset = value_offset + value_len
+        self._end = offset
+
+    def _catch_up(self) -> None:
+        """Подхват записей других процессов и уплотнения, выполненного другим процессом."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._open()
+            return
+
+        if stat.st_ino != self._inode:
+            self._open()
+        elif stat.st_size > self._end:
+            self._scan(stat.st_size)
+
+    def _append(self, key: str, codec: int, value: bytes, timestamp: float) -> None:
+        """Дописывание записи в конец файла (вызывается под блокировкой)."""
+        key_bytes = key.encode("utf-8")
+        record = _HEADER.pack(codec, len(key_bytes), len(value), timestamp) + key_bytes + value
+
+        with self._file_lock():
+            self._catch_up()
+            offset = self._end
+            if os.fstat(self._fd).st_size != offset:
+                # Хвост незавершённой записи после сбоя процесса
+                os.ftruncate(self._fd, offset)
+            os.write(self._fd, record)
+            self._scan(offset + len(record))
+
+    # Сжатие
+
+    def _compress(self, data: bytes) -> bytes:
+        if self._codec == _CODEC_ZSTD:
+            return self._compressor.compress(data)
+        return zlib.compress(data)
+
+    @staticmethod
+    def _decompress(codec: int, data: bytes) -> bytes:
+        if codec == _CODEC_ZSTD:
+            zstandard = _zstd()
+            if zstandard is None:
+                raise ValueError("Для чтения записи требуется пакет zstandard")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    # API кэша
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            item = self._index.get(key)
+            if item is None:
+                self._catch_up()
+                item = self._index.get(key)
+            if item is None:
+                return None
+
+            value_offset, value_len, timestamp, codec = item
+            if is_expired({"timestamp": timestamp}, self.ttl):
+                return None
+
+            data = os.pread(self._fd, value_len, value_offset)
+
+        try:
+            return json.loads(self._decompress(codec, data).decode("utf-8"))
+        except Exception as e:
+            logger.warning(f"Ошибка при чтении записи сегмента кэша: {str(e)}")
+            return None
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        value = self._compress(json.dumps(entry).encode("utf-8"))
+        with self._lock:
+            self._append(key, self._codec, value, entry.get("timestamp", time.time()))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._catch_up()
+            if key in self._index:
+                self._append(key, _TOMBSTONE, b"", time.time())
+
+    # Уплотнение
+
+    def needs_compaction(self) -> bool:
+        """Проверка, стоит ли уплотнять файл (много мёртвых или устаревших данных, превышен размер)."""
+        with self._lock:
+            total = self._end - len(_MAGIC)
+            if total <= 0:
+                return False
+            now = time.time()
+            expired = sum(
+                item[1] for item in self._index.values() if is_expired({"timestamp": item[2]}, self.ttl, now)
+            )
+            return (self._dead_bytes + expired) / total >= self.compaction_ratio or total > self.max_bytes
+
+    def compact(self) -> None:
+        """Перезапись файла только с живыми записями, новые записи вытесняют старые при превышении размера."""
+        with self._lock, self._file_lock():
+            self._catch_up()
+            now = time.time()
+            live = [
+                (key, item) for key, item in self._index.items()
+                if not is_expired({"timestamp": item[2]}, self.ttl, now)
+            ]
+            # Сначала новые записи, чтобы при превышении лимита отбрасывались старые
+            live.sort(key=lambda pair: pair[1][2], reverse=True)
+
+            tmp_path = self.path.with_name(self.path.name + ".compact")
+            kept = 0
+            with open(tmp_path, "wb") as f:
+                f.write(_MAGIC)
+                for key, (value_offset, value_len, timestamp, codec) in live:
+                    key_bytes = key.encode("utf-8")
+                    if kept + _HEADER.size + len(key_bytes) + value_len > self.max_bytes:
+                        break
+                    # Сжатые значения копируются без перепаковки
+                    f.write(_HEADER.pack(codec, len(key_bytes), value_len, timestamp))
+                    f.write(key_bytes)
+                    f.write(os.pread(self._fd, value_len, value_offset))
+                    kept += _HEADER.size + len(key_bytes) + value_len
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.replace(tmp_path, self.path)
+            old_size = self._end
+            self._open()
+            logger.info(f"Сегмент кэша уплотнён: {old_size} -> {self._end} байт")
+
+    def _compaction_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                if self.needs_compaction():
+                    self.compact()
+            except Exception as e:
+                logger.warning(f"Ошибка при уплотнении сегмента кэша: {str(e)}")
+
+    def close(self) -> None:
+        """Остановка фонового уплотнения и закрытие файла."""
+        self._stop.set()
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def file_size(self) -> int:
+        """Текущий размер файла сегмента в байтах."""
+        return self._end
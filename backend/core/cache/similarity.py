@@ -0,0 +1,319 @@
+"""
+Индекс похожих запросов на основе MinHash по шинглам токенов кода.
+
+Позволяет отдать кэшированный результат для почти одинакового кода
+(переименованная переменная, изменённый литерал) без обращения к модели.
+
+Каждый процесс (воркер Flask или Celery) сохраняет индекс в собственный файл
+рядом с кэшем, а при запуске объединяет файлы всех процессов, поэтому записи
+одного процесса не затираются сохранением другого.
+"""
+import time
+import os
+import json
+import atexit
+import random
+import hashlib
+import logging
+import threading
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from backend.config.model_config import get_cache_settings
+from backend.core.cache.normalize import tokenize_code
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+class SimilarityMatch:
+    """Найденная похожая запись."""
+
+    def __init__(self, cache_key: str, similarity: float):
+        """
+        Args:
+            cache_key: Ключ кэша похожего запроса
+            similarity: Оценка коэффициента Жаккара по шинглам (0..1)
+        """
+        self.cache_key = cache_key
+        self.similarity = similarity
+
+
+class SimilarityIndex:
+    """Ограниченный по размеру LSH-индекс MinHash-сигнатур кэшированных запросов."""
+
+    def __init__(self, threshold: float = 0.9, max_entries: int = 10000, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 3, min_shingles: int = 8, path: Optional[Union[str, Path]] = None,
+                 save_every: int = 50):
+        """
+        Инициализация индекса.
+
+        Args:
+            threshold: Минимальная оценка сходства для повторного использования результата
+            max_entries: Максимальное количество записей в индексе
+            num_perm: Количество хэш-функций MinHash
+            bands: Количество полос LSH (num_perm должно делиться на bands)
+            shingle_size: Длина шингла в токенах
+            min_shingles: Минимальное количество шинглов, при котором код индексируется
+            path: Базовый файл индекса рядом с кэшем (если None, индекс не сохраняется);
+                процесс сохраняет индекс в файл с номером процесса в имени
+            save_every: Сохранять индекс после каждых save_every добавлений
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm должно делиться на bands")
+
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_shingles = min_shingles
+        self.path = Path(path) if path else None
+        self.save_every = save_every
+
+        # Параметры хэш-функций фиксированы, чтобы сигнатуры были совместимы между процессами
+        rng = random.Random(0x5EED)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)
+        ]
+
+        # Ключ кэша -> (область, сигнатура) в порядке использования
+        self._entries: "OrderedDict[str, Tuple[str, Tuple[int, ...]]]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], Set[str]] = {}
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        # Время загрузки: файлы, не изменявшиеся с тех пор, уже объединены в этот индекс
+        self._loaded_at = time.time()
+
+        if self.path is not None:
+            self._load()
+
+    # Сигнатуры
+
+    def _shingles(self, code: str, language: str) -> Set[bytes]:
+        tokens = tokenize_code(code, language)
+        size = self.shingle_size
+        return {" ".join(tokens[i:i + size]).encode("utf-8") for i in range(len(tokens) - size + 1)}
+
+    def signature(self, code: str, language: str) -> Optional[Tuple[int, ...]]:
+        """
+        Вычисление MinHash-сигнатуры кода.
+
+        Args:
+            code: Исходный код
+            language: Язык программирования
+
+        Returns:
+            Сигнатура или None, если код слишком короткий для надёжного сравнения
+        """
+        shingles = self._shingles(code, language)
+        if len(shingles) < self.min_shingles:
+            return None
+
+        hashes = [int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), "big") for shingle in shingles]
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        )
+
+    def _band_keys(self, scope: str, signature: Tuple[int, ...]) -> List[Tuple[str, int, Tuple[int, ...]]]:
+        return [
+            (scope, band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def _similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+    # Индекс
+
+    def add(self, scope: str, code: str, language: str, cache_key: str) -> None:
+        """
+        Добавление запроса в индекс.
+
+        Args:
+            scope: Область сравнения (модель, язык, язык ответа, версия промптов)
+            code: Исходный код запроса
+            language: Язык программирования
+            cache_key: Ключ кэша результата
+        """
+        signature = self.signature(code, language)
+        if signature is None:
+            return
+
+        with self._lock:
+            self._insert(cache_key, scope, signature)
+            self._unsaved += 1
+            should_save = self.path is not None and self._unsaved >= self.save_every
+
+        if should_save:
+            self.save()
+
+    def _insert(self, cache_key: str, scope: str, signature: Tuple[int, ...]) -> None:
+        """Добавление сигнатуры с вытеснением самых старых записей (вызывается под блокировкой)."""
+        self._remove(cache_key)
+        self._entries[cache_key] = (scope, signature)
+        for band_key in self._band_keys(scope, signature):
+            self._buckets.setdefault(band_key, set()).add(cache_key)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, cache_key: str) -> None:
+        item = self._entries.pop(cache_key, None)
+        if item is None:
+            return
+        for band_key in self._band_keys(*item):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(cache_key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def find(self, scope: str, code: str, language: str) -> Optional[SimilarityMatch]:
+        """
+        Поиск самого похожего запроса в той же области.
+
+        Args:
+            scope: Область сравнения
+            code: Исходный код запроса
+            language: Язык программирования
+
+        Returns:
+            Найденная запись или None, если похожих запросов нет
+        """
+        signature = self.signature(code, language)
+        if signature is None:
+            return None
+
+        with self._lock:
+            candidates = set()
+            for band_key in self._band_keys(scope, signature):
+                candidates.update(self._buckets.get(band_key, ()))
+
+            best = None
+            for cache_key in candidates:
+                similarity = self._similarity(signature, self._entries[cache_key][1])
+                if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                    best = SimilarityMatch(cache_key, similarity)
+
+            if best is not None:
+                self._entries.move_to_end(best.cache_key)
+            return best
+
+    def discard(self, cache_key: str) -> None:
+        """Удаление записи, результат которой больше не доступен в кэше."""
+        with self._lock:
+            self._remove(cache_key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # Сохранение
+
+    def _process_path(self) -> Path:
+        """Файл индекса текущего процесса (номер берётся при сохранении, чтобы учесть fork)."""
+        return self.path.with_name(f"{self.path.stem}.{os.getpid()}{self.path.suffix}")
+
+    def _saved_paths(self) -> List[Path]:
+        """Файлы индекса всех процессов, от старых к новым."""
+        paths = [self.path] + list(self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}"))
+        existing = []
+        for path in paths:
+            try:
+                existing.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        return [path for _, path in sorted(existing)]
+
+    def save(self) -> None:
+        """
+        Атомарное сохранение индекса в файл процесса.
+
+        Файлы других процессов, не изменявшиеся после загрузки индекса, уже объединены
+        с ним и удаляются, чтобы файлы завершившихся процессов не накапливались.
+        """
+        if self.path is None:
+            return
+
+        with self._lock:
+            data = {
+                "num_perm": self.num_perm,
+                "shingle_size": self.shingle_size,
+                "entries": [[key, scope, list(signature)] for key, (scope, signature) in self._entries.items()]
+            }
+            self._unsaved = 0
+
+        try:
+            os.makedirs(self.path.parent, exist_ok=True)
+            own_path = self._process_path()
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, own_path)
+        except Exception as e:
+            logger.warning(f"Ошибка при сохранении индекса похожих запросов: {str(e)}")
+            return
+
+        for path in self._saved_paths():
+            try:
+                if path != own_path and path.stat().st_mtime < self._loaded_at:
+                    path.unlink()
+            except OSError:
+                # Файл уже удалён другим процессом
+                continue
+
+    def _load(self) -> None:
+        """Объединение файлов индекса всех процессов; более новые записи считаются недавно использованными."""
+        for path in self._saved_paths():
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logger.warning(f"Ошибка при загрузке индекса похожих запросов {path.name}: {str(e)}")
+                continue
+
+            # Сигнатуры с другими параметрами несовместимы
+            if data.get("num_perm") != self.num_perm or data.get("shingle_size") != self.shingle_size:
+                continue
+
+            with self._lock:
+                for key, scope, signature in data.get("entries", []):
+                    self._insert(key, scope, tuple(signature))
+
+
+_similarity_index: Optional[SimilarityIndex] = None
+_similarity_index_lock = threading.Lock()
+
+
+def get_similarity_index() -> Optional[SimilarityIndex]:
+    """
+    Получение общего для процесса индекса похожих запросов.
+
+    Returns:
+        Экземпляр индекса или None, если поиск похожих запросов отключён
+    """
+    global _similarity_index
+    settings = get_cache_settings()
+    if not settings.get("similarity_enabled"):
+        return None
+
+    if _similarity_index is None:
+        with _similarity_index_lock:
+            if _similarity_index is None:
+                _similarity_index = SimilarityIndex(
+                    threshold=settings.get("similarity_threshold", 0.9),
+                    max_entries=settings.get("similarity_max_entries", 10000),
+                    path=Path(settings.get("cache_dir", "cache")) / "similarity_index.json"
+                )
+                # Сохраняем последние добавления при остановке процесса
+                atexit.register(_similarity_index.save)
+    return _similarity_index
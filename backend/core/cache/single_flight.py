@@ -0,0 +1,166 @@
+"""
+Объединение одновременных одинаковых запросов анализа в один вызов модели.
+"""
+import time
+import uuid
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from backend.config.model_config import get_cache_settings
+
+logger = logging.getLogger(__name__)
+
+# Снятие блокировки только её владельцем
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+else
+    return 0
+end
+"""
+
+
+class _Call:
+    """Выполняющийся вызов, результат которого ожидают другие потоки."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Группа одновременных вызовов с одинаковым ключом.
+
+    Внутри процесса повторные вызовы ждут завершения первого и получают его результат.
+    Если задан клиент Redis, процессы дополнительно договариваются через блокировку:
+    процесс без блокировки ждёт появления результата в общем кэше.
+    """
+
+    def __init__(self, redis_client=None, lock_ttl: float = 180, poll_interval: float = 0.25,
+                 prefix: str = "review-lock:"):
+        """
+        Инициализация группы вызовов.
+
+        Args:
+            redis_client: Клиент Redis для координации между процессами (если None, только внутри процесса)
+            lock_ttl: Время жизни блокировки и максимальное время ожидания в секундах
+            poll_interval: Интервал опроса общего кэша в секундах
+            prefix: Префикс ключей блокировок в Redis
+        """
+        self.redis = redis_client
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any], lookup: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Выполнение вызова с объединением дубликатов.
+
+        Args:
+            key: Ключ вызова (ключ кэша результата)
+            fn: Функция, выполняющая запрос и сохраняющая результат в кэш
+            lookup: Функция поиска готового результата в общем кэше (для ожидания другого процесса)
+
+        Returns:
+            Результат вызова
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(key, fn, lookup)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _run(self, key: str, fn: Callable[[], Any], lookup: Optional[Callable[[], Any]]) -> Any:
+        """Выполнение вызова под распределённой блокировкой, если она настроена."""
+        if self.redis is None:
+            return fn()
+
+        lock_key = f"{self.prefix}{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_ttl
+
+        while True:
+            try:
+                acquired = self.redis.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+            except Exception as e:
+                logger.warning(f"Ошибка при получении блокировки Redis: {str(e)}")
+                return fn()
+
+            if acquired:
+                try:
+                    return fn()
+                finally:
+                    self._release(lock_key, token)
+
+            # Запрос уже выполняет другой процесс - ждём результат в общем кэше.
+            # Если он завершится без результата, блокировка освободится и её захватит этот процесс.
+            if lookup is not None:
+                result = lookup()
+                if result is not None:
+                    return result
+
+            if time.monotonic() >= deadline:
+                return fn()
+            time.sleep(self.poll_interval)
+
+    def _release(self, lock_key: str, token: str) -> None:
+        try:
+            self.redis.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            logger.warning(f"Ошибка при снятии блокировки Redis: {str(e)}")
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """
+    Получение общей для процесса группы вызовов.
+
+    Координация между процессами включается вместе с общим кэшем в Redis,
+    так как только через него ожидающий процесс увидит чужой результат.
+
+    Returns:
+        Экземпляр SingleFlight
+    """
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                settings = get_cache_settings()
+                redis_client = None
+                if settings.get("backend") == "redis":
+                    try:
+                        import redis
+                        redis_client = redis.Redis.from_url(settings.get("redis_url"))
+                    except ImportError:
+                        logger.warning("Пакет redis не установлен, объединение запросов только внутри процесса")
+                _single_flight = SingleFlight(
+                    redis_client=redis_client,
+                    lock_ttl=settings.get("single_flight_lock_ttl", 180)
+                )
+    return _single_flight
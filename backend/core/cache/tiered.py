@@ -0,0 +1,164 @@
+"""
+Двухуровневый кэш результатов анализа: LRU в памяти перед дисковым кэшем или Redis.
+"""
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from backend.config.model_config import get_cache_settings
+from backend.core.cache.base import CacheBackend, CacheEntry, is_expired
+from backend.core.cache.memory import MemoryCache
+from backend.core.cache.disk import DiskCache
+from backend.core.cache.redis_cache import RedisCache
+from backend.core.cache.segment import SegmentCache
+
+
+class TieredCache(CacheBackend):
+    """Кэш с горячим уровнем в памяти перед общим нижним уровнем (диск, файл-сегмент или Redis)."""
+
+    def __init__(self, memory: MemoryCache, backing: Optional[CacheBackend] = None, ttl: Optional[float] = None):
+        """
+        Инициализация двухуровневого кэша.
+
+        Args:
+            memory: Уровень кэша в памяти процесса
+            backing: Нижний уровень кэша (если None, используется только память)
+            ttl: Время свежести записи в секундах. Уровни могут хранить записи дольше
+                (окно stale-while-revalidate), такие записи get() не возвращает.
+                Если None, свежесть определяют сами уровни.
+        """
+        self.memory = memory
+        self.backing = backing
+        self.ttl = ttl
+
+    def _is_stale(self, entry: CacheEntry) -> bool:
+        return self.ttl is not None and is_expired(entry, self.ttl)
+
+    def _get_any(self, key: str) -> Optional[CacheEntry]:
+        """Получение записи из уровней, включая устаревшие записи в окне хранения."""
+        entry = self.memory.get(key)
+        if entry is not None or self.backing is None:
+            return entry
+
+        entry = self.backing.get(key)
+        if entry is not None:
+            # Поднимаем запись в горячий уровень
+            self.memory.set(key, entry)
+        return entry
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._get_any(key)
+        if entry is None or self._is_stale(entry):
+            return None
+        return entry
+
+    def lookup(self, key: str) -> Tuple[Optional[CacheEntry], bool]:
+        """
+        Получение записи вместе с признаком устаревания.
+
+        Args:
+            key: Ключ кэша
+
+        Returns:
+            Кортеж (запись или None, True если запись устарела и её нужно обновить)
+        """
+        entry = self._get_any(key)
+        if entry is None:
+            return None, False
+        return entry, self._is_stale(entry)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, CacheEntry]:
+        keys = list(keys)
+        found = self.memory.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if missing and self.backing is not None:
+            for key, entry in self.backing.get_many(missing).items():
+                self.memory.set(key, entry)
+                found[key] = entry
+        return {key: entry for key, entry in found.items() if not self._is_stale(entry)}
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        self.memory.set(key, entry)
+        if self.backing is not None:
+            self.backing.set(key, entry)
+
+    def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        if self.backing is not None:
+            self.backing.delete(key)
+
+
+_review_cache: Optional[TieredCache] = None
+_review_cache_lock = threading.Lock()
+
+
+def create_review_cache(settings: Optional[Dict] = None) -> TieredCache:
+    """
+    Создание кэша результатов анализа по настройкам.
+
+    Args:
+        settings: Настройки кэша (если None, используются get_cache_settings())
+
+    Returns:
+        Экземпляр двухуровневого кэша
+    """
+    settings = settings or get_cache_settings()
+    # Единая политика TTL для всех уровней. В режиме stale-while-revalidate
+    # уровни хранят записи дольше на окно отсрочки, а свежесть проверяет TieredCache.
+    fresh_ttl = settings.get("expiry_time", 3600)
+    ttl = fresh_ttl
+    if settings.get("stale_while_revalidate"):
+        ttl += settings.get("stale_grace_time", 3600)
+
+    memory = MemoryCache(
+        max_entries=settings.get("memory_max_entries", 1024),
+        max_bytes=settings.get("memory_max_bytes", 64 * 1024 * 1024),
+        ttl=ttl
+    )
+    backend = settings.get("backend", "disk")
+    if backend == "redis":
+        backing = RedisCache(
+            settings.get("redis_url"),
+            ttl=ttl,
+            prefix=settings.get("redis_prefix", "review-cache:")
+        )
+    elif backend == "disk":
+        backing = DiskCache(
+            settings.get("cache_dir", "cache"),
+            max_bytes=settings.get("disk_max_bytes", 512 * 1024 * 1024),
+            ttl=ttl
+        )
+    elif backend == "segment":
+        backing = SegmentCache(
+            settings.get("segment_file") or Path(settings.get("cache_dir", "cache")) / "reviews.seg",
+            max_bytes=settings.get("disk_max_bytes", 512 * 1024 * 1024),
+            ttl=ttl,
+            compression=settings.get("segment_compression", "zlib"),
+            compaction_interval=settings.get("compaction_interval", 300),
+            compaction_ratio=settings.get("compaction_ratio", 0.5)
+        )
+    else:
+        raise ValueError(f"Неизвестный тип кэша: {backend}")
+    return TieredCache(memory, backing, ttl=fresh_ttl)
+
+
+def get_review_cache() -> TieredCache:
+    """
+    Получение общего для процесса кэша результатов анализа.
+
+    Returns:
+        Экземпляр двухуровневого кэша
+    """
+    global _review_cache
+    if _review_cache is None:
+        with _review_cache_lock:
+            if _review_cache is None:
+                _review_cache = create_review_cache()
+    return _review_cache
+
+
+def reset_review_cache() -> None:
+    """Сброс общего кэша (например, после изменения настроек)."""
+    global _review_cache
+    with _review_cache_lock:
+        _review_cache = None
@@ -0,0 +1,176 @@
+"""
+Пакетная генерация для локальных моделей Hugging Face.
+
+Одновременные запросы к одной модели собираются в пакет в течение короткого окна
+и обрабатываются одним вызовом generate с дополнением промптов до общей длины.
+На CPU один пакетный проход занимает лишь немного больше времени, чем одиночный,
+поэтому пропускная способность растёт почти пропорционально размеру пакета.
+"""
+import queue
+import time
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+class _GenerationRequest:
+    """Промпт, ожидающий включения в пакет."""
+
+    def __init__(self, prompt: str, tokens: int):
+        self.prompt = prompt
+        self.tokens = tokens
+        self.future: Future = Future()
+
+
+class GenerationBatcher:
+    """Очередь запросов генерации перед локальной моделью с объединением запросов в пакеты."""
+
+    def __init__(self, model, tokenizer, device: str = "cpu", generate_kwargs: Optional[Dict[str, Any]] = None,
+                 max_batch_size: int = 8, window: float = 0.02, max_batch_tokens: int = 8192):
+        """
+        Инициализация очереди. Поток генерации запускается при первом запросе.
+
+        Args:
+            model: Загруженная модель
+            tokenizer: Токенизатор модели
+            device: Устройство, на котором работает модель
+            generate_kwargs: Параметры generate (max_length, temperature и т.д.)
+            max_batch_size: Максимальное число запросов в пакете
+            window: Время ожидания следующих запросов после первого, в секундах
+            max_batch_tokens: Бюджет токенов пакета с учётом дополнения до самого длинного промпта
+        """
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.generate_kwargs = dict(generate_kwargs or {})
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = window
+        self.max_batch_tokens = max_batch_tokens
+
+        self._encoder_decoder = bool(getattr(getattr(model, "config", None), "is_encoder_decoder", False))
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        if not self._encoder_decoder:
+            # Декодер дополняется слева, чтобы продолжение всех промптов начиналось с одной позиции
+            self.tokenizer.padding_side = "left"
+
+        self._queue: "queue.Queue[_GenerationRequest]" = queue.Queue()
+        # Запрос, не поместившийся в предыдущий пакет
+        self._carry: Optional[_GenerationRequest] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Быстрый токенизатор меняет настройки дополнения при вызове и не допускает одновременной работы
+        self._tokenizer_lock = threading.Lock()
+
+    def submit(self, prompt: str) -> Future:
+        """
+        Постановка промпта в очередь.
+
+        Args:
+            prompt: Промпт для модели
+
+        Returns:
+            Future с текстом ответа без промпта
+        """
+        with self._tokenizer_lock:
+            tokens = len(self.tokenizer(prompt)["input_ids"])
+        request = _GenerationRequest(prompt, tokens)
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="generation-batcher", daemon=True)
+                self._thread.start()
+        self._queue.put(request)
+        return request.future
+
+    def generate(self, prompt: str) -> str:
+        """
+        Генерация ответа с ожиданием результата.
+
+        Args:
+            prompt: Промпт для модели
+
+        Returns:
+            Текст ответа без промпта
+        """
+        return self.submit(prompt).result()
+
+    def _collect(self) -> List[_GenerationRequest]:
+        """Сбор пакета: первый запрос и те, что пришли в течение окна, в пределах размера и бюджета."""
+        first = self._carry or self._queue.get()
+        self._carry = None
+        batch = [first]
+        longest = first.tokens
+        deadline = time.monotonic() + self.window
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Запросы, накопившиеся во время предыдущей генерации, забираются без ожидания
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            # Все промпты пакета дополняются до самого длинного
+            if max(longest, request.tokens) * (len(batch) + 1) > self.max_batch_tokens:
+                self._carry = request
+                break
+            batch.append(request)
+            longest = max(longest, request.tokens)
+        return batch
+
+    def _generate_batch(self, batch: List[_GenerationRequest]) -> None:
+        """Один вызов generate для пакета и передача ответов ожидающим."""
+        # Запросы, от которых отказались до начала генерации, не обрабатываются
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        generate_kwargs = dict(self.generate_kwargs)
+        # max_length учитывает дополнение промпта: короткие промпты получили бы меньше новых токенов.
+        # Пакет генерирует столько, сколько нужно самому короткому промпту, лишнее обрезается
+        max_length = generate_kwargs.pop("max_length", None)
+        if max_length is not None and "max_new_tokens" not in generate_kwargs:
+            generate_kwargs["max_new_tokens"] = max(1, max_length - min(request.tokens for request in batch))
+        budgets = [
+            max(1, max_length - request.tokens) if max_length is not None else None for request in batch
+        ]
+
+        started = time.monotonic()
+        try:
+            with self._tokenizer_lock:
+                inputs = self.tokenizer(
+                    [request.prompt for request in batch], return_tensors="pt", padding=True
+                ).to(self.device)
+            with torch.no_grad():
+                outputs = self.model.generate(
+                    inputs["input_ids"],
+                    attention_mask=inputs["attention_mask"],
+                    pad_token_id=self.tokenizer.pad_token_id,
+                    **generate_kwargs
+                )
+            # Ответ декодера начинается после (дополненного) промпта
+            prompt_length = 0 if self._encoder_decoder else inputs["input_ids"].shape[1]
+            responses = [
+                self.tokenizer.decode(
+                    output[prompt_length:prompt_length + budget] if budget is not None else output[prompt_length:],
+                    skip_special_tokens=True
+                ).strip()
+                for output, budget in zip(outputs, budgets)
+            ]
+        except Exception as e:
+            logger.error(f"Ошибка пакетной генерации ({len(batch)} запросов): {str(e)}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        for request, response in zip(batch, responses):
+            request.future.set_result(response)
+        logger.debug(f"Пакет из {len(batch)} запросов обработан за {time.monotonic() - started:.2f} с")
+
+    def _run(self) -> None:
+        while True:
+            self._generate_batch(self._collect())
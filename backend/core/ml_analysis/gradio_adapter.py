@@ -34,11 +34,6 @@ class GradioAdapter(ModelAdapter):
         Returns:
             Результат анализа кода
         """
-        # Получаем кэшированный результат, если он есть
-        cached_result = self._get_from_cache(code, language)
-        if cached_result:
-            return cached_result
-        
         # Создаем промпт для модели
         prompt = self._create_prompt(code, language)
         
@@ -54,9 +49,6 @@ class GradioAdapter(ModelAdapter):
             # Разбираем ответ в структурированный формат
             parsed_result = self._parse_response(result)
             
-            # Сохраняем результат в кэш
-            self._save_to_cache(code, language, parsed_result)
-            
             return parsed_result
         except Exception as e:
             print(f"Error in Gradio API request: {str(e)}")
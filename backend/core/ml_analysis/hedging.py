@@ -0,0 +1,264 @@
+"""
+Дублирующие (hedged) запросы к вышестоящим серверам для сокращения хвостовых задержек.
+
+Если сервер не ответил за время, близкое к перцентилю его обычной задержки,
+тот же запрос отправляется следующему серверу, и используется первый полученный ответ.
+
+Проигравшие запросы не прерываются и занимают поток до ответа сервера. Поэтому дубли
+выполняются в отдельном ограниченном пуле: при медленных серверах он заполняется,
+и новые дубли не отправляются, а основные запросы не ждут в общей очереди. Задержка
+перед дублем отсчитывается от фактического начала запроса, а не от постановки в очередь.
+"""
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.config.env import get_hedging_settings
+from backend.core.ml_analysis.upstream_health import UpstreamHealthTracker
+
+
+class HedgeBudget:
+    """
+    Ограничение объёма дублирующих запросов.
+
+    Каждый обычный запрос пополняет бюджет на ratio, каждый дублирующий расходует единицу,
+    поэтому в среднем дублируется не более доли ratio запросов.
+    """
+
+    def __init__(self, ratio: float = 0.1, burst: float = 5):
+        """
+        Инициализация бюджета.
+
+        Args:
+            ratio: Допустимая доля дублирующих запросов
+            burst: Максимальный запас бюджета
+        """
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        """Учёт обычного запроса."""
+        with self._lock:
+            self._tokens = min(self._tokens + self.ratio, self.burst)
+
+    def try_acquire(self) -> bool:
+        """
+        Попытка израсходовать бюджет на дублирующий запрос.
+
+        Returns:
+            True, если дублирующий запрос разрешён
+        """
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def refund(self) -> None:
+        """Возврат бюджета за дублирующий запрос, который не был отправлен."""
+        with self._lock:
+            self._tokens = min(self._tokens + 1, self.burst)
+
+
+class HedgePool:
+    """Пул потоков для дублей, не принимающий задачи сверх числа потоков."""
+
+    def __init__(self, max_workers: int):
+        """
+        Args:
+            max_workers: Число потоков пула
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge-request")
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    def try_submit(self, fn: Callable, *args) -> Optional[Future]:
+        """
+        Запуск задачи, если в пуле есть свободный поток.
+
+        Args:
+            fn: Функция задачи
+            *args: Аргументы функции
+
+        Returns:
+            Future задачи или None, если все потоки заняты
+        """
+        if not self._slots.acquire(blocking=False):
+            return None
+
+        def run():
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+
+        try:
+            future = self._executor.submit(run)
+        except Exception:
+            self._slots.release()
+            raise
+        # Отменённая до начала задача не выполнится и не освободит поток сама
+        future.add_done_callback(lambda done: done.cancelled() and self._slots.release())
+        return future
+
+
+class HedgedRequest:
+    """Выполнение запроса с дублированием на следующие серверы списка."""
+
+    def __init__(self, executor: ThreadPoolExecutor, hedge_pool: HedgePool, budget: HedgeBudget,
+                 health: UpstreamHealthTracker, percentile: float = 95, min_delay: float = 1.0,
+                 default_delay: float = 10.0, max_hedges: int = 1):
+        """
+        Args:
+            executor: Пул потоков для основных запросов и перехода на следующий сервер после ошибки
+            hedge_pool: Отдельный ограниченный пул для дублей
+            budget: Бюджет дублирующих запросов
+            health: Трекер состояния серверов (источник статистики задержек)
+            percentile: Перцентиль задержки сервера, после которого отправляется дубль
+            min_delay: Минимальная задержка перед дублем в секундах
+            default_delay: Задержка для серверов без статистики в секундах
+            max_hedges: Максимальное число дублей на один запрос
+        """
+        self.executor = executor
+        self.hedge_pool = hedge_pool
+        self.budget = budget
+        self.health = health
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.max_hedges = max_hedges
+
+    def hedge_delay(self, upstream: str) -> float:
+        """Время ожидания ответа сервера перед отправкой дубля."""
+        latency = self.health.latency_percentile(upstream, self.percentile)
+        if latency is None:
+            return self.default_delay
+        return max(latency, self.min_delay)
+
+    def run(self, servers: List[Dict[str, Any]], attempt: Callable[[Dict[str, Any]], str]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Выполнение запроса: первый ответ побеждает, остальные отменяются.
+
+        Ошибка сервера сразу переводит запрос на следующий сервер (без расхода бюджета),
+        медленный ответ - приводит к дублю, если позволяет бюджет.
+
+        Args:
+            servers: Серверы в порядке опроса
+            attempt: Функция запроса к одному серверу; возвращает ответ или выбрасывает исключение
+
+        Returns:
+            Кортеж (ответ, сервер, который ответил первым)
+
+        Raises:
+            Exception: Последняя ошибка, если ни один сервер не ответил
+        """
+        self.budget.record_request()
+        remaining = list(servers)
+        pending: Dict[Future, Dict[str, Any]] = {}
+        # Последний отправленный запрос и время его фактического начала
+        last_server: Dict[str, Any] = {}
+        last_started: Future = Future()
+        hedges = 0
+        last_error: Optional[BaseException] = None
+
+        def launch(hedge: bool = False) -> bool:
+            nonlocal last_server, last_started
+            server = remaining[0]
+            started: Future = Future()
+
+            def run():
+                started.set_result(time.monotonic())
+                return attempt(server)
+
+            future = self.hedge_pool.try_submit(run) if hedge else self.executor.submit(run)
+            if future is None:
+                return False
+            remaining.pop(0)
+            pending[future] = server
+            last_server, last_started = server, started
+            return True
+
+        launch()
+        try:
+            while pending:
+                can_hedge = bool(remaining) and hedges < self.max_hedges
+                if can_hedge and not last_started.done():
+                    # Ожидание в очереди пула не считается задержкой сервера
+                    wait(list(pending) + [last_started], return_when=FIRST_COMPLETED)
+                timeout = None
+                if can_hedge and last_started.done():
+                    delay = self.hedge_delay(last_server["url"])
+                    timeout = max(delay - (time.monotonic() - last_started.result()), 0)
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                if not done:
+                    # Сервер отвечает дольше обычного - дублируем запрос, если позволяют бюджет и пул дублей
+                    url = last_server["url"]
+                    if not self.budget.try_acquire():
+                        # Бюджет исчерпан - просто ждём уже отправленные запросы
+                        hedges = self.max_hedges
+                    elif launch(hedge=True):
+                        print(f"Сервер {url} не ответил за {delay:.1f} с, дублируем запрос")
+                        hedges += 1
+                    else:
+                        # Все потоки дублей заняты проигравшими запросами - не дублируем
+                        self.budget.refund()
+                        hedges = self.max_hedges
+                    continue
+
+                for future in done:
+                    server = pending.pop(future)
+                    try:
+                        return future.result(), server
+                    except Exception as e:
+                        last_error = e
+
+                if not pending and remaining:
+                    launch()
+        finally:
+            # Проигравшие запросы: ещё не начатые отменяются, выполняющиеся - игнорируются
+            for future in pending:
+                future.cancel()
+
+        raise last_error if last_error is not None else ConnectionError("Нет доступных серверов")
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_hedge_pool: Optional[HedgePool] = None
+_budget: Optional[HedgeBudget] = None
+_hedging_lock = threading.Lock()
+
+
+def get_hedged_request(health: UpstreamHealthTracker) -> Optional[HedgedRequest]:
+    """
+    Получение исполнителя дублирующих запросов с общими для процесса пулом потоков и бюджетом.
+
+    Args:
+        health: Трекер состояния серверов
+
+    Returns:
+        Экземпляр HedgedRequest или None, если дублирование отключено
+    """
+    global _executor, _hedge_pool, _budget
+    settings = get_hedging_settings()
+    if not settings["enabled"]:
+        return None
+
+    if _executor is None:
+        with _hedging_lock:
+            if _executor is None:
+                _budget = HedgeBudget(settings["budget_ratio"], settings["budget_burst"])
+                _hedge_pool = HedgePool(settings["max_hedge_workers"])
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings["max_workers"], thread_name_prefix="hedged-request"
+                )
+
+    return HedgedRequest(
+        _executor, _hedge_pool, _budget, health,
+        percentile=settings["percentile"],
+        min_delay=settings["min_delay"],
+        default_delay=settings["default_delay"],
+        max_hedges=settings["max_hedges"]
+    )
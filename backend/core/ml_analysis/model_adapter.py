@@ -2,25 +2,25 @@ from abc import ABC, abstractmethod
 import sys
 import os
 import json
+import time
 import logging
-import hashlib
+import threading
 import torch
 from pathlib import Path
-from typing import Dict, Any, Optional, Union
-from transformers import AutoTokenizer, AutoModelForCausalLM, AutoModel, T5ForConditionalGeneration
+from typing import Dict, Any, Iterator, Optional, Union
+from transformers import AutoTokenizer, AutoModelForCausalLM, AutoModel, T5ForConditionalGeneration, TextIteratorStreamer
 
 # Импортируем улучшенные модули конфигурации
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent.parent))
-from backend.config.env import get_api_key, get_request_timeout, is_debug_mode
+from backend.config.env import get_api_key, get_local_batch_settings, get_request_timeout, is_debug_mode
 from backend.config.model_config import (
     get_model_parameters, 
     get_prompt_template, 
     get_response_parsing_config,
-    get_local_model_config,
-    is_caching_enabled,
-    get_cache_settings
+    get_local_model_config
 )
+from backend.core.ml_analysis.generation_batcher import GenerationBatcher
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
@@ -32,13 +32,12 @@ class ModelAdapter(ABC):
     """Базовый адаптер для работы с моделями."""
     
     def __init__(self):
-        """Инициализация базового адаптера."""
-        self.cache_dir = Path(get_cache_settings().get("cache_dir", "cache"))
-        self.cache_enabled = is_caching_enabled()
+        """
+        Инициализация базового адаптера.
         
-        # Создаем директорию для кэша, если она не существует
-        if self.cache_enabled:
-            os.makedirs(self.cache_dir, exist_ok=True)
+        Результаты анализа кэширует ModelService: его ключ учитывает язык ответа
+        и сводку статического анализа, которые адаптер не видит.
+        """
     
     @abstractmethod
     def analyze_code(self, code: str, language: str) -> str:
@@ -83,87 +82,6 @@ class ModelAdapter(ABC):
             Структурированный ответ
         """
         return response
-    
-    def _get_cache_key(self, code: str, language: str) -> str:
-        """
-        Создание ключа кэша на основе кода и языка.
-        
-        Args:
-            code: Исходный код для анализа
-            language: Язык программирования
-            
-        Returns:
-            Ключ кэша
-        """
-        # Создаем хэш на основе кода, языка и имени класса
-        content = f"{self.__class__.__name__}:{language}:{code}"
-        return hashlib.md5(content.encode()).hexdigest()
-    
-    def _get_from_cache(self, code: str, language: str) -> Optional[str]:
-        """
-        Получение результата из кэша.
-        
-        Args:
-            code: Исходный код для анализа
-            language: Язык программирования
-            
-        Returns:
-            Кэшированный результат или None, если кэш не найден
-        """
-        if not self.cache_enabled:
-            return None
-            
-        cache_key = self._get_cache_key(code, language)
-        cache_file = self.cache_dir / f"{cache_key}.json"
-        
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'r') as f:
-                    cache_data = json.load(f)
-                    
-                # Проверяем срок действия кэша
-                import time
-                current_time = time.time()
-                cache_time = cache_data.get("timestamp", 0)
-                cache_expiry = get_cache_settings().get("expiry_time", 3600)
-                
-                if current_time - cache_time <= cache_expiry:
-                    logger.debug(f"Используется кэшированный результат для {language}")
-                    return cache_data.get("result")
-            except Exception as e:
-                logger.warning(f"Ошибка при чтении кэша: {str(e)}")
-                
-        return None
-    
-    def _save_to_cache(self, code: str, language: str, result: str) -> None:
-        """
-        Сохранение результата в кэш.
-        
-        Args:
-            code: Исходный код для анализа
-            language: Язык программирования
-            result: Результат анализа
-        """
-        if not self.cache_enabled:
-            return
-            
-        cache_key = self._get_cache_key(code, language)
-        cache_file = self.cache_dir / f"{cache_key}.json"
-        
-        try:
-            import time
-            cache_data = {
-                "result": result,
-                "timestamp": time.time(),
-                "language": language
-            }
-            
-            with open(cache_file, 'w') as f:
-                json.dump(cache_data, f)
-                
-            logger.debug(f"Результат сохранен в кэш для {language}")
-        except Exception as e:
-            logger.warning(f"Ошибка при сохранении в кэш: {str(e)}")
 
 
 class OpenAIAdapter(ModelAdapter):
@@ -232,11 +150,6 @@ class OpenAIAdapter(ModelAdapter):
         Returns:
             Результат анализа кода
         """
-        # Проверяем кэш
-        cached_result = self._get_from_cache(code, language)
-        if cached_result:
-            return cached_result
-            
         # Создаем промпт
         messages = self._create_prompt(code, language)
         
@@ -259,13 +172,11 @@ class OpenAIAdapter(ModelAdapter):
             response = self.client.chat.completions.create(**params, timeout=timeout)
             result = self._parse_response(response.choices[0].message.content)
             
-            # Сохраняем результат в кэш
-            self._save_to_cache(code, language, result)
-            
             return result
         except Exception as e:
             logger.error(f"Ошибка при анализе кода с OpenAI: {str(e)}")
-            return f"Ошибка при анализе кода с OpenAI: {str(e)}"
+            # Ошибка не должна попасть в кэш как результат анализа
+            raise
 
 
 class AnthropicAdapter(ModelAdapter):
@@ -326,11 +237,6 @@ class AnthropicAdapter(ModelAdapter):
         Returns:
             Результат анализа кода
         """
-        # Проверяем кэш
-        cached_result = self._get_from_cache(code, language)
-        if cached_result:
-            return cached_result
-            
         # Создаем промпт
         prompt = self._create_prompt(code, language)
         
@@ -355,13 +261,11 @@ class AnthropicAdapter(ModelAdapter):
             response = self.client.messages.create(**params)
             result = self._parse_response(response.content[0].text)
             
-            # Сохраняем результат в кэш
-            self._save_to_cache(code, language, result)
-            
             return result
         except Exception as e:
             logger.error(f"Ошибка при анализе кода с Anthropic: {str(e)}")
-            return f"Ошибка при анализе кода с Anthropic: {str(e)}"
+            # Ошибка не должна попасть в кэш как результат анализа
+            raise
 
 
 class HuggingFaceAdapter(ModelAdapter):
@@ -393,6 +297,10 @@ class HuggingFaceAdapter(ModelAdapter):
         self.tokenizer = None
         self.model = None
         
+        # Очередь пакетной генерации для одновременных запросов (создаётся при первом запросе)
+        self._batcher = None
+        self._batcher_lock = threading.Lock()
+        
         # Загружаем токенизатор и модель
         self._load_model()
     
@@ -459,57 +367,136 @@ class HuggingFaceAdapter(ModelAdapter):
             print(f"Ошибка загрузки модели и токенизатора: {str(e)}")
             raise
     
-    def analyze_code(self, code: str, language: str) -> str:
+    @staticmethod
+    def _static_section(kwargs: Dict[str, Any]) -> str:
+        """Сводка замечаний статического анализа для промпта (пустая строка, если её нет)."""
+        digest = kwargs.get("static_digest")
+        return f"\n\n{digest}" if digest else ""
+    
+    def _generation_params(self) -> Dict[str, Any]:
+        """Параметры generate из конфигурации модели."""
+        return {
+            "max_length": self.model_params.get("max_length", 2048),
+            "temperature": self.model_params.get("temperature", 0.7),
+            "top_p": self.model_params.get("top_p", 0.95),
+            "top_k": self.model_params.get("top_k", 50),
+            "num_return_sequences": 1
+        }
+    
+    def _get_batcher(self) -> Optional[GenerationBatcher]:
+        """Очередь пакетной генерации или None, если пакетная генерация отключена."""
+        settings = get_local_batch_settings()
+        if not settings["enabled"]:
+            return None
+        with self._batcher_lock:
+            if self._batcher is None:
+                self._batcher = GenerationBatcher(
+                    self.model,
+                    self.tokenizer,
+                    device=self.device,
+                    generate_kwargs=self._generation_params(),
+                    max_batch_size=settings["max_batch_size"],
+                    window=settings["window"],
+                    max_batch_tokens=settings["max_batch_tokens"]
+                )
+            return self._batcher
+    
+    def analyze_code(self, code: str, language: str, **kwargs) -> str:
         """
         Анализ кода с использованием модели Hugging Face.
         
+        Одновременные запросы объединяются в пакеты и обрабатываются одним вызовом generate.
+        
         Args:
             code: Исходный код для анализа
             language: Язык программирования
+            **kwargs: Дополнительные параметры (static_digest - сводка замечаний статического анализа)
             
         Returns:
             Результат анализа кода
         """
-        # Проверяем кэш
-        cached_result = self._get_from_cache(code, language)
-        if cached_result:
-            return cached_result
-            
         # Создаем промпт
-        prompt = self._create_prompt(code, language)
+        prompt = self._create_prompt(code, language) + self._static_section(kwargs)
         
         try:
-            # Токенизируем промпт
-            inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
-            
-            # Генерируем ответ
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    inputs["input_ids"],
-                    max_length=self.model_params.get("max_length", 2048),
-                    temperature=self.model_params.get("temperature", 0.7),
-                    top_p=self.model_params.get("top_p", 0.95),
-                    top_k=self.model_params.get("top_k", 50),
-                    num_return_sequences=1,
-                    pad_token_id=self.tokenizer.eos_token_id
-                )
-            
-            # Декодируем ответ
-            result = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            
-            # Удаляем промпт из ответа
-            result = result.replace(prompt, "").strip()
+            batcher = self._get_batcher()
+            if batcher is not None:
+                # Ответ уже без промпта
+                result = batcher.generate(prompt)
+            else:
+                # Токенизируем промпт
+                inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
+                
+                # Генерируем ответ
+                with torch.no_grad():
+                    outputs = self.model.generate(
+                        inputs["input_ids"],
+                        pad_token_id=self.tokenizer.eos_token_id,
+                        **self._generation_params()
+                    )
+                
+                # Декодируем ответ
+                result = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+                
+                # Удаляем промпт из ответа
+                result = result.replace(prompt, "").strip()
             
             # Разбираем ответ в структурированный формат
             parsed_result = self._parse_response(result)
             
-            # Сохраняем результат в кэш
-            self._save_to_cache(code, language, parsed_result)
-            
             return parsed_result
         except Exception as e:
             logger.error(f"Ошибка при анализе кода с {self.model_name}: {str(e)}")
-            return f"Ошибка при анализе кода с {self.model_name}: {str(e)}"
+            # Ошибка не должна попасть в кэш как результат анализа
+            raise
+    
+    def stream_code(self, code: str, language: str, **kwargs) -> Iterator[str]:
+        """
+        Потоковый анализ кода: текст возвращается по мере генерации через TextIteratorStreamer.
+        
+        Args:
+            code: Исходный код для анализа
+            language: Язык программирования
+            
+        Yields:
+            Фрагменты результата анализа
+        """
+        prompt = self._create_prompt(code, language) + self._static_section(kwargs)
+        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
+        # Промпт не возвращается, ожидание следующего фрагмента ограничено таймаутом запроса
+        streamer = TextIteratorStreamer(
+            self.tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=get_request_timeout()
+        )
+        errors = []
+        
+        def generate():
+            try:
+                with torch.no_grad():
+                    self.model.generate(
+                        inputs["input_ids"],
+                        pad_token_id=self.tokenizer.eos_token_id,
+                        streamer=streamer,
+                        **self._generation_params()
+                    )
+            except Exception as e:
+                errors.append(e)
+                # Завершаем поток текста, чтобы читатель не ждал до таймаута
+                streamer.end()
+        
+        # Генерация выполняется в отдельном потоке, текущий поток читает фрагменты
+        thread = threading.Thread(target=generate, daemon=True)
+        thread.start()
+        
+        parts = []
+        for text in streamer:
+            if text:
+                parts.append(text)
+                yield text
+        thread.join()
+        
+        if errors:
+            logger.error(f"Ошибка при потоковом анализе кода с {self.model_name}: {str(errors[0])}")
+            raise errors[0]
 
 
 class MockAdapter(ModelAdapter):
@@ -537,11 +524,6 @@ class MockAdapter(ModelAdapter):
         Returns:
             Результат анализа кода
         """
-        # Проверяем кэш
-        cached_result = self._get_from_cache(code, language)
-        if cached_result:
-            return cached_result
-            
         # Используем специфичный для языка ответ, если он есть
         if language in self.language_specific_responses:
             result = self.language_specific_responses[language]
@@ -564,9 +546,6 @@ class MockAdapter(ModelAdapter):
             Это тестовый вывод для проверки функциональности интерфейса.
             """
         
-        # Сохраняем результат в кэш
-        self._save_to_cache(code, language, result)
-        
         return result
 
 
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Iterator, Optional
 from openai import OpenAI
 from backend.config.env import get_api_key, get_env_variable
 
@@ -28,12 +28,37 @@ class OpenAIAdapter:
             str: Результат анализа кода
         """
         # Формируем запрос для анализа кода
-        prompt = f"""Analyze the following {language} code and suggest improvements:
+        prompt = self._build_prompt(code, language, kwargs.get('static_digest', ''))
+        # Получаем максимальное количество токенов из kwargs или используем значение по умолчанию
+        max_tokens = kwargs.get('max_tokens', 2000)
+        # Получаем уровень сложности из kwargs или используем значение по умолчанию
+        temperature = kwargs.get('temperature', 0.3)
+        # Получаем уровень сложности из kwargs или используем значение по умолчанию
+        top_p = kwargs.get('top_p', 0.3)
+        # Получаем уровень сложности из kwargs или используем значение по умолчанию
+        frequency_penalty = kwargs.get('frequency_penalty', 0.3)
+        # Вызываем метод analyze для выполнения запроса
+        return self.analyze(prompt, max_tokens=max_tokens, temperature=temperature)
+
+    @staticmethod
+    def _build_prompt(code: str, language: str, static_digest: str = '') -> str:
+        """
+        Формирование запроса для анализа кода.
+
+        Args:
+            code (str): Код для анализа
+            language (str): Язык программирования
+            static_digest (str): Сводка замечаний статического анализа, которые модель не должна повторять
+
+        Returns:
+            str: Запрос для модели
+        """
+        return f"""Analyze the following {language} code and suggest improvements:
 
 ```{language}
 {code}
 ```
-Please provide:
+{static_digest}Please provide:
 
 1. Code quality issues
 2. Potential bugs
@@ -41,16 +66,50 @@ Please provide:
 4. Security concerns
 5. Best practices recommendations
    """
-   # Получаем максимальное количество токенов из kwargs или используем значение по умолчанию
-        max_tokens = kwargs.get('max_tokens', 2000)
-        # Получаем уровень сложности из kwargs или используем значение по умолчанию
-        temperature = kwargs.get('temperature', 0.3)
-        # Получаем уровень сложности из kwargs или используем значение по умолчанию
-        top_p = kwargs.get('top_p', 0.3)
-        # Получаем уровень сложности из kwargs или используем значение по умолчанию
-        frequency_penalty = kwargs.get('frequency_penalty', 0.3)
-        # Вызываем метод analyze для выполнения запроса
-        return self.analyze(prompt, max_tokens=max_tokens, temperature=temperature)
+
+    def stream_code(self, code: str, language: str, **kwargs) -> Iterator[str]:
+        """
+        Потоковый анализ кода с использованием OpenAI API.
+
+        Args:
+            code (str): Код для анализа
+            language (str): Язык программирования
+            **kwargs: Дополнительные параметры
+
+        Yields:
+            str: Фрагменты результата анализа
+        """
+        prompt = self._build_prompt(code, language, kwargs.get('static_digest', ''))
+        return self.stream(prompt, max_tokens=kwargs.get('max_tokens', 2000), temperature=kwargs.get('temperature', 0.3))
+
+    def stream(self, prompt: str, max_tokens: Optional[int] = None, temperature: float = 0.3) -> Iterator[str]:
+        """
+        Потоковый запрос к OpenAI API (stream=True).
+
+        Args:
+            prompt (str): Запрос для анализа
+            max_tokens (int, optional): Максимальное количество токенов в ответе
+            temperature (float): Уровень творчества модели
+
+        Yields:
+            str: Фрагменты ответа по мере генерации
+        """
+        if not self.api_key:
+            print("Ошибка: Ключ OpenAI API не установлен")
+            raise ValueError("OpenAI API key is not set")
+        print(f"Sending streaming request to OpenAI API with model: {self.model_name}")
+        with self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True) as response:
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
 
     def analyze(self, prompt: str, max_tokens: Optional[int] = None, temperature: float = 0.3) -> str:
         """
@@ -1,6 +1,82 @@
-from typing import Optional, Dict, Any, List
+import time
+import atexit
+import threading
+import importlib.util
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+import httpx
 from openai import OpenAI
-from backend.config.env import get_env_variable, get_api_key  # Добавляем импорт get_api_key
+from backend.config.env import get_env_variable, get_api_key, get_http_pool_settings, get_request_timeout
+from backend.core.ml_analysis.upstream_health import get_upstream_health
+from backend.core.ml_analysis.hedging import get_hedged_request
+from backend.core.ml_analysis.upstream_prober import get_upstream_prober
+
+class EmptyResponseError(Exception):
+    """Сервер вернул пустой или некорректный ответ."""
+
+
+# Общий для процесса пул клиентов по (base_url, ключ, заголовки). Адаптеры пересоздаются
+# при изменении и удалении моделей, а соединения и TLS-сессии остаются в пуле и
+# используются новым адаптером с теми же параметрами
+_clients: Dict[Tuple[str, str, Tuple[Tuple[str, str], ...]], OpenAI] = {}
+_clients_lock = threading.Lock()
+
+
+def _create_http_client() -> httpx.Client:
+    """Создание HTTP-клиента с keep-alive, ограничениями пула и HTTP/2, если он доступен."""
+    pool_settings = get_http_pool_settings()
+    # HTTP/2 требует пакет h2
+    http2 = pool_settings["http2"] and importlib.util.find_spec("h2") is not None
+    return httpx.Client(
+        http2=http2,
+        timeout=get_request_timeout(),
+        limits=httpx.Limits(
+            max_connections=pool_settings["max_connections"],
+            max_keepalive_connections=pool_settings["max_keepalive_connections"],
+            keepalive_expiry=pool_settings["keepalive_expiry"]
+        )
+    )
+
+
+def get_pooled_client(base_url: str, api_key: str, headers: Optional[Dict[str, str]] = None) -> OpenAI:
+    """
+    Получение клиента из общего пула.
+    
+    Args:
+        base_url: Базовый URL API
+        api_key: API ключ
+        headers: Дополнительные заголовки
+        
+    Returns:
+        Клиент OpenAI, переиспользуемый для одинаковых параметров
+    """
+    pool_key = (base_url, api_key, tuple(sorted((headers or {}).items())))
+    with _clients_lock:
+        client = _clients.get(pool_key)
+        if client is None:
+            client = OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                default_headers=headers,
+                http_client=_create_http_client()
+            )
+            _clients[pool_key] = client
+    return client
+
+
+def close_pooled_clients() -> None:
+    """Закрытие соединений всех клиентов пула (при остановке процесса)."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception as e:
+            print(f"Ошибка при закрытии HTTP-клиента: {str(e)}")
+
+
+atexit.register(close_pooled_clients)
+
 
 class ProxyOpenAIAdapter:
     """Адаптер для работы с OpenAI-совместимыми API через прокси."""
@@ -45,19 +121,32 @@ class ProxyOpenAIAdapter:
         self.alternative_proxies = self._setup_alternative_proxies()
         
         # Создаем клиента с базовым URL и заголовками
-        self.client = OpenAI(
-            api_key=self.api_key, 
-            base_url=self.base_url,
-            default_headers=self.headers
-        )
+        self.client = self._get_client(self.base_url, self.api_key, self.headers)
         
         print(f"Инициализирован ProxyOpenAIAdapter с моделью: {self.model_name}")
         print(f"API ключ установлен: {'Да' if self.api_key else 'Нет'}")
         print(f"Base URL: {self.base_url}")
         print(f"Дополнительные заголовки: {self.headers}")
         
-        # Проверяем доступность сервера
-        self._check_connectivity()
+        # Доступность серверов проверяется в фоне, создание адаптера не обращается к сети
+        if self.api_key:
+            prober = get_upstream_prober()
+            for server in self._build_servers(self.api_key):
+                prober.register(server["url"], server["key"], server["headers"])
+    
+    def _get_client(self, base_url: str, api_key: str, headers: Dict[str, str]) -> OpenAI:
+        """
+        Получение клиента из общего пула процесса.
+        
+        Args:
+            base_url: Базовый URL API
+            api_key: API ключ
+            headers: Дополнительные заголовки
+            
+        Returns:
+            Клиент OpenAI, переиспользуемый для одинаковых параметров
+        """
+        return get_pooled_client(base_url, api_key, headers)
     
     def _setup_alternative_proxies(self) -> List[Dict[str, Any]]:
         """Настройка альтернативных прокси-серверов."""
@@ -89,41 +178,16 @@ class ProxyOpenAIAdapter:
         print(f"Настроено {len(proxies)} альтернативных прокси-серверов")
         return proxies
         
-    def _check_connectivity(self):
-        """Проверка доступности API сервера."""
-        try:
-            # Простой запрос для проверки соединения
-            self.client.models.list()
-            print("Соединение с API сервером установлено успешно")
-        except Exception as e:
-            print(f"Предупреждение: не удалось установить соединение с основным API: {str(e)}")
-            print("Запросы будут перенаправлены на альтернативные серверы при необходимости")
-    
-    def analyze(self, prompt, **kwargs):
+    def _build_servers(self, api_key: str) -> List[Dict[str, Any]]:
         """
-        Анализ с использованием модели через прокси.
+        Формирование списка серверов для запроса в порядке из конфигурации.
         
         Args:
-            prompt: Запрос для анализа.
-            **kwargs: Дополнительные параметры.
+            api_key: API ключ
             
         Returns:
-            Результат анализа.
+            Список серверов (url, key, headers, model)
         """
-        # Получаем параметры из kwargs или используем значения по умолчанию
-        max_tokens = kwargs.get("max_tokens", 2000)
-        model_temperature = kwargs.get("temperature", 0.3)
-        model_top_p = kwargs.get("top_p", 0.3)
-        model_frequency_penalty = kwargs.get("frequency_penalty", 0.3)
-        
-        # Используем self.api_key вместо получения ключа из переменных окружения
-        api_key = self.api_key
-        if not api_key:
-            # Пробуем получить ключ из переменных окружения как запасной вариант
-            api_key = get_env_variable("API_KEY", "")
-            if not api_key:
-                raise ValueError("API ключ не найден. Установите переменную окружения API_KEY или PROXY_API_KEY.")
-        
         # Получаем актуальную модель
         actual_model = self.model_name
         
@@ -140,8 +204,7 @@ class ProxyOpenAIAdapter:
             })
         
         # Добавляем альтернативные прокси-серверы
-        proxies = self._setup_alternative_proxies()
-        for proxy in proxies:
+        for proxy in self.alternative_proxies:
             # Формируем ключ с префиксом, если он указан
             key = api_key
             if "key_prefix" in proxy and proxy["key_prefix"]:
@@ -161,52 +224,31 @@ class ProxyOpenAIAdapter:
                 "model": proxy_model
             })
         
-        # Перебираем серверы, пока не получим успешный ответ
-        last_error = None
-        for server in servers_to_try:
-            try:
-                print(f"Отправка запроса к API с моделью: {server['model']} через {server['url']}")
-                print(f"Параметры: temperature={model_temperature}, top_p={model_top_p}, frequency_penalty={model_frequency_penalty}")
-                
-                # Создаем клиента для текущего сервера
-                client = OpenAI(
-                    api_key=server["key"],
-                    base_url=server["url"],
-                    default_headers=server["headers"]
-                )
-                
-                # Отправляем запрос
-                response = client.chat.completions.create(
-                    model=server["model"],
-                    messages=[
-                        {"role": "system", "content": "You are a code review assistant that helps identify issues and suggest improvements."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=max_tokens,
-                    temperature=model_temperature,
-                    top_p=model_top_p,
-                    frequency_penalty=model_frequency_penalty
-                )
-                
-                # Проверяем ответ
-                if response and hasattr(response, 'choices') and response.choices:
-                    response_content = response.choices[0].message.content
-                    if response_content and response_content.strip():
-                        print(f"Получен ответ от API: {response_content[:100]}...")
-                        return response_content
-                    else:
-                        print(f"Получен пустой ответ от сервера {server['url']}. Полный ответ: {response}")
-                        continue  # Пробуем следующий сервер
-                else:
-                    print(f"Получен некорректный ответ от сервера {server['url']}. Ответ: {response}")
-            
-            except Exception as e:
-                error_message = f"Ошибка при использовании сервера {server['url']}: {str(e)}"
-                print(error_message)
-                last_error = e
-                continue  # Пробуем следующий сервер
-        
-        # Если все серверы не сработали, генерируем соответствующее исключение
+        return servers_to_try
+    
+    def _require_api_key(self) -> str:
+        """Получение API ключа адаптера или из переменной окружения API_KEY."""
+        # Используем self.api_key вместо получения ключа из переменных окружения
+        api_key = self.api_key
+        if not api_key:
+            # Пробуем получить ключ из переменных окружения как запасной вариант
+            api_key = get_env_variable("API_KEY", "")
+            if not api_key:
+                raise ValueError("API ключ не найден. Установите переменную окружения API_KEY или PROXY_API_KEY.")
+        return api_key
+    
+    @staticmethod
+    def _generation_params(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Параметры генерации из kwargs или значения по умолчанию."""
+        return {
+            "max_tokens": kwargs.get("max_tokens", 2000),
+            "temperature": kwargs.get("temperature", 0.3),
+            "top_p": kwargs.get("top_p", 0.3),
+            "frequency_penalty": kwargs.get("frequency_penalty", 0.3)
+        }
+    
+    def _raise_error(self, last_error: Optional[Exception]) -> None:
+        """Преобразование последней ошибки серверов в понятное исключение."""
         if last_error:
             error_str = str(last_error).lower()
             if "api_key" in error_str or "apikey" in error_str:
@@ -225,6 +267,226 @@ class ProxyOpenAIAdapter:
                 raise Exception(f"Неожиданная ошибка: {str(last_error)}")
         else:
             raise ConnectionError("Не удалось получить ответ от всех доступных серверов")
+    
+    def _request_server(self, server: Dict[str, Any], prompt: str, params: Dict[str, Any], health) -> str:
+        """
+        Запрос к одному серверу с учётом результата в статистике серверов.
+        
+        Args:
+            server: Параметры сервера (url, key, headers, model)
+            prompt: Запрос для анализа
+            params: Параметры генерации
+            health: Трекер состояния серверов
+            
+        Returns:
+            Непустой ответ модели
+            
+        Raises:
+            EmptyResponseError: Если сервер вернул пустой ответ
+            Exception: При ошибке запроса
+        """
+        started = time.monotonic()
+        try:
+            print(f"Отправка запроса к API с моделью: {server['model']} через {server['url']}")
+            print(f"Параметры: temperature={params['temperature']}, top_p={params['top_p']}, frequency_penalty={params['frequency_penalty']}")
+            
+            # Берем клиента для текущего сервера из пула
+            client = self._get_client(server["url"], server["key"], server["headers"])
+            
+            # Отправляем запрос
+            response = client.chat.completions.create(
+                model=server["model"],
+                messages=[
+                    {"role": "system", "content": "You are a code review assistant that helps identify issues and suggest improvements."},
+                    {"role": "user", "content": prompt}
+                ],
+                **params
+            )
+        except Exception as e:
+            print(f"Ошибка при использовании сервера {server['url']}: {str(e)}")
+            health.record_failure(server["url"], time.monotonic() - started)
+            raise
+        
+        # Проверяем ответ
+        if response and hasattr(response, 'choices') and response.choices:
+            response_content = response.choices[0].message.content
+            if response_content and response_content.strip():
+                print(f"Получен ответ от API: {response_content[:100]}...")
+                health.record_success(server["url"], time.monotonic() - started)
+                return response_content
+            print(f"Получен пустой ответ от сервера {server['url']}. Полный ответ: {response}")
+        else:
+            print(f"Получен некорректный ответ от сервера {server['url']}. Ответ: {response}")
+        
+        health.record_failure(server["url"], time.monotonic() - started)
+        raise EmptyResponseError(f"Пустой или некорректный ответ от сервера {server['url']}")
+    
+    def analyze(self, prompt, **kwargs):
+        """
+        Анализ с использованием модели через прокси.
+        
+        Args:
+            prompt: Запрос для анализа.
+            **kwargs: Дополнительные параметры.
+            
+        Returns:
+            Результат анализа.
+        """
+        params = self._generation_params(kwargs)
+        
+        # Сначала самые быстрые исправные серверы; серверы с разомкнутым выключателем пропускаются
+        health = get_upstream_health()
+        servers_to_try = health.order(self._build_servers(self._require_api_key()))
+        
+        def attempt(server):
+            return self._request_server(server, prompt, params, health)
+        
+        last_error = None
+        hedged = get_hedged_request(health)
+        if hedged is not None and len(servers_to_try) > 1:
+            # Медленный сервер дублируется следующим, используется первый ответ
+            try:
+                response_content, _ = hedged.run(servers_to_try, attempt)
+                return response_content
+            except EmptyResponseError:
+                pass
+            except Exception as e:
+                last_error = e
+        else:
+            # Перебираем серверы, пока не получим успешный ответ
+            for server in servers_to_try:
+                try:
+                    return attempt(server)
+                except EmptyResponseError:
+                    continue  # Пробуем следующий сервер
+                except Exception as e:
+                    last_error = e
+                    continue  # Пробуем следующий сервер
+        
+        # Если все серверы не сработали, генерируем соответствующее исключение
+        self._raise_error(last_error)
+
+    def stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        """
+        Потоковый анализ: фрагменты ответа возвращаются по мере генерации.
+        
+        Переключение на следующий сервер возможно только до первого фрагмента ответа.
+        
+        Args:
+            prompt: Запрос для анализа.
+            **kwargs: Дополнительные параметры.
+            
+        Yields:
+            Фрагменты ответа модели.
+        """
+        params = self._generation_params(kwargs)
+        health = get_upstream_health()
+        servers_to_try = health.order(self._build_servers(self._require_api_key()))
+        
+        last_error = None
+        for server in servers_to_try:
+            started = time.monotonic()
+            emitted = False
+            try:
+                print(f"Потоковый запрос к API с моделью: {server['model']} через {server['url']}")
+                client = self._get_client(server["url"], server["key"], server["headers"])
+                with client.chat.completions.create(
+                    model=server["model"],
+                    messages=[
+                        {"role": "system", "content": "You are a code review assistant that helps identify issues and suggest improvements."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    stream=True,
+                    **params
+                ) as response:
+                    for chunk in response:
+                        if not chunk.choices:
+                            continue
+                        text = chunk.choices[0].delta.content
+                        if text:
+                            emitted = True
+                            yield text
+            except Exception as e:
+                print(f"Ошибка при потоковом запросе к серверу {server['url']}: {str(e)}")
+                health.record_failure(server["url"], time.monotonic() - started)
+                if emitted:
+                    # Часть ответа уже отправлена клиенту - продолжить с другого сервера нельзя
+                    raise
+                last_error = e
+                continue
+            
+            if emitted:
+                health.record_success(server["url"], time.monotonic() - started)
+                return
+            print(f"Получен пустой потоковый ответ от сервера {server['url']}")
+            health.record_failure(server["url"], time.monotonic() - started)
+        
+        self._raise_error(last_error)
+
+    @staticmethod
+    def _build_prompt(code: str, language: str, response_language: str = 'russian', static_digest: str = '') -> str:
+        """
+        Формирование запроса для анализа кода.
+        
+        Args:
+            code (str): Код для анализа.
+            language (str): Язык программирования.
+            response_language (str): Язык ответа (russian, english, bilingual).
+            static_digest (str): Сводка замечаний статического анализа, которые модель не должна повторять.
+            
+        Returns:
+            str: Запрос для модели.
+        """
+        # Базовая часть промпта одинакова для всех языков - анализ кода
+        base_prompt = (
+            f"Analyze the following {language} code and suggest improvements:\n\n"
+            f"```{language}\n"
+            f"{code}\n"
+            "```\n\n"
+            f"{static_digest}"
+        )
+        
+        # Формируем запрос в зависимости от выбранного языка ответа
+        if response_language == 'bilingual':
+            prompt = base_prompt + (
+                "Please provide your response in TWO languages - first in Russian, then in English, separated by a clear divider.\n"
+                "Cover: code quality, potential bugs, performance, security, and best practices.\n\n"
+                "Format your response as follows:\n"
+                "## РУССКИЙ ОТВЕТ\n"
+                "[Полный ответ на русском языке]\n\n"
+                "---\n\n"
+                "## ENGLISH RESPONSE\n"
+                "[Complete response in English]"
+            )
+        elif response_language == 'english':
+            prompt = base_prompt + (
+                "Please provide your response in English only.\n"
+                "Cover: code quality, potential bugs, performance, security, best practices, readability, and any other relevant observations."
+            )
+        else:  # russian по умолчанию
+            prompt = base_prompt + (
+                "Please provide your response in Russian only.\n"
+                "Cover: code quality, potential bugs, performance, security, best practices, readability, and any other relevant observations."
+            )
+        
+        return prompt
+
+    def stream_code(self, code: str, language: str, **kwargs) -> Iterator[str]:
+        """
+        Потоковый анализ кода.
+        
+        Args:
+            code (str): Код для анализа.
+            language (str): Язык программирования.
+            **kwargs: Дополнительные параметры.
+            
+        Yields:
+            str: Фрагменты результата анализа.
+        """
+        prompt = self._build_prompt(
+            code, language, kwargs.get('response_language', 'russian'), kwargs.get('static_digest', '')
+        )
+        return self.stream(prompt, **self._generation_params(kwargs))
 
     def analyze_code(self, code: str, language: str, **kwargs) -> str:
         """
@@ -242,36 +504,7 @@ class ProxyOpenAIAdapter:
             # Получаем язык ответа из параметров
             response_language = kwargs.get('response_language', 'russian')
             
-            # Базовая часть промпта одинакова для всех языков - анализ кода
-            base_prompt = (
-                f"Analyze the following {language} code and suggest improvements:\n\n"
-                f"```{language}\n"
-                f"{code}\n"
-                "```\n\n"
-            )
-            
-            # Формируем запрос в зависимости от выбранного языка ответа
-            if response_language == 'bilingual':
-                prompt = base_prompt + (
-                    "Please provide your response in TWO languages - first in Russian, then in English, separated by a clear divider.\n"
-                    "Cover: code quality, potential bugs, performance, security, and best practices.\n\n"
-                    "Format your response as follows:\n"
-                    "## РУССКИЙ ОТВЕТ\n"
-                    "[Полный ответ на русском языке]\n\n"
-                    "---\n\n"
-                    "## ENGLISH RESPONSE\n"
-                    "[Complete response in English]"
-                )
-            elif response_language == 'english':
-                prompt = base_prompt + (
-                    "Please provide your response in English only.\n"
-                    "Cover: code quality, potential bugs, performance, security, best practices, readability, and any other relevant observations."
-                )
-            else:  # russian по умолчанию
-                prompt = base_prompt + (
-                    "Please provide your response in Russian only.\n"
-                    "Cover: code quality, potential bugs, performance, security, best practices, readability, and any other relevant observations."
-                )
+            prompt = self._build_prompt(code, language, response_language, kwargs.get('static_digest', ''))
             
             # Получаем параметры из kwargs или используем значения по умолчанию
             max_tokens = kwargs.get("max_tokens", 2000)
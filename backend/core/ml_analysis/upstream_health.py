@@ -0,0 +1,240 @@
+"""
+Отслеживание состояния вышестоящих API-серверов и автоматический выключатель (circuit breaker).
+"""
+import math
+import time
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from backend.config.env import get_circuit_breaker_settings
+
+# Состояния выключателя
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class UpstreamHealth:
+    """Скользящая статистика и состояние выключателя одного сервера."""
+
+    def __init__(self, window: int):
+        self.results = deque(maxlen=window)  # (успех, задержка в секундах)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.probe_started_at = 0.0
+        self.last_checked: Optional[float] = None
+        self.probe: Optional[Dict[str, Any]] = None  # результат последней фоновой проверки
+
+    @property
+    def error_rate(self) -> float:
+        if not self.results:
+            return 0.0
+        return sum(1 for success, _ in self.results if not success) / len(self.results)
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Средняя задержка успешных ответов."""
+        latencies = [latency for success, latency in self.results if success]
+        if not latencies:
+            return None
+        return sum(latencies) / len(latencies)
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Перцентиль задержки успешных ответов (метод ближайшего ранга)."""
+        latencies = sorted(latency for success, latency in self.results if success)
+        if not latencies:
+            return None
+        rank = max(math.ceil(percentile / 100 * len(latencies)), 1)
+        return latencies[min(rank, len(latencies)) - 1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        latency = self.latency
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate, 3),
+            "latency": round(latency, 3) if latency is not None else None,
+            "samples": len(self.results),
+            "last_checked": self.last_checked,
+            "probe": self.probe
+        }
+
+
+class UpstreamHealthTracker:
+    """Состояние всех вышестоящих серверов для выбора порядка их опроса."""
+
+    def __init__(self, failure_threshold: int = 3, error_rate_threshold: float = 0.5, window: int = 20,
+                 min_samples: int = 5, open_timeout: float = 30):
+        """
+        Инициализация трекера.
+
+        Args:
+            failure_threshold: Число ошибок подряд, после которого выключатель размыкается
+            error_rate_threshold: Доля ошибок в окне, после которой выключатель размыкается
+            window: Размер скользящего окна результатов
+            min_samples: Минимальное число результатов для оценки доли ошибок
+            open_timeout: Время в секундах до пробного запроса к разомкнутому серверу
+        """
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.window = window
+        self.min_samples = min_samples
+        self.open_timeout = open_timeout
+        self._upstreams: Dict[str, UpstreamHealth] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, upstream: str) -> UpstreamHealth:
+        health = self._upstreams.get(upstream)
+        if health is None:
+            health = UpstreamHealth(self.window)
+            self._upstreams[upstream] = health
+        return health
+
+    def allow_request(self, upstream: str) -> bool:
+        """
+        Проверка, можно ли отправить запрос серверу.
+
+        Разомкнутый выключатель после open_timeout пропускает один пробный запрос (полуоткрытое состояние).
+
+        Args:
+            upstream: URL сервера
+
+        Returns:
+            True, если запрос можно отправить
+        """
+        with self._lock:
+            health = self._get(upstream)
+            if health.state == OPEN and time.monotonic() - health.opened_at >= self.open_timeout:
+                health.state = HALF_OPEN
+                health.probe_in_flight = False
+
+            if health.state == CLOSED:
+                return True
+            # Пробный запрос мог так и не быть отправлен (ответил другой сервер) - разрешаем новый
+            probe_expired = time.monotonic() - health.probe_started_at >= self.open_timeout
+            if health.state == HALF_OPEN and (not health.probe_in_flight or probe_expired):
+                health.probe_in_flight = True
+                health.probe_started_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self, upstream: str, latency: float) -> None:
+        """Учёт успешного ответа сервера."""
+        with self._lock:
+            health = self._get(upstream)
+            health.results.append((True, latency))
+            health.consecutive_failures = 0
+            health.last_checked = time.time()
+            if health.state != CLOSED:
+                # Пробный запрос прошёл - замыкаем выключатель
+                health.state = CLOSED
+                health.probe_in_flight = False
+
+    def record_failure(self, upstream: str, latency: float) -> None:
+        """Учёт ошибки сервера."""
+        with self._lock:
+            health = self._get(upstream)
+            health.results.append((False, latency))
+            health.consecutive_failures += 1
+            health.last_checked = time.time()
+
+            too_many_errors = (
+                len(health.results) >= self.min_samples and health.error_rate >= self.error_rate_threshold
+            )
+            if health.state == HALF_OPEN or health.consecutive_failures >= self.failure_threshold or too_many_errors:
+                health.state = OPEN
+                health.opened_at = time.monotonic()
+                health.probe_in_flight = False
+
+    def record_probe(self, upstream: str, reachable: bool, latency: float) -> None:
+        """
+        Учёт результата фоновой проверки доступности сервера.
+
+        Недоступный сервер отключается сразу; доступный сервер с разомкнутым выключателем
+        переводится в полуоткрытое состояние, чтобы следующий запрос проверил его.
+        Задержка проверки не смешивается со статистикой запросов к модели.
+
+        Args:
+            upstream: URL сервера
+            reachable: Сервер ответил на проверку
+            latency: Время проверки в секундах
+        """
+        with self._lock:
+            health = self._get(upstream)
+            health.probe = {"reachable": reachable, "latency": round(latency, 3), "checked_at": time.time()}
+            if not reachable and health.state != OPEN:
+                health.state = OPEN
+                health.opened_at = time.monotonic()
+                health.probe_in_flight = False
+            elif reachable and health.state == OPEN:
+                health.state = HALF_OPEN
+                health.probe_in_flight = False
+
+    def latency_percentile(self, upstream: str, percentile: float) -> Optional[float]:
+        """
+        Перцентиль задержки сервера по скользящему окну.
+
+        Args:
+            upstream: URL сервера
+            percentile: Перцентиль (0..100)
+
+        Returns:
+            Задержка в секундах или None, если успешных ответов ещё не было
+        """
+        with self._lock:
+            health = self._upstreams.get(upstream)
+            if health is None or len(health.results) < self.min_samples:
+                return None
+            return health.latency_percentile(percentile)
+
+    def _score(self, upstream: str) -> float:
+        """Ожидаемая стоимость запроса: задержка с штрафом за ошибки (неизвестные серверы - в конце)."""
+        health = self._upstreams.get(upstream)
+        latency = health.latency if health is not None else None
+        if latency is None:
+            return float("inf")
+        return latency * (1 + 4 * health.error_rate)
+
+    def order(self, servers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Упорядочивание серверов: сначала быстрые и исправные, разомкнутые пропускаются.
+
+        Args:
+            servers: Серверы в порядке из конфигурации (словари с ключом "url")
+
+        Returns:
+            Серверы в порядке опроса. Если все выключатели разомкнуты, возвращается исходный порядок.
+        """
+        allowed = [server for server in servers if self.allow_request(server["url"])]
+        if not allowed:
+            return list(servers)
+
+        with self._lock:
+            # sorted устойчив: при равной оценке сохраняется порядок из конфигурации
+            return sorted(allowed, key=lambda server: self._score(server["url"]))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Текущее состояние всех известных серверов."""
+        with self._lock:
+            return {upstream: health.to_dict() for upstream, health in self._upstreams.items()}
+
+
+_tracker: Optional[UpstreamHealthTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_upstream_health() -> UpstreamHealthTracker:
+    """
+    Получение общего для процесса трекера состояния серверов.
+
+    Returns:
+        Экземпляр UpstreamHealthTracker
+    """
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = UpstreamHealthTracker(**get_circuit_breaker_settings())
+    return _tracker
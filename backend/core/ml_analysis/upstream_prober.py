@@ -0,0 +1,107 @@
+"""
+Фоновая проверка доступности вышестоящих API-серверов.
+
+Проверки выполняются по расписанию в отдельном потоке, результаты попадают
+в трекер состояния серверов и влияют на порядок их опроса.
+"""
+import time
+import asyncio
+import threading
+from typing import Dict, Optional
+
+import httpx
+
+from backend.config.env import get_upstream_probe_settings
+from backend.core.ml_analysis.upstream_health import UpstreamHealthTracker, get_upstream_health
+
+
+class UpstreamProber:
+    """Периодическая асинхронная проверка зарегистрированных серверов."""
+
+    def __init__(self, health: UpstreamHealthTracker, interval: float = 60, timeout: float = 5):
+        """
+        Инициализация проверки.
+
+        Args:
+            health: Трекер состояния серверов
+            interval: Интервал между проверками в секундах (0 - фоновая проверка отключена)
+            timeout: Время ожидания ответа сервера в секундах
+        """
+        self.health = health
+        self.interval = interval
+        self.timeout = timeout
+        # URL сервера -> (API ключ, заголовки)
+        self._targets: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, url: str, api_key: str, headers: Optional[Dict[str, str]] = None) -> None:
+        """
+        Регистрация сервера для проверки (без сетевых обращений).
+
+        Args:
+            url: Базовый URL OpenAI-совместимого API
+            api_key: API ключ
+            headers: Дополнительные заголовки
+        """
+        with self._lock:
+            self._targets[url] = (api_key, dict(headers or {}))
+            if self.interval > 0 and self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="upstream-prober", daemon=True)
+                self._thread.start()
+
+    async def _probe(self, client: httpx.AsyncClient, url: str, api_key: str, headers: Dict[str, str]) -> None:
+        request_headers = dict(headers)
+        request_headers["Authorization"] = f"Bearer {api_key}"
+        started = time.monotonic()
+        try:
+            response = await client.get(f"{url.rstrip('/')}/models", headers=request_headers)
+            # Ответ 4xx означает, что сервер доступен (например, ключ не подходит для списка моделей)
+            reachable = response.status_code < 500
+        except httpx.HTTPError:
+            reachable = False
+        self.health.record_probe(url, reachable, time.monotonic() - started)
+
+    async def _probe_all(self) -> None:
+        with self._lock:
+            targets = list(self._targets.items())
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            await asyncio.gather(*(
+                self._probe(client, url, api_key, headers) for url, (api_key, headers) in targets
+            ))
+
+    def probe_now(self) -> None:
+        """Однократная проверка всех зарегистрированных серверов."""
+        asyncio.run(self._probe_all())
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.probe_now()
+            except Exception as e:
+                print(f"Ошибка при фоновой проверке серверов API: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def stop(self) -> None:
+        """Остановка фоновой проверки."""
+        self._stop.set()
+
+
+_prober: Optional[UpstreamProber] = None
+_prober_lock = threading.Lock()
+
+
+def get_upstream_prober() -> UpstreamProber:
+    """
+    Получение общей для процесса фоновой проверки серверов.
+
+    Returns:
+        Экземпляр UpstreamProber
+    """
+    global _prober
+    if _prober is None:
+        with _prober_lock:
+            if _prober is None:
+                _prober = UpstreamProber(get_upstream_health(), **get_upstream_probe_settings())
+    return _prober
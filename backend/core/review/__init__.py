@@ -0,0 +1,14 @@
+"""
+Разбиение кода на части и сборка итогового отчёта анализа.
+"""
+from backend.core.review.units import CodeUnit, split_into_units
+from backend.core.review.diff import (
+    DiffHunk,
+    changed_lines_between,
+    extract_hunks,
+    map_line_numbers,
+    parse_unified_diff,
+    remap_line_numbers
+)
+from backend.core.review.chunks import split_into_chunks
+from backend.core.review.merge import merge_hunk_reviews, merge_unit_reviews, reduce_chunk_reviews
@@ -0,0 +1,80 @@
+"""
+Разбиение больших файлов на части по синтаксическим границам.
+"""
+from typing import List, Tuple
+
+from backend.core.review.units import CodeUnit, split_into_units
+
+
+def _segments(code: str, language: str) -> List[Tuple[int, int]]:
+    """Непрерывные диапазоны строк, начинающиеся с границ верхнеуровневых объявлений."""
+    lines = code.splitlines()
+    boundaries = sorted({1} | {
+        unit.start_line for unit in split_into_units(code, language) if unit.kind != "module"
+    })
+    ends = [start - 1 for start in boundaries[1:]] + [len(lines)]
+    return [(start, end) for start, end in zip(boundaries, ends) if start <= end]
+
+
+def _split_oversized(lines: List[str], start: int, end: int, max_chars: int) -> List[Tuple[int, int]]:
+    """Деление слишком большого объявления по пустым строкам, а при их отсутствии - по строкам."""
+    parts = []
+    part_start = start
+    size = 0
+    last_blank = None
+    for number in range(start, end + 1):
+        size += len(lines[number - 1]) + 1
+        if not lines[number - 1].strip():
+            last_blank = number
+        if size > max_chars and number > part_start:
+            cut = last_blank if last_blank is not None and last_blank > part_start else number - 1
+            parts.append((part_start, cut))
+            part_start = cut + 1
+            size = sum(len(line) + 1 for line in lines[part_start - 1:number])
+            last_blank = None
+    parts.append((part_start, end))
+    return parts
+
+
+def split_into_chunks(code: str, language: str, max_chars: int) -> List[CodeUnit]:
+    """
+    Разбиение кода на части не больше max_chars символов.
+
+    Части собираются из последовательных верхнеуровневых объявлений, поэтому функции
+    и классы не разрываются; объявление больше лимита делится по пустым строкам.
+
+    Args:
+        code: Исходный код
+        language: Язык программирования
+        max_chars: Максимальный размер части в символах
+
+    Returns:
+        Части кода в порядке следования с номерами строк исходного файла
+    """
+    lines = code.splitlines()
+    if len(code) <= max_chars or not lines:
+        return [CodeUnit("chunk", "chunk-1", 1, max(len(lines), 1), code)]
+
+    ranges = []
+    for start, end in _segments(code, language):
+        if sum(len(line) + 1 for line in lines[start - 1:end]) > max_chars:
+            ranges.extend(_split_oversized(lines, start, end, max_chars))
+        else:
+            ranges.append((start, end))
+
+    # Жадно объединяем соседние диапазоны, пока часть не превышает лимит
+    packed: List[List[int]] = []
+    size = 0
+    for start, end in ranges:
+        range_size = sum(len(line) + 1 for line in lines[start - 1:end])
+        if packed and size + range_size <= max_chars:
+            packed[-1][1] = end
+            size += range_size
+        else:
+            packed.append([start, end])
+            size = range_size
+
+    return [
+        CodeUnit("chunk", f"chunk-{index}", start, end, "\n".join(lines[start - 1:end]))
+        for index, (start, end) in enumerate(packed, 1)
+    ]
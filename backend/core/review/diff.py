@@ -0,0 +1,212 @@
+"""
+Выделение изменённых фрагментов кода по unified diff или по двум версиям файла.
+"""
+import re
+import difflib
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from backend.core.review.units import split_into_units
+
+_HUNK_HEADER_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+# Ссылки на строки в ответе модели: "строка 5", "строки 3-7", "line 12", "lines 4–6"
+_LINE_REF_RE = re.compile(r"\b(строк[а-я]*|lines?)(\s+)(\d+)(?:(\s*[-–]\s*)(\d+))?", re.IGNORECASE)
+
+
+class DiffHunk:
+    """Фрагмент новой версии файла с изменениями и окружающим контекстом."""
+
+    def __init__(self, start_line: int, end_line: int, changed_lines: List[int], source: str):
+        """
+        Инициализация фрагмента.
+
+        Args:
+            start_line: Номер первой строки в новой версии файла (с 1)
+            end_line: Номер последней строки (включительно)
+            changed_lines: Номера изменённых строк внутри фрагмента
+            source: Исходный код фрагмента
+        """
+        self.start_line = start_line
+        self.end_line = end_line
+        self.changed_lines = changed_lines
+        self.source = source
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Описание фрагмента без исходного кода."""
+        return {
+            "start_line": self.start_line,
+            "end_line": self.end_line,
+            "changed_lines": self.changed_lines
+        }
+
+
+def parse_unified_diff(diff: str) -> Tuple[Dict[int, str], Set[int]]:
+    """
+    Разбор unified diff одного файла.
+
+    Args:
+        diff: Текст unified diff
+
+    Returns:
+        Кортеж (известные строки новой версии по номерам, номера изменённых строк).
+        Для удалённых строк изменённой считается строка новой версии на месте удаления.
+
+    Raises:
+        ValueError: Если diff не содержит фрагментов или описывает несколько файлов
+    """
+    lines: Dict[int, str] = {}
+    changed: Set[int] = set()
+    line_number = None
+    files = 0
+
+    for raw in diff.splitlines():
+        if raw.startswith("+++ "):
+            files += 1
+            if files > 1:
+                raise ValueError("Diff содержит изменения нескольких файлов, используйте пакетный анализ")
+            line_number = None
+            continue
+        header = _HUNK_HEADER_RE.match(raw)
+        if header:
+            line_number = int(header.group(1))
+            continue
+        if line_number is None or raw.startswith(("--- ", "\\")):
+            continue
+
+        if raw.startswith("+"):
+            lines[line_number] = raw[1:]
+            changed.add(line_number)
+            line_number += 1
+        elif raw.startswith("-"):
+            changed.add(max(line_number, 1))
+        else:
+            lines[line_number] = raw[1:] if raw.startswith(" ") else raw
+            line_number += 1
+
+    if not lines and not changed:
+        raise ValueError("Diff не содержит изменений")
+    # Удаление в конце файла указывает за последнюю строку
+    changed = {number if number in lines else max((n for n in lines if n < number), default=number)
+               for number in changed}
+    return lines, changed
+
+
+def changed_lines_between(old_code: str, new_code: str) -> Set[int]:
+    """
+    Номера изменённых строк новой версии по сравнению со старой.
+
+    Args:
+        old_code: Старая версия файла
+        new_code: Новая версия файла
+
+    Returns:
+        Номера добавленных и изменённых строк (с 1); для удалений - строка на месте удаления
+    """
+    old_lines = old_code.splitlines()
+    new_lines = new_code.splitlines()
+    changed = set()
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, _, _, start, end in matcher.get_opcodes():
+        if tag in ("replace", "insert"):
+            changed.update(range(start + 1, end + 1))
+        elif tag == "delete" and new_lines:
+            changed.add(min(start + 1, len(new_lines)))
+    return changed
+
+
+def _enclosing_range(line: int, units) -> Optional[Tuple[int, int]]:
+    for unit in units:
+        if unit.kind != "module" and unit.start_line <= line <= unit.end_line:
+            return unit.start_line, unit.end_line
+    return None
+
+
+def extract_hunks(lines: Dict[int, str], changed: Set[int], language: str, context: int = 3,
+                  enclosing: bool = False) -> List[DiffHunk]:
+    """
+    Выделение фрагментов для анализа вокруг изменённых строк.
+
+    Args:
+        lines: Строки новой версии по номерам (весь файл или только строки из diff)
+        changed: Номера изменённых строк
+        language: Язык программирования
+        context: Число строк контекста до и после изменений
+        enclosing: Брать изменённую функцию или класс целиком (нужен весь файл)
+
+    Returns:
+        Непересекающиеся фрагменты в порядке следования
+    """
+    units = []
+    if enclosing and lines and len(lines) == max(lines):
+        units = split_into_units("\n".join(lines[number] for number in sorted(lines)), language)
+
+    ranges = []
+    for line in sorted(changed):
+        span = _enclosing_range(line, units) if units else None
+        if span is None:
+            span = (line - context, line + context)
+        ranges.append(span)
+
+    # Объединяем пересекающиеся и соседние диапазоны
+    merged: List[List[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    hunks = []
+    for start, end in merged:
+        # В режиме diff известны не все строки - фрагмент делится на непрерывные участки
+        run: List[int] = []
+        for number in range(start, end + 1):
+            if number in lines:
+                run.append(number)
+                continue
+            _append_hunk(hunks, run, lines, changed)
+            run = []
+        _append_hunk(hunks, run, lines, changed)
+    return hunks
+
+
+def _append_hunk(hunks: List[DiffHunk], run: List[int], lines: Dict[int, str], changed: Set[int]) -> None:
+    changed_in_run = [number for number in run if number in changed]
+    if not changed_in_run:
+        return
+    source = "\n".join(lines[number] for number in run)
+    hunks.append(DiffHunk(run[0], run[-1], changed_in_run, source))
+
+
+def remap_line_numbers(text: str, offset: int) -> str:
+    """
+    Пересчёт номеров строк в ответе модели из нумерации фрагмента в нумерацию файла.
+
+    Args:
+        text: Ответ модели по фрагменту
+        offset: Номер строки файла, предшествующей фрагменту
+
+    Returns:
+        Ответ со ссылками на строки новой версии файла
+    """
+    if not offset:
+        return text
+    return map_line_numbers(text, lambda line: line + offset)
+
+
+def map_line_numbers(text: str, file_line: Callable[[int], int]) -> str:
+    """
+    Замена ссылок на строки в ответе модели по произвольному соответствию строк.
+
+    Args:
+        text: Ответ модели по фрагменту
+        file_line: Номер строки файла по номеру строки фрагмента
+
+    Returns:
+        Ответ со ссылками на строки файла
+    """
+    def shift(match: "re.Match") -> str:
+        result = f"{match.group(1)}{match.group(2)}{file_line(int(match.group(3)))}"
+        if match.group(5):
+            result += f"{match.group(4)}{file_line(int(match.group(5)))}"
+        return result
+
+    return _LINE_REF_RE.sub(shift, text)
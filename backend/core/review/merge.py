@@ -0,0 +1,154 @@
+"""
+Объединение результатов анализа отдельных частей кода в один отчёт.
+"""
+import re
+import json
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List
+
+from backend.core.review.diff import DiffHunk, map_line_numbers, remap_line_numbers
+from backend.core.review.units import CodeUnit
+
+_UNIT_TITLES = {
+    "function": "Функция",
+    "class": "Класс",
+    "block": "Блок",
+    "module": "Код модуля"
+}
+
+
+def _as_text(result: Any) -> str:
+    """Приведение результата модели (или заглушки) к строке."""
+    if isinstance(result, str):
+        return result.strip()
+    if isinstance(result, (dict, list)):
+        return json.dumps(result, ensure_ascii=False)
+    return str(result or "")
+
+
+def merge_unit_reviews(units: List[CodeUnit], results: List[Any]) -> str:
+    """
+    Объединение отчётов по единицам кода в один отчёт.
+
+    Единица анализируется отдельно от файла, поэтому номера строк в её отчёте
+    пересчитываются в нумерацию файла. Отчёт из кэша мог быть получен для той же
+    единицы в другом месте файла и пересчитывается так же.
+
+    Args:
+        units: Единицы кода
+        results: Отчёты модели для каждой единицы в том же порядке
+
+    Returns:
+        Итоговый отчёт в формате Markdown
+    """
+    sections = []
+    for unit, result in zip(units, results):
+        title = _UNIT_TITLES.get(unit.kind, unit.kind)
+        name = f" `{unit.name}`" if unit.kind != "module" else ""
+        text = map_line_numbers(_as_text(result), unit.file_line)
+        sections.append(f"## {title}{name} (строки {unit.start_line}-{unit.end_line})\n\n{text}")
+    return "\n\n---\n\n".join(sections)
+
+
+def merge_hunk_reviews(hunks: List[DiffHunk], results: List[Any]) -> str:
+    """
+    Объединение отчётов по изменённым фрагментам в один отчёт.
+
+    Номера строк в отчётах пересчитываются в нумерацию новой версии файла.
+
+    Args:
+        hunks: Изменённые фрагменты
+        results: Отчёты модели для каждого фрагмента в том же порядке
+
+    Returns:
+        Итоговый отчёт в формате Markdown
+    """
+    sections = []
+    for hunk, result in zip(hunks, results):
+        text = remap_line_numbers(_as_text(result), hunk.start_line - 1)
+        sections.append(f"## Изменения в строках {hunk.start_line}-{hunk.end_line}\n\n{text}")
+    return "\n\n---\n\n".join(sections)
+
+
+_HEADING_RE = re.compile(r"^#{1,6}\s+(?:\d+[.)]\s*)?(.*?)\s*#*$")
+_ITEM_MARKER_RE = re.compile(r"^(?:[-*+]|\d+[.)])\s+")
+_WORD_RE = re.compile(r"\w+")
+_GENERAL_SECTION = "Общие замечания"
+
+
+def _tokens(text: str) -> FrozenSet[str]:
+    return frozenset(word.lower() for word in _WORD_RE.findall(text))
+
+
+def _is_duplicate(tokens: FrozenSet[str], seen: List[FrozenSet[str]], threshold: float = 0.8) -> bool:
+    """Проверка сходства замечания с уже добавленными (коэффициент Жаккара по словам)."""
+    for other in seen:
+        union = len(tokens | other)
+        if union and len(tokens & other) / union >= threshold:
+            return True
+    return False
+
+
+def reduce_chunk_reviews(chunks: List[CodeUnit], results: List[Any]) -> str:
+    """
+    Объединение отчётов по частям большого файла без обращения к модели.
+
+    Замечания группируются по заголовкам разделов, номера строк пересчитываются
+    в нумерацию файла, повторяющиеся замечания (например, об одном и том же стиле
+    во всех частях) остаются в одном экземпляре.
+
+    Args:
+        chunks: Части файла
+        results: Отчёты модели для каждой части в том же порядке
+
+    Returns:
+        Итоговый отчёт в формате Markdown
+    """
+    sections: "OrderedDict[str, List[str]]" = OrderedDict()
+    seen: Dict[str, List[FrozenSet[str]]] = {}
+
+    for chunk, result in zip(chunks, results):
+        section = _GENERAL_SECTION
+        text = remap_line_numbers(_as_text(result), chunk.start_line - 1)
+        code_block = None
+        last_added = False
+        for line in text.splitlines():
+            # Блоки кода (примеры исправлений) относятся к предыдущему замечанию
+            if line.strip().startswith("```"):
+                if code_block is None:
+                    code_block = [line.strip()]
+                    continue
+                code_block.append(line.strip())
+                if last_added:
+                    items = sections[title]
+                    items[-1] += "\n\n" + "\n".join("  " + block_line for block_line in code_block)
+                code_block = None
+                continue
+            if code_block is not None:
+                code_block.append(line)
+                continue
+
+            heading = _HEADING_RE.match(line.strip())
+            if heading:
+                section = heading.group(1) or _GENERAL_SECTION
+                last_added = False
+                continue
+            item = _ITEM_MARKER_RE.sub("", line.strip())
+            if not item or set(item) <= set("-*_=`"):
+                continue
+
+            tokens = _tokens(item)
+            # Разделы с разным регистром или нумерацией считаются одним разделом
+            key = section.lower()
+            title = next((name for name in sections if name.lower() == key), section)
+            last_added = not _is_duplicate(tokens, seen.setdefault(key, []))
+            if not last_added:
+                continue
+            seen[key].append(tokens)
+            sections.setdefault(title, []).append(item)
+
+    ranges = ", ".join(f"{chunk.start_line}-{chunk.end_line}" for chunk in chunks)
+    parts = [f"Файл проанализирован по частям (строки {ranges})."]
+    for title, items in sections.items():
+        parts.append(f"## {title}\n\n" + "\n".join(f"- {item}" for item in items))
+    return "\n\n".join(parts)
@@ -0,0 +1,171 @@
+"""
+Разбиение исходного кода на верхнеуровневые единицы (функции и классы).
+"""
+import ast
+import re
+from typing import Any, Dict, List, Optional
+
+# Имя объявления в заголовке блока для C-подобных языков
+_HEADER_NAME_RE = re.compile(r"(?:class|interface|struct|enum|function|def)\s+(\w+)|(\w+)\s*\(")
+_STRING_OR_COMMENT_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|//[^\n]*')
+
+
+class CodeUnit:
+    """Верхнеуровневая единица кода."""
+
+    def __init__(self, kind: str, name: str, start_line: int, end_line: int, source: str,
+                 line_numbers: Optional[List[int]] = None):
+        """
+        Инициализация единицы кода.
+
+        Args:
+            kind: Тип единицы (function, class, block, module)
+            name: Имя объявления
+            start_line: Номер первой строки (с 1)
+            end_line: Номер последней строки (включительно)
+            source: Исходный код единицы
+            line_numbers: Номера строк файла для каждой строки единицы, если строки
+                идут не подряд (код модуля между функциями и классами)
+        """
+        self.kind = kind
+        self.name = name
+        self.start_line = start_line
+        self.end_line = end_line
+        self.source = source
+        self.line_numbers = line_numbers
+
+    def file_line(self, line: int) -> int:
+        """
+        Номер строки файла по номеру строки внутри единицы.
+
+        Args:
+            line: Номер строки единицы (с 1)
+
+        Returns:
+            Номер строки файла
+        """
+        if not self.line_numbers:
+            return line + self.start_line - 1
+        if line < 1:
+            return self.line_numbers[0]
+        if line > len(self.line_numbers):
+            return self.line_numbers[-1] + line - len(self.line_numbers)
+        return self.line_numbers[line - 1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Описание единицы без исходного кода."""
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "start_line": self.start_line,
+            "end_line": self.end_line
+        }
+
+
+def _module_unit(lines: List[str], covered: set) -> List[CodeUnit]:
+    """Сбор строк вне функций и классов (импорты, глобальные переменные) в одну единицу."""
+    rest = [(number, line) for number, line in enumerate(lines, 1) if number not in covered]
+    if not any(line.strip() for _, line in rest):
+        return []
+    source = "\n".join(line for _, line in rest)
+    return [CodeUnit("module", "<module>", rest[0][0], rest[-1][0], source, [number for number, _ in rest])]
+
+
+def _split_python(code: str) -> List[CodeUnit]:
+    tree = ast.parse(code)
+    lines = code.splitlines()
+    units = []
+    covered = set()
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            kind = "function"
+        elif isinstance(node, ast.ClassDef):
+            kind = "class"
+        else:
+            continue
+
+        # Декораторы относятся к объявлению
+        start = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+        end = node.end_lineno
+        units.append(CodeUnit(kind, node.name, start, end, "\n".join(lines[start - 1:end])))
+        covered.update(range(start, end + 1))
+
+    return _module_unit(lines, covered) + units
+
+
+def _split_braces(code: str) -> List[CodeUnit]:
+    """Разбиение C-подобного кода по парным фигурным скобкам верхнего уровня."""
+    lines = code.splitlines()
+    units = []
+    covered = set()
+    depth = 0
+    start = None
+    in_block_comment = False
+
+    for number, line in enumerate(lines, 1):
+        text = line
+        if in_block_comment:
+            if "*/" not in text:
+                continue
+            text = text.split("*/", 1)[1]
+            in_block_comment = False
+        text = _STRING_OR_COMMENT_RE.sub("", text)
+        text = re.sub(r"/\*.*?\*/", "", text)
+        if "/*" in text:
+            text = text.split("/*", 1)[0]
+            in_block_comment = True
+
+        if depth == 0 and start is None and "{" in text:
+            start = number
+            # Заголовок объявления может занимать предыдущие строки (аннотации, сигнатура)
+            while start > 1 and (start - 1) not in covered and lines[start - 2].strip() \
+                    and not lines[start - 2].rstrip().endswith((";", "}")):
+                start -= 1
+
+        depth += text.count("{") - text.count("}")
+        depth = max(depth, 0)
+
+        if start is not None and depth == 0:
+            header = " ".join(lines[start - 1:number])
+            match = _HEADER_NAME_RE.search(header)
+            name = (match.group(1) or match.group(2)) if match else f"block@{start}"
+            kind = "class" if re.search(r"\b(class|interface|struct|enum)\b", header.split("{", 1)[0]) else "block"
+            units.append(CodeUnit(kind, name, start, number, "\n".join(lines[start - 1:number])))
+            covered.update(range(start, number + 1))
+            start = None
+
+    if start is not None:
+        # Незакрытый блок - оставляем его до конца файла
+        units.append(CodeUnit("block", f"block@{start}", start, len(lines), "\n".join(lines[start - 1:])))
+        covered.update(range(start, len(lines) + 1))
+
+    return _module_unit(lines, covered) + units
+
+
+def split_into_units(code: str, language: str) -> List[CodeUnit]:
+    """
+    Разбиение кода на верхнеуровневые единицы.
+
+    Для Python используется AST, для остальных языков - разбор по фигурным скобкам.
+    Если код разобрать не удалось, возвращается одна единица со всем кодом.
+
+    Args:
+        code: Исходный код
+        language: Язык программирования
+
+    Returns:
+        Список единиц кода в порядке их следования
+    """
+    try:
+        if (language or "").lower() == "python":
+            units = _split_python(code)
+        else:
+            units = _split_braces(code)
+    except (SyntaxError, ValueError):
+        units = []
+
+    if not units:
+        return [CodeUnit("module", "<module>", 1, max(len(code.splitlines()), 1), code)]
+
+    return sorted(units, key=lambda unit: unit.start_line)
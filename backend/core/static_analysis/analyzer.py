@@ -1,89 +1,359 @@
-import os
+"""
+Параллельный запуск инструментов статического анализа.
+
+Все инструменты языка запускаются одновременно, поэтому время анализа определяется
+самым медленным из них. Внешние инструменты работают в асинхронных подпроцессах,
+pylint и flake8 - в пуле процессов, где они уже загружены. Код по возможности
+передаётся без записи на диск. Каждый запуск ограничен по времени ожидания,
+процессорному времени и памяти, а число одновременных процессов - общим семафором.
+"""
+import time
+import asyncio
 import tempfile
-import subprocess
-import json
-from typing import List, Dict, Any
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from backend.config.env import get_static_analysis_settings
+from backend.config.static_analysis_config import (
+    DATA_LIMITED_ANALYZERS,
+    LANGUAGE_ANALYZERS,
+    LANGUAGE_EXTENSIONS,
+    STATIC_ANALYZER_TIMEOUTS
+)
+from backend.core.cache import get_review_cache, make_static_analysis_cache_key
+from backend.core.static_analysis.ast_checker import check_python
+from backend.core.static_analysis.linter_pool import LINTERS, LinterPool, get_linter_pool
+from backend.core.static_analysis.sandbox import ResourceLimitExceeded, limit_process, signal_exit_limit
+from backend.core.static_analysis.tools import (
+    build_command,
+    config_fingerprint,
+    line_parser,
+    parse_output,
+    scratch_root,
+    supports_stdin,
+    tool_version
+)
+
+# Порядок серьёзности замечаний при сортировке
+SEVERITY_ORDER = {"fatal": 0, "error": 1, "warning": 2, "refactor": 3, "convention": 4, "info": 5}
+
+# Быстрые проверки в процессе приложения (миллисекунды, без внешних инструментов)
+QUICK_CHECKERS = {"python": check_python}
+
 
-def run_static_analysis(code: str, language: str) -> List[Dict[str, Any]]:
+def run_quick_checks(code: str, language: str) -> List[Dict[str, Any]]:
     """
-    Запускает статический анализ кода с использованием
-    соответствующих инструментов в зависимости от языка
-    
+    Быстрая проверка кода без внешних инструментов.
+
+    Результат можно вернуть пользователю сразу, пока работают анализаторы и модель.
+
     Args:
-        code: Исходный код для анализа
+        code: Исходный код
         language: Язык программирования
-        
+
     Returns:
-        Список результатов анализа
+        Список замечаний (пустой, если для языка нет быстрой проверки)
     """
-    results = []
-    
-    with tempfile.NamedTemporaryFile(suffix=f".{language}", delete=False) as temp:
-        temp.write(code.encode())
-        temp_path = temp.name
-    
-    try:
-        if language == "python":
-            # Используем pylint для анализа Python кода
-            try:
-                process = subprocess.run(
-                    ["pylint", "--output-format=json", temp_path],
-                    capture_output=True,
-                    text=True,
-                    check=False  # Не вызывать исключение при ненулевом коде возврата
-                )
-                if process.stdout:
-                    results.append({"tool": "pylint", "output": process.stdout})
-                else:
-                    results.append({"tool": "pylint", "output": "Нет результатов анализа"})
-            except FileNotFoundError:
-                results.append({"tool": "pylint", "output": "Инструмент pylint не установлен"})
-        
-        elif language == "javascript":
-            # Используем ESLint для JavaScript
-            try:
-                process = subprocess.run(
-                    ["npx", "eslint", "--format=json", temp_path],
-                    capture_output=True,
-                    text=True,
-                    check=False  # Не вызывать исключение при ненулевом коде возврата
-                )
-                if process.stdout:
-                    results.append({"tool": "eslint", "output": process.stdout})
-                else:
-                    results.append({"tool": "eslint", "output": "Нет результатов анализа"})
-            except FileNotFoundError:
-                results.append({"tool": "eslint", "output": "Инструмент eslint не установлен"})
-        
-        elif language == "java":
-            # Для Java можно использовать PMD или CheckStyle
-            results.append({"tool": "java-analysis", "output": "Статический анализ для Java находится в разработке"})
-        
-        elif language == "cpp":
-            # Для C++ можно использовать cppcheck
-            try:
-                process = subprocess.run(
-                    ["cppcheck", "--enable=all", "--output-file=cppcheck_result.txt", temp_path],
-                    capture_output=True,
-                    text=True,
-                    check=False
-                )
-                # Читаем результаты из файла
+    checker = QUICK_CHECKERS.get((language or "").lower())
+    return checker(code) if checker is not None else []
+
+
+class StaticAnalyzer:
+    """Запуск всех инструментов языка параллельно с общим ограничением числа процессов."""
+
+    def __init__(self, max_processes: int = 4, timeout: float = 30, linter_pool: Optional[LinterPool] = None,
+                 cache_enabled: bool = True, memory_limit: int = 1024, **settings):
+        """
+        Инициализация анализатора.
+
+        Args:
+            max_processes: Максимальное число одновременно работающих инструментов во всех запросах
+            timeout: Ограничение времени работы инструмента, не указанного в STATIC_ANALYZER_TIMEOUTS
+            linter_pool: Пул процессов pylint/flake8 (по умолчанию общий для процесса)
+            cache_enabled: Кэшировать результаты инструментов в общем кэше результатов анализа
+            memory_limit: Память одного запуска инструмента в мегабайтах (0 - без ограничения)
+            **settings: Пути к инструментам (checkstyle_jar, checkstyle_config, roslyn_analyzer)
+                и каталог временных файлов (scratch_dir)
+        """
+        self.max_processes = max_processes
+        self.timeout = timeout
+        self.linter_pool = linter_pool
+        self.cache_enabled = cache_enabled
+        self.memory_limit = memory_limit
+        self.settings = settings
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Общий цикл событий в фоновом потоке: семафор на нём ограничивает процессы всех запросов."""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="static-analysis", daemon=True).start()
+                self._semaphore = asyncio.Semaphore(self.max_processes)
+                self._loop = loop
+            return self._loop
+
+    def _tool_timeout(self, tool: str) -> float:
+        return STATIC_ANALYZER_TIMEOUTS.get(tool, self.timeout)
+
+    async def _run_pooled(self, tool: str, code: str) -> List[Dict[str, Any]]:
+        pool = self.linter_pool or get_linter_pool()
+        timeout = self._tool_timeout(tool)
+        # Лимит процессорного времени освобождает рабочий процесс, от которого перестали ждать ответа
+        future = pool.submit(tool, code, cpu_limit=timeout, memory_limit=self.memory_limit)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise ResourceLimitExceeded("wall_clock", "Превышено время анализа")
+
+    async def _run_process(self, tool: str, command: List[str], stdin_data: Optional[bytes]) -> List[Dict[str, Any]]:
+        """
+        Запуск внешнего инструмента: код передаётся через stdin, вывод разбирается по мере поступления.
+
+        Процесс ограничен по процессорному времени и памяти. При превышении любого лимита
+        выбрасывается ResourceLimitExceeded с замечаниями, разобранными до остановки процесса.
+        """
+        timeout = self._tool_timeout(tool)
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.PIPE if stdin_data is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        limit_process(process.pid, timeout, self.memory_limit, data_only=tool in DATA_LIMITED_ANALYZERS)
+        streaming = line_parser(tool)
+        findings: List[Dict[str, Any]] = []
+        output = {"stdout": [], "stderr": []}
+
+        async def feed() -> None:
+            if stdin_data is not None:
                 try:
-                    with open("cppcheck_result.txt", "r") as f:
-                        cppcheck_output = f.read()
-                    results.append({"tool": "cppcheck", "output": cppcheck_output if cppcheck_output else "Нет результатов анализа"})
-                    os.remove("cppcheck_result.txt")
-                except:
-                    results.append({"tool": "cppcheck", "output": "Не удалось прочитать результаты анализа"})
-            except FileNotFoundError:
-                results.append({"tool": "cppcheck", "output": "Инструмент cppcheck не установлен"})
-        
+                    process.stdin.write(stdin_data)
+                    await process.stdin.drain()
+                    process.stdin.close()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Процесс завершился, не дочитав код (например, остановлен лимитом)
+                    pass
+
+        async def read(stream: asyncio.StreamReader, name: str) -> None:
+            async for raw_line in stream:
+                line = raw_line.decode("utf-8", errors="replace")
+                if streaming is not None and streaming[0] == name:
+                    finding = streaming[1](line.rstrip("\n"))
+                    if finding is not None:
+                        findings.append(finding)
+                        continue
+                output[name].append(line)
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(feed(), read(process.stdout, "stdout"), read(process.stderr, "stderr"), process.wait()),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            exceeded = ResourceLimitExceeded("wall_clock", "Превышено время анализа")
+            exceeded.findings = findings
+            raise exceeded
+
+        exceeded = signal_exit_limit(process.returncode, bool(self.memory_limit))
+        if exceeded is not None:
+            exceeded.findings = findings
+            raise exceeded
+
+        stdout_text = "".join(output["stdout"])
+        stderr_text = "".join(output["stderr"])
+        error = RuntimeError((stderr_text or stdout_text).strip()[:500] or f"Код завершения {process.returncode}")
+        if streaming is not None:
+            # Инструмент завершился с ошибкой, не выдав ни одного замечания
+            if not findings and process.returncode != 0 and stderr_text.strip():
+                raise error
+            return findings
+
+        try:
+            return parse_output(tool, stdout_text, stderr_text)
+        except ValueError:
+            # Инструмент завершился с ошибкой до вывода результатов
+            raise error
+
+    async def _run_tool(self, tool: str, code: str,
+                        source_path: Path) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Запуск одного инструмента: возвращает его состояние и найденные замечания."""
+        if tool in LINTERS:
+            command = None
         else:
-            results.append({"tool": "unsupported", "output": f"Статический анализ для языка {language} не поддерживается"})
-    
-    finally:
-        # Удаляем временный файл
-        os.unlink(temp_path)
-    
-    return results
\ No newline at end of file
+            command = build_command(tool, source_path, self.settings)
+            if command is None:
+                return {"tool": tool, "status": "not_installed", "output": f"Инструмент {tool} не установлен"}, []
+
+        async with self._semaphore:
+            started = time.monotonic()
+            try:
+                if command is None:
+                    findings = await self._run_pooled(tool, code)
+                else:
+                    stdin_data = code.encode("utf-8") if supports_stdin(tool) else None
+                    findings = await self._run_process(tool, command, stdin_data)
+                status = {"tool": tool, "status": "ok"}
+            except ResourceLimitExceeded as e:
+                # Замечания, найденные до остановки, возвращаются с отметкой о неполном результате
+                findings = e.findings
+                status = {
+                    "tool": tool,
+                    "status": "limit_exceeded" if e.limit == "memory" else "timeout",
+                    "limit": e.limit,
+                    "output": f"{e.message} ({tool})"
+                }
+                if findings:
+                    status["partial"] = True
+            except ImportError:
+                findings = []
+                status = {"tool": tool, "status": "not_installed", "output": f"Инструмент {tool} не установлен"}
+            except Exception as e:
+                findings = []
+                status = {"tool": tool, "status": "error", "output": f"Ошибка при анализе {tool}: {str(e)}"}
+            status["duration"] = round(time.monotonic() - started, 3)
+        return status, findings
+
+    async def _analyze(self, code: str, tools: List[str],
+                       source_path: Path) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        return list(await asyncio.gather(*(self._run_tool(tool, code, source_path) for tool in tools)))
+
+    def _run_tools(self, code: str, language: str, tools: List[str]) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Запуск инструментов в общем цикле событий.
+
+        Код передаётся через канал пула или stdin. Только инструментам, которые не умеют
+        читать stdin, код записывается в отдельный для каждого запуска каталог в tmpfs,
+        поэтому одновременные запуски не мешают друг другу.
+        """
+        loop = self._get_loop()
+        file_name = f"source.{LANGUAGE_EXTENSIONS.get(language, 'txt')}"
+        if all(tool in LINTERS or supports_stdin(tool) for tool in tools):
+            coroutine = self._analyze(code, tools, Path(file_name))
+            return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+        with tempfile.TemporaryDirectory(prefix="static-analysis-", dir=scratch_root(self.settings)) as scratch:
+            source_path = Path(scratch) / file_name
+            source_path.write_text(code, encoding="utf-8")
+            coroutine = self._analyze(code, tools, source_path)
+            return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    def _cache_keys(self, code: str, language: str, tools: List[str]) -> Dict[str, str]:
+        if not self.cache_enabled:
+            return {}
+        return {
+            tool: make_static_analysis_cache_key(
+                tool, tool_version(tool, self.settings), config_fingerprint(tool, self.settings), language, code
+            )
+            for tool in tools
+        }
+
+    def analyze(self, code: str, language: str, cached_only: bool = False) -> Dict[str, Any]:
+        """
+        Анализ кода всеми инструментами языка.
+
+        Результаты инструментов кэшируются по содержимому кода, версии и конфигурации
+        инструмента, поэтому повторный анализ неизменённого файла не запускает анализаторы.
+
+        Args:
+            code: Исходный код
+            language: Язык программирования
+            cached_only: Не запускать инструменты, результатов которых нет в кэше
+
+        Returns:
+            Словарь с объединённым списком замечаний (findings) и состоянием инструментов (tools);
+            если часть инструментов не запускалась, partial равен True
+        """
+        language = (language or "").lower()
+        tools = LANGUAGE_ANALYZERS.get(language)
+
+        results = {}
+        if language in QUICK_CHECKERS:
+            started = time.monotonic()
+            quick_findings = run_quick_checks(code, language)
+            results["ast"] = ({"tool": "ast", "status": "ok", "duration": round(time.monotonic() - started, 3)},
+                              quick_findings)
+
+        if not tools:
+            return {
+                "findings": [],
+                "tools": [{
+                    "tool": "unsupported",
+                    "status": "unsupported",
+                    "output": f"Статический анализ для языка {language} не поддерживается"
+                }]
+            }
+
+        cache_keys = self._cache_keys(code, language, tools)
+        cached = get_review_cache().get_many(cache_keys.values()) if cache_keys else {}
+
+        for tool in tools:
+            entry = cached.get(cache_keys.get(tool))
+            if entry is not None:
+                results[tool] = ({"tool": tool, "status": "ok", "cached": True, "duration": 0}, entry["findings"])
+
+        pending = [tool for tool in tools if tool not in results]
+        if pending and cached_only:
+            for tool in pending:
+                results[tool] = ({"tool": tool, "status": "pending", "output": "Результата нет в кэше"}, [])
+        elif pending:
+            for tool, (status, findings) in zip(pending, self._run_tools(code, language, pending)):
+                results[tool] = (status, findings)
+                # Тайм-ауты и ошибки не кэшируются: следующий запрос попробует снова
+                if status["status"] == "ok" and tool in cache_keys:
+                    get_review_cache().set(cache_keys[tool], {
+                        "findings": findings,
+                        "timestamp": time.time(),
+                        "tool": tool,
+                        "language": language
+                    })
+
+        findings = [finding for status, tool_findings in results.values() for finding in tool_findings]
+        findings.sort(key=lambda finding: (
+            finding["line"] or 0, SEVERITY_ORDER.get(finding["severity"], len(SEVERITY_ORDER)), finding["tool"]
+        ))
+        analysis = {"findings": findings, "tools": [status for status, _ in results.values()]}
+        if pending and cached_only:
+            analysis["partial"] = True
+        return analysis
+
+
+_static_analyzer: Optional[StaticAnalyzer] = None
+_static_analyzer_lock = threading.Lock()
+
+
+def get_static_analyzer() -> StaticAnalyzer:
+    """
+    Получение общего для процесса анализатора.
+
+    Returns:
+        Экземпляр StaticAnalyzer
+    """
+    global _static_analyzer
+    if _static_analyzer is None:
+        with _static_analyzer_lock:
+            if _static_analyzer is None:
+                _static_analyzer = StaticAnalyzer(**get_static_analysis_settings())
+    return _static_analyzer
+
+
+def run_static_analysis(code: str, language: str, cached_only: bool = False) -> Dict[str, Any]:
+    """
+    Запускает статический анализ кода всеми инструментами,
+    настроенными для языка, параллельно
+
+    Args:
+        code: Исходный код для анализа
+        language: Язык программирования
+        cached_only: Только быстрая проверка и результаты инструментов из кэша, без запуска анализаторов
+
+    Returns:
+        Объединённый список замечаний (findings) и состояние каждого инструмента (tools)
+    """
+    return get_static_analyzer().analyze(code, language, cached_only=cached_only)
@@ -0,0 +1,201 @@
+"""
+Быстрая проверка Python-кода по AST без внешних инструментов.
+
+Находит частые проблемы за миллисекунды, пока работают pylint, flake8 и модель:
+неиспользуемые импорты, голый except, изменяемые значения по умолчанию,
+переопределение встроенных имён и слишком длинные функции.
+"""
+import ast
+import builtins
+from typing import Any, Dict, List, Optional, Set
+
+from backend.config.static_analysis_config import AST_CHECKER_CONFIG
+
+# Имена, которые добавляет модуль site, а не язык
+_SITE_BUILTINS = {"copyright", "credits", "license", "exit", "quit", "help"}
+_BUILTINS = {name for name in dir(builtins) if not name.startswith("_")} - _SITE_BUILTINS
+
+_MUTABLE_LITERALS = (ast.List, ast.Dict, ast.Set, ast.ListComp, ast.DictComp, ast.SetComp)
+_MUTABLE_CALLS = {"list", "dict", "set", "bytearray", "defaultdict", "OrderedDict", "deque"}
+
+
+def _finding(line: int, column: int, code: str, symbol: str, severity: str, message: str) -> Dict[str, Any]:
+    return {
+        "tool": "ast",
+        "line": line,
+        "column": column,
+        "code": code,
+        "symbol": symbol,
+        "severity": severity,
+        "message": message
+    }
+
+
+class _Checker(ast.NodeVisitor):
+    """Обход дерева с накоплением замечаний."""
+
+    def __init__(self, max_function_lines: int):
+        self.max_function_lines = max_function_lines
+        self.findings: List[Dict[str, Any]] = []
+        # Имя импорта -> узел импорта
+        self.imports: Dict[str, ast.AST] = {}
+        self.used_names: Set[str] = set()
+        self.reported_shadowing: Set[tuple] = set()
+
+    # Импорты
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            # import a.b делает доступным имя a
+            self.imports[alias.asname or alias.name.split(".")[0]] = node
+            self._check_shadowing(alias.asname, node)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        if node.module == "__future__":
+            return
+        for alias in node.names:
+            if alias.name != "*":
+                self.imports[alias.asname or alias.name] = node
+                self._check_shadowing(alias.asname or alias.name, node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load):
+            self.used_names.add(node.id)
+        else:
+            self._check_shadowing(node.id, node)
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        # Имена из __all__ считаются использованными (реэкспорт)
+        if any(isinstance(target, ast.Name) and target.id == "__all__" for target in node.targets):
+            if isinstance(node.value, (ast.List, ast.Tuple)):
+                self.used_names.update(
+                    element.value for element in node.value.elts
+                    if isinstance(element, ast.Constant) and isinstance(element.value, str)
+                )
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> None:
+        self._visit_string_annotation(node.annotation)
+        self.generic_visit(node)
+
+    def _visit_string_annotation(self, annotation: Optional[ast.AST]) -> None:
+        """Имена из строковых аннотаций ("List[int]") тоже считаются использованными."""
+        if isinstance(annotation, ast.Constant) and isinstance(annotation.value, str):
+            try:
+                self.visit(ast.parse(annotation.value, mode="eval"))
+            except SyntaxError:
+                pass
+
+    # Обработка исключений
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler) -> None:
+        if node.type is None:
+            self.findings.append(_finding(
+                node.lineno, node.col_offset, "AST002", "bare-except", "warning",
+                "Голый except: перехватываются в том числе KeyboardInterrupt и SystemExit"
+            ))
+        if node.name:
+            self._check_shadowing(node.name, node)
+        self.generic_visit(node)
+
+    # Функции
+
+    def _check_function(self, node: ast.AST, name: Optional[str]) -> None:
+        arguments = node.args
+        all_args = arguments.posonlyargs + arguments.args + arguments.kwonlyargs
+        for arg in all_args + [arguments.vararg, arguments.kwarg]:
+            if arg is not None:
+                self._check_shadowing(arg.arg, arg)
+                self._visit_string_annotation(arg.annotation)
+        self._visit_string_annotation(getattr(node, "returns", None))
+
+        for default in arguments.defaults + [default for default in arguments.kw_defaults if default is not None]:
+            if self._is_mutable(default):
+                self.findings.append(_finding(
+                    default.lineno, default.col_offset, "AST003", "mutable-default", "warning",
+                    "Изменяемое значение по умолчанию разделяется между вызовами функции"
+                    + (f" {name}" if name else "")
+                ))
+
+        if name is not None:
+            self._check_shadowing(name, node)
+            length = node.end_lineno - node.lineno + 1
+            if length > self.max_function_lines:
+                self.findings.append(_finding(
+                    node.lineno, node.col_offset, "AST005", "long-function", "refactor",
+                    f"Функция {name} занимает {length} строк (больше {self.max_function_lines})"
+                ))
+
+    @staticmethod
+    def _is_mutable(node: ast.AST) -> bool:
+        if isinstance(node, _MUTABLE_LITERALS):
+            return True
+        if isinstance(node, ast.Call):
+            func = node.func
+            name = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+            return name in _MUTABLE_CALLS
+        return False
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._check_function(node, node.name)
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node: ast.Lambda) -> None:
+        self._check_function(node, None)
+        self.generic_visit(node)
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self._check_shadowing(node.name, node)
+        self.generic_visit(node)
+
+    # Встроенные имена
+
+    def _check_shadowing(self, name: Optional[str], node: ast.AST) -> None:
+        if name not in _BUILTINS:
+            return
+        key = (name, node.lineno)
+        if key in self.reported_shadowing:
+            return
+        self.reported_shadowing.add(key)
+        self.findings.append(_finding(
+            node.lineno, node.col_offset, "AST004", "shadowed-builtin", "warning",
+            f"Имя {name} переопределяет встроенное имя Python"
+        ))
+
+    def unused_imports(self) -> List[Dict[str, Any]]:
+        return [
+            _finding(node.lineno, node.col_offset, "AST001", "unused-import", "warning", f"Неиспользуемый импорт {name}")
+            for name, node in self.imports.items() if name not in self.used_names
+        ]
+
+
+def check_python(code: str, max_function_lines: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Быстрая проверка Python-кода по синтаксическому дереву.
+
+    Args:
+        code: Исходный код
+        max_function_lines: Максимальная длина функции в строках
+            (по умолчанию из AST_CHECKER_CONFIG)
+
+    Returns:
+        Список замечаний в формате статического анализа, отсортированный по строкам.
+        Для синтаксически неверного кода возвращается одно замечание syntax-error.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError) as e:
+        line = getattr(e, "lineno", None) or 1
+        column = getattr(e, "offset", None) or 0
+        return [_finding(line, column, "AST000", "syntax-error", "error", f"Синтаксическая ошибка: {getattr(e, 'msg', str(e))}")]
+
+    if max_function_lines is None:
+        max_function_lines = AST_CHECKER_CONFIG.get("max_function_lines", 50)
+    checker = _Checker(max_function_lines)
+    checker.visit(tree)
+
+    findings = checker.findings + checker.unused_imports()
+    findings.sort(key=lambda finding: (finding["line"], finding["column"]))
+    return findings
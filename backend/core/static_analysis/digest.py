@@ -0,0 +1,86 @@
+"""
+Краткая сводка замечаний статического анализа для запроса к модели.
+
+Модель получает уже найденные анализаторами проблемы и не тратит токены на их
+повторное описание, а сосредотачивается на том, что анализаторы найти не могут.
+"""
+from typing import Any, Dict, List, Optional
+
+from backend.core.static_analysis.analyzer import SEVERITY_ORDER
+
+# Одна и та же проблема под разными именами в разных инструментах
+_SAME_ISSUE = {
+    "F401": "unused-import",
+    "F841": "unused-variable",
+    "F821": "undefined-variable",
+    "E722": "bare-except",
+    "mutable-default": "dangerous-default-value",
+    "shadowed-builtin": "redefined-builtin"
+}
+
+_MAX_MESSAGE_LENGTH = 120
+
+
+def _issue_key(finding: Dict[str, Any]) -> tuple:
+    name = finding.get("symbol") or finding.get("code") or finding.get("message")
+    return finding.get("line"), _SAME_ISSUE.get(name, name)
+
+
+def deduplicate_findings(findings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Удаление замечаний, которые несколько инструментов сообщили об одной строке.
+
+    Args:
+        findings: Замечания всех инструментов
+
+    Returns:
+        Замечания без повторов в исходном порядке
+    """
+    seen = set()
+    unique = []
+    for finding in findings:
+        key = _issue_key(finding)
+        if key not in seen:
+            seen.add(key)
+            unique.append(finding)
+    return unique
+
+
+def make_findings_digest(findings: List[Dict[str, Any]], max_findings: Optional[int] = 30) -> str:
+    """
+    Сводка замечаний для промпта: по одной короткой строке на проблему.
+
+    При ограничении числа строк сохраняются самые серьёзные замечания.
+
+    Args:
+        findings: Замечания статического анализа
+        max_findings: Максимальное число строк сводки (None - без ограничения)
+
+    Returns:
+        Раздел промпта или пустая строка, если замечаний нет
+    """
+    unique = deduplicate_findings(findings)
+    if not unique:
+        return ""
+
+    selected = sorted(unique, key=lambda finding: SEVERITY_ORDER.get(finding["severity"], len(SEVERITY_ORDER)))
+    if max_findings is not None:
+        selected = selected[:max_findings]
+    selected.sort(key=lambda finding: finding["line"] or 0)
+
+    lines = []
+    for finding in selected:
+        message = " ".join(finding["message"].split())
+        if len(message) > _MAX_MESSAGE_LENGTH:
+            message = message[:_MAX_MESSAGE_LENGTH - 3] + "..."
+        name = finding.get("symbol") or finding.get("code") or finding["tool"]
+        lines.append(f"- L{finding['line'] or '-'} {finding['severity']} {name}: {message}")
+    if len(unique) > len(selected):
+        lines.append(f"- ... and {len(unique) - len(selected)} more of lower severity")
+
+    return (
+        "Static analyzers have already reported these issues (line, severity, rule, message):\n"
+        + "\n".join(lines)
+        + "\n\nDo not repeat or re-explain these issues; the user already sees them. "
+        "Focus on what linters cannot detect: logic errors, design, security and performance.\n\n"
+    )
@@ -0,0 +1,258 @@
+"""
+Пул долгоживущих процессов с уже загруженными pylint и flake8.
+
+Запуск отдельного процесса pylint на каждый запрос тратит около секунды на старт
+интерпретатора и импорт модулей. Рабочие процессы пула импортируют анализаторы
+один раз, получают исходный код через канал пула и возвращают разобранные замечания.
+"""
+import io
+import sys
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+from backend.config.env import get_linter_pool_settings
+from backend.config.static_analysis_config import FLAKE8_CONFIG, PYLINT_CONFIG
+from backend.core.static_analysis.sandbox import limited
+
+# Анализаторы, которые выполняются внутри рабочих процессов
+LINTERS = ("pylint", "flake8")
+
+# Имя модуля, под которым pylint разбирает код из stdin
+_PYLINT_MODULE = "review_snippet"
+
+# Категории замечаний flake8 по первой букве кода
+_FLAKE8_SEVERITY = {"E": "convention", "W": "convention", "F": "warning", "C": "refactor"}
+_FLAKE8_ERRORS = ("E9", "F6", "F7", "F8")
+
+
+def pylint_options(config: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Преобразование PYLINT_CONFIG в аргументы командной строки pylint.
+
+    Args:
+        config: Конфигурация (по умолчанию PYLINT_CONFIG)
+
+    Returns:
+        Список аргументов
+    """
+    options = []
+    for name, value in (PYLINT_CONFIG if config is None else config).items():
+        if isinstance(value, (list, tuple)):
+            value = ",".join(str(item) for item in value)
+        options.append(f"--{name}={value}")
+    return options + ["--persistent=n", "--score=n"]
+
+
+def flake8_options(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Преобразование FLAKE8_CONFIG в параметры flake8.api.legacy.get_style_guide.
+
+    Args:
+        config: Конфигурация (по умолчанию FLAKE8_CONFIG)
+
+    Returns:
+        Словарь параметров
+    """
+    return {name.replace("-", "_"): value for name, value in (FLAKE8_CONFIG if config is None else config).items()}
+
+
+# Код, выполняемый в рабочих процессах
+
+_flake8_guide = None
+_flake8_findings: List[Dict[str, Any]] = []
+
+
+def _set_stdin(code: str) -> None:
+    """Подмена stdin рабочего процесса: оба анализатора читают из него код при имени файла "-"."""
+    sys.stdin = io.TextIOWrapper(io.BytesIO(code.encode("utf-8")), encoding="utf-8")
+
+
+def _run_pylint(code: str) -> List[Dict[str, Any]]:
+    import astroid
+    from pylint.lint import Run
+    from pylint.reporters import CollectingReporter
+
+    _set_stdin(code)
+    reporter = CollectingReporter()
+    try:
+        Run(pylint_options() + ["--from-stdin", _PYLINT_MODULE], reporter=reporter, exit=False)
+    finally:
+        # Иначе astroid вернёт из кэша разбор предыдущего запроса
+        astroid.MANAGER.astroid_cache.pop(_PYLINT_MODULE, None)
+
+    return [
+        {
+            "tool": "pylint",
+            "line": message.line,
+            "column": message.column,
+            "code": message.msg_id,
+            "symbol": message.symbol,
+            "severity": message.category,
+            "message": message.msg
+        }
+        for message in reporter.messages
+    ]
+
+
+def _get_flake8_guide():
+    """Создание StyleGuide flake8 один раз на процесс: разбор параметров и загрузка плагинов дороги."""
+    global _flake8_guide
+    if _flake8_guide is None:
+        from flake8.api import legacy
+        from flake8.formatting.base import BaseFormatter
+
+        class CollectingFormatter(BaseFormatter):
+            """Форматтер, собирающий замечания в список вместо вывода."""
+
+            def start(self):
+                pass
+
+            def handle(self, error):
+                severity = _FLAKE8_SEVERITY.get(error.code[:1], "warning")
+                if error.code.startswith(_FLAKE8_ERRORS):
+                    severity = "error"
+                _flake8_findings.append({
+                    "tool": "flake8",
+                    "line": error.line_number,
+                    "column": error.column_number,
+                    "code": error.code,
+                    "symbol": None,
+                    "severity": severity,
+                    "message": error.text
+                })
+
+            def format(self, error):
+                return None
+
+            def stop(self):
+                pass
+
+        guide = legacy.get_style_guide(**flake8_options())
+        guide.init_report(CollectingFormatter)
+        _flake8_guide = guide
+    return _flake8_guide
+
+
+def _run_flake8(code: str) -> List[Dict[str, Any]]:
+    from flake8 import utils
+
+    guide = _get_flake8_guide()
+    _set_stdin(code)
+    # flake8 кэширует прочитанный stdin
+    utils.stdin_get_value.cache_clear()
+    _flake8_findings.clear()
+    guide.check_files(["-"])
+    return list(_flake8_findings)
+
+
+_RUNNERS = {"pylint": _run_pylint, "flake8": _run_flake8}
+
+
+def _lint(tool: str, code: str, cpu_limit: Optional[float] = None,
+          memory_limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Анализ кода одним инструментом внутри рабочего процесса с ограничением ресурсов на запрос."""
+    with limited(cpu_limit, memory_limit):
+        return _RUNNERS[tool](code)
+
+
+def _init_worker() -> None:
+    """Прогрев рабочего процесса: импорт анализаторов и разбор небольшого фрагмента."""
+    for tool in LINTERS:
+        try:
+            _lint(tool, "import os\n")
+        except ImportError:
+            # Инструмент не установлен - ошибка вернётся вызывающему при первом запросе
+            pass
+
+
+class LinterPool:
+    """Пул процессов для анализа Python-кода через pylint и flake8 без запуска новых процессов."""
+
+    def __init__(self, workers: int = 2, max_tasks_per_worker: int = 500):
+        """
+        Инициализация пула. Процессы запускаются при первом запросе.
+
+        Args:
+            workers: Количество рабочих процессов
+            max_tasks_per_worker: Количество запросов, после которого процесс перезапускается
+                (ограничивает рост памяти кэша astroid)
+        """
+        self.workers = workers
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: fork многопоточного процесса сервера небезопасен
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    max_tasks_per_child=self.max_tasks_per_worker or None
+                )
+            return self._executor
+
+    def _reset(self, executor: Optional[ProcessPoolExecutor]) -> None:
+        """Замена пула, рабочий процесс которого аварийно завершился."""
+        if executor is None:
+            return
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, tool: str, code: str, cpu_limit: Optional[float] = None,
+               memory_limit: Optional[int] = None) -> Future:
+        """
+        Отправка кода на анализ одним инструментом.
+
+        Args:
+            tool: Имя инструмента из LINTERS
+            code: Исходный код
+            cpu_limit: Процессорное время на запрос в секундах: запрос, от которого
+                вызывающий перестал ждать, не занимает рабочий процесс дольше
+            memory_limit: Дополнительная память на запрос в мегабайтах
+
+        Returns:
+            Future со списком замечаний; при превышении лимита - исключение ResourceLimitExceeded
+        """
+        if tool not in _RUNNERS:
+            raise ValueError(f"Инструмент {tool} не поддерживается пулом")
+
+        executor = self._get_executor()
+        try:
+            return executor.submit(_lint, tool, code, cpu_limit, memory_limit)
+        except BrokenProcessPool:
+            self._reset(executor)
+            return self._get_executor().submit(_lint, tool, code, cpu_limit, memory_limit)
+
+    def shutdown(self) -> None:
+        """Остановка рабочих процессов."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_linter_pool: Optional[LinterPool] = None
+_linter_pool_lock = threading.Lock()
+
+
+def get_linter_pool() -> LinterPool:
+    """
+    Получение общего для процесса пула анализаторов.
+
+    Returns:
+        Экземпляр LinterPool
+    """
+    global _linter_pool
+    if _linter_pool is None:
+        with _linter_pool_lock:
+            if _linter_pool is None:
+                _linter_pool = LinterPool(**get_linter_pool_settings())
+    return _linter_pool
@@ -0,0 +1,178 @@
+"""
+Ограничение ресурсов процессов статического анализа.
+
+Каждому запуску анализатора задаются лимиты процессорного времени и памяти, чтобы
+код, на котором инструмент зацикливается или разрастается, не занимал ядро
+и память сервера. Ограничения работают на Linux; на других платформах остаётся
+только ограничение времени ожидания в анализаторе.
+"""
+import math
+import signal
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows - ограничения ресурсов процессов недоступны
+    resource = None
+
+_MB = 1024 * 1024
+
+
+class ResourceLimitExceeded(Exception):
+    """Анализатор превысил ограничение времени или памяти."""
+
+    def __init__(self, limit: str, message: str):
+        """
+        Args:
+            limit: Превышенное ограничение: wall_clock, cpu или memory
+            message: Описание для пользователя
+        """
+        super().__init__(limit, message)
+        self.limit = limit
+        self.message = message
+        # Замечания, полученные до остановки анализатора
+        self.findings = []
+
+    def __str__(self) -> str:
+        return self.message
+
+
+def limit_process(pid: int, cpu_seconds: Optional[float], memory_mb: Optional[int], data_only: bool = False) -> None:
+    """
+    Ограничение ресурсов запущенного процесса.
+
+    Лимиты задаются через prlimit сразу после запуска процесса, а не в preexec_fn,
+    который небезопасен в многопоточном процессе сервера.
+
+    Args:
+        pid: Идентификатор процесса
+        cpu_seconds: Процессорное время; при превышении процесс получает SIGXCPU,
+            а через секунду - SIGKILL
+        memory_mb: Память в мегабайтах (0 или None - без ограничения)
+        data_only: Ограничить сегмент данных (RLIMIT_DATA) вместо адресного пространства
+            (RLIMIT_AS) - для виртуальных машин, резервирующих гигабайты адресов при запуске
+    """
+    if resource is None or not hasattr(resource, "prlimit"):
+        return
+    try:
+        if cpu_seconds:
+            soft = math.ceil(cpu_seconds)
+            resource.prlimit(pid, resource.RLIMIT_CPU, (soft, soft + 1))
+        if memory_mb:
+            limit = memory_mb * _MB
+            resource.prlimit(pid, resource.RLIMIT_DATA if data_only else resource.RLIMIT_AS, (limit, limit))
+    except ProcessLookupError:
+        # Процесс уже завершился
+        pass
+
+
+def signal_exit_limit(returncode: Optional[int], memory_limited: bool) -> Optional[ResourceLimitExceeded]:
+    """
+    Определение превышенного ограничения по коду завершения процесса.
+
+    Args:
+        returncode: Код завершения (отрицательный - номер сигнала)
+        memory_limited: Для процесса было задано ограничение памяти
+
+    Returns:
+        Исключение с описанием ограничения или None, если процесс не был остановлен сигналом
+    """
+    if returncode is None or returncode >= 0:
+        return None
+    signal_number = -returncode
+    if signal_number in (getattr(signal, "SIGXCPU", None), signal.SIGKILL):
+        return ResourceLimitExceeded("cpu", "Превышен лимит процессорного времени")
+    if memory_limited:
+        # Нехватка памяти в нативном коде обычно завершается SIGSEGV или SIGABRT
+        try:
+            name = signal.Signals(signal_number).name
+        except ValueError:
+            name = str(signal_number)
+        return ResourceLimitExceeded("memory", f"Процесс остановлен сигналом {name}, вероятно превышен лимит памяти")
+    return None
+
+
+# Рабочий процесс получил SIGXCPU во время текущего запроса
+_cpu_exceeded = False
+
+
+def _raise_cpu_limit(signum, frame) -> None:
+    global _cpu_exceeded
+    _cpu_exceeded = True
+    raise ResourceLimitExceeded("cpu", "Превышен лимит процессорного времени")
+
+
+def _caused_by_memory_error(error: Optional[BaseException]) -> bool:
+    """Проверка цепочки исключений на MemoryError."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, MemoryError):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _address_space_size() -> Optional[int]:
+    """Текущий размер адресного пространства процесса в байтах (Linux)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@contextmanager
+def limited(cpu_seconds: Optional[float], memory_mb: Optional[int]) -> Iterator[None]:
+    """
+    Ограничение ресурсов на время одного запроса в долгоживущем рабочем процессе.
+
+    Лимиты отсчитываются от уже потраченного процессом времени и занятой памяти и снимаются
+    после выхода из блока, поэтому процесс переживает превышение и обслуживает следующие
+    запросы. Вызывается только из главного потока процесса (нужен обработчик сигнала).
+
+    Args:
+        cpu_seconds: Процессорное время на запрос
+        memory_mb: Дополнительная память на запрос в мегабайтах
+
+    Raises:
+        ResourceLimitExceeded: Превышен один из лимитов
+    """
+    global _cpu_exceeded
+    if resource is None:
+        yield
+        return
+
+    _cpu_exceeded = False
+    previous_cpu = resource.getrlimit(resource.RLIMIT_CPU)
+    previous_memory = resource.getrlimit(resource.RLIMIT_AS)
+    previous_handler = None
+    try:
+        if cpu_seconds:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            # Жёсткий лимит не меняется: после SIGXCPU процесс должен продолжить работу
+            soft = math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)
+            previous_handler = signal.signal(signal.SIGXCPU, _raise_cpu_limit)
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, previous_cpu[1]))
+        current_size = _address_space_size() if memory_mb else None
+        if current_size is not None:
+            soft = current_size + memory_mb * _MB
+            if previous_memory[1] == resource.RLIM_INFINITY or soft < previous_memory[1]:
+                resource.setrlimit(resource.RLIMIT_AS, (soft, previous_memory[1]))
+        try:
+            yield
+        except Exception as e:
+            # Анализатор может перехватить MemoryError и выбросить другое исключение
+            if not memory_mb or not _caused_by_memory_error(e):
+                raise
+            raise ResourceLimitExceeded("memory", f"Превышен лимит памяти {memory_mb} МБ") from e
+    finally:
+        # Сначала снимается лимит времени, чтобы повторный SIGXCPU не прервал восстановление
+        resource.setrlimit(resource.RLIMIT_CPU, previous_cpu)
+        resource.setrlimit(resource.RLIMIT_AS, previous_memory)
+        if previous_handler is not None:
+            signal.signal(signal.SIGXCPU, previous_handler)
+    # Анализатор мог перехватить исключение из обработчика сигнала и продолжить работу
+    if _cpu_exceeded:
+        raise ResourceLimitExceeded("cpu", "Превышен лимит процессорного времени")
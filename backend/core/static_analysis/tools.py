@@ -0,0 +1,436 @@
+"""
+Команды запуска внешних инструментов статического анализа и разбор их вывода.
+
+Все инструменты приводятся к единому формату замечания:
+tool, line, column, code, symbol, severity, message.
+"""
+import os
+import re
+import json
+import shlex
+import atexit
+import shutil
+import hashlib
+import tempfile
+import subprocess
+import threading
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.config.static_analysis_config import (
+    CHECKSTYLE_CONFIG,
+    CPPCHECK_CONFIG,
+    ESLINT_CONFIG,
+    FLAKE8_CONFIG,
+    PYLINT_CONFIG,
+    ROSLYN_CONFIG,
+    STATIC_ANALYZER_COMMANDS,
+    TSLINT_CONFIG
+)
+
+# Подставляются только известные параметры: шаблон cppcheck содержит собственные {file}, {line}
+_PLACEHOLDER_RE = re.compile(r"\{(options|file_path|checkstyle_jar|config_file|roslyn_analyzer)\}")
+
+_CPPCHECK_SEVERITY = {
+    "error": "error",
+    "warning": "warning",
+    "portability": "warning",
+    "performance": "refactor",
+    "style": "convention",
+    "information": "info"
+}
+_CPPCHECK_LINE_RE = re.compile(r"^(?P<file>.*?):(?P<line>\d+):(?P<severity>\w+):(?P<message>.*)$")
+_CHECKSTYLE_LINE_RE = re.compile(
+    r"^\[(?P<severity>\w+)\]\s+(?P<file>.*?):(?P<line>\d+)(?::(?P<column>\d+))?:\s*(?P<message>.*?)(?:\s+\[(?P<rule>\w+)\])?$"
+)
+_ROSLYN_LINE_RE = re.compile(
+    r"^(?P<file>.*?)\((?P<line>\d+),(?P<column>\d+)\):\s*(?P<severity>error|warning|info)\s+(?P<code>\w+):\s*(?P<message>.*?)(?:\s+\[.*\])?$"
+)
+
+
+TOOL_CONFIGS = {
+    "pylint": PYLINT_CONFIG,
+    "flake8": FLAKE8_CONFIG,
+    "eslint": ESLINT_CONFIG,
+    "tslint": TSLINT_CONFIG,
+    "checkstyle": CHECKSTYLE_CONFIG,
+    "cppcheck": CPPCHECK_CONFIG,
+    "roslyn": ROSLYN_CONFIG
+}
+
+# Инструменты, версия которых определяется по файлу, а не по выводу --version
+_TOOL_FILES = {"checkstyle": "checkstyle_jar", "roslyn": "roslyn_analyzer"}
+
+_versions: Dict[str, str] = {}
+_versions_lock = threading.Lock()
+
+
+def _file_fingerprint(path: str) -> str:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return "missing"
+    return f"{path}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def tool_version(tool: str, settings: Dict[str, Any]) -> str:
+    """
+    Определение версии инструмента (один раз на процесс).
+
+    Args:
+        tool: Имя инструмента
+        settings: Настройки статического анализа (пути к checkstyle и анализатору Roslyn)
+
+    Returns:
+        Строка версии; "unknown", если версию определить не удалось
+    """
+    with _versions_lock:
+        version = _versions.get(tool)
+    if version is not None:
+        return version
+
+    if tool in ("pylint", "flake8"):
+        try:
+            version = metadata.version(tool)
+        except metadata.PackageNotFoundError:
+            version = "missing"
+    elif tool in _TOOL_FILES:
+        version = _file_fingerprint(settings.get(_TOOL_FILES[tool], ""))
+    else:
+        try:
+            process = subprocess.run([tool, "--version"], capture_output=True, text=True, timeout=10)
+            version = (process.stdout or process.stderr).strip().splitlines()[0] if process.returncode == 0 else "unknown"
+        except (OSError, subprocess.TimeoutExpired, IndexError):
+            version = "unknown"
+
+    # Неизвестная версия не запоминается: инструмент могут установить позже
+    if version not in ("unknown", "missing"):
+        with _versions_lock:
+            _versions[tool] = version
+    return version
+
+
+def config_fingerprint(tool: str, settings: Dict[str, Any]) -> str:
+    """
+    Отпечаток конфигурации инструмента: правила из static_analysis_config и шаблон команды.
+
+    Args:
+        tool: Имя инструмента
+        settings: Настройки статического анализа
+
+    Returns:
+        Хэш конфигурации
+    """
+    config = {
+        "rules": TOOL_CONFIGS.get(tool),
+        "command": STATIC_ANALYZER_COMMANDS.get(tool),
+        "config_file": settings.get("checkstyle_config") if tool == "checkstyle" else None
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _finding(tool: str, line: Any, column: Any, code: Optional[str], severity: str, message: str,
+             symbol: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "tool": tool,
+        "line": int(line) if line is not None else None,
+        "column": int(column) if column is not None else None,
+        "code": code,
+        "symbol": symbol,
+        "severity": severity,
+        "message": message.strip()
+    }
+
+
+def scratch_root(settings: Dict[str, Any]) -> Optional[str]:
+    """
+    Каталог для временных файлов анализа: STATIC_ANALYSIS_SCRATCH_DIR или tmpfs /dev/shm.
+
+    Args:
+        settings: Настройки статического анализа
+
+    Returns:
+        Путь к каталогу или None (системный каталог временных файлов)
+    """
+    configured = settings.get("scratch_dir")
+    if configured:
+        return configured
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return None
+
+
+# Пакеты, подключаемые в конфигурации ESLint 9 вместо строк extends из ESLINT_CONFIG
+_ESLINT_FLAT_EXTENDS = {
+    "eslint:recommended": ("@eslint/js", "configs.recommended", None),
+    "plugin:react/recommended": ("eslint-plugin-react", "configs.flat.recommended", "react")
+}
+
+_ESLINT_FLAT_TEMPLATE = """const paths = %(paths)s;
+
+function optional(name) {
+  try {
+    return require(require.resolve(name, { paths }));
+  } catch (error) {
+    return null;
+  }
+}
+
+const configs = [];
+const plugins = new Set();
+for (const [name, property, prefix] of %(extends)s) {
+  const module = optional(name);
+  const config = module && property.split(".").reduce((value, key) => value && value[key], module);
+  if (config) {
+    configs.push(config);
+    if (prefix) plugins.add(prefix);
+  }
+}
+
+// Правила плагинов, которые не установлены, ESLint 9 считает ошибкой конфигурации
+const rules = Object.fromEntries(
+  Object.entries(%(rules)s).filter(([rule]) => !rule.includes("/") || plugins.has(rule.split("/")[0]))
+);
+
+module.exports = [
+  ...configs,
+  {
+    files: ["**/*.js", "**/*.jsx", "**/*.mjs", "**/*.cjs"],
+    languageOptions: { parserOptions: { ecmaFeatures: { jsx: true } } },
+    rules
+  }
+];
+"""
+
+
+def eslint_major_version(settings: Dict[str, Any]) -> Optional[int]:
+    """
+    Основная версия ESLint по выводу eslint --version.
+
+    Args:
+        settings: Настройки статического анализа
+
+    Returns:
+        Номер основной версии или None, если ESLint не найден
+    """
+    match = re.search(r"(\d+)\.\d+", tool_version("eslint", settings))
+    return int(match.group(1)) if match else None
+
+
+def _eslint_flat_config() -> str:
+    """Конфигурация ESLint 9 (eslint.config.js), построенная по ESLINT_CONFIG."""
+    # Пакеты ищутся рядом с установленным ESLint, а не в каталоге конфигурации
+    paths = [os.getcwd()]
+    executable = shutil.which("eslint")
+    if executable:
+        package_dir = Path(os.path.realpath(executable)).parent.parent
+        paths.insert(0, str(package_dir))
+    extends = [
+        _ESLINT_FLAT_EXTENDS[name] for name in ESLINT_CONFIG.get("extends", []) if name in _ESLINT_FLAT_EXTENDS
+    ]
+    return _ESLINT_FLAT_TEMPLATE % {
+        "paths": json.dumps(paths),
+        "extends": json.dumps(extends),
+        "rules": json.dumps(ESLINT_CONFIG.get("rules", {}))
+    }
+
+
+_config_dir: Optional[Path] = None
+_config_dir_lock = threading.Lock()
+
+
+def _get_config_dir(settings: Dict[str, Any]) -> Path:
+    """Каталог с файлами конфигурации инструментов, общий для всех запусков процесса."""
+    global _config_dir
+    with _config_dir_lock:
+        if _config_dir is None:
+            config_dir = Path(tempfile.mkdtemp(prefix="static-analysis-config-", dir=scratch_root(settings)))
+            (config_dir / "eslintrc.json").write_text(json.dumps(ESLINT_CONFIG))
+            (config_dir / "eslint.config.js").write_text(_eslint_flat_config())
+            (config_dir / "tslint.json").write_text(json.dumps(TSLINT_CONFIG))
+            atexit.register(shutil.rmtree, config_dir, True)
+            _config_dir = config_dir
+        return _config_dir
+
+
+def _options(tool: str, settings: Dict[str, Any]) -> List[str]:
+    """Параметры инструмента из static_analysis_config."""
+    if tool == "eslint":
+        # ESLint 9 не поддерживает .eslintrc и флаг --no-eslintrc
+        major = eslint_major_version(settings)
+        if major is not None and major >= 9:
+            return ["--no-config-lookup", "-c", str(_get_config_dir(settings) / "eslint.config.js")]
+        return ["--no-eslintrc", "-c", str(_get_config_dir(settings) / "eslintrc.json")]
+    if tool == "tslint":
+        return ["-c", str(_get_config_dir(settings) / "tslint.json")]
+    if tool == "cppcheck":
+        options = [f"--suppress={name}" for name in CPPCHECK_CONFIG.get("suppress", [])]
+        if CPPCHECK_CONFIG.get("inline_suppression"):
+            options.append("--inline-suppr")
+        return options + ["--quiet"]
+    return []
+
+
+# Инструменты, читающие код из stdin: аргументы вместо пути к файлу (имя нужно для выбора правил)
+_STDIN_ARGS = {
+    "eslint": lambda file_name: ["--stdin", "--stdin-filename", file_name]
+}
+
+
+def supports_stdin(tool: str) -> bool:
+    """Проверка, может ли инструмент получить код через stdin без временного файла."""
+    return tool in _STDIN_ARGS
+
+
+def build_command(tool: str, file_path: Path, settings: Dict[str, Any]) -> Optional[List[str]]:
+    """
+    Построение команды запуска инструмента по шаблону из STATIC_ANALYZER_COMMANDS.
+
+    Args:
+        tool: Имя инструмента
+        file_path: Путь к файлу с исходным кодом. Для инструментов, читающих stdin,
+            файл не создаётся, используется только его имя.
+        settings: Настройки статического анализа (пути к checkstyle и анализатору Roslyn)
+
+    Returns:
+        Аргументы процесса или None, если инструмент не установлен или не настроен
+    """
+    template = STATIC_ANALYZER_COMMANDS.get(tool)
+    if template is None:
+        return None
+
+    if supports_stdin(tool):
+        source_args = _STDIN_ARGS[tool](file_path.name)
+    else:
+        source_args = [str(file_path)]
+
+    values = {
+        "file_path": source_args,
+        "options": _options(tool, settings),
+        "checkstyle_jar": [settings.get("checkstyle_jar", "")],
+        "config_file": [settings.get("checkstyle_config", "")],
+        "roslyn_analyzer": [settings.get("roslyn_analyzer", "")]
+    }
+
+    command = []
+    for part in shlex.split(template):
+        match = _PLACEHOLDER_RE.fullmatch(part)
+        if match:
+            command.extend(values[match.group(1)])
+        else:
+            command.append(_PLACEHOLDER_RE.sub(lambda m: " ".join(values[m.group(1)]), part))
+
+    if "" in command or shutil.which(command[0]) is None:
+        return None
+    return command
+
+
+def _parse_eslint(stdout: str, stderr: str) -> List[Dict[str, Any]]:
+    findings = []
+    for file_result in json.loads(stdout):
+        for message in file_result.get("messages", []):
+            findings.append(_finding(
+                "eslint", message.get("line"), message.get("column"), message.get("ruleId"),
+                "error" if message.get("severity") == 2 else "warning", message.get("message", "")
+            ))
+    return findings
+
+
+def _parse_tslint(stdout: str, stderr: str) -> List[Dict[str, Any]]:
+    findings = []
+    for failure in json.loads(stdout):
+        position = failure.get("startPosition", {})
+        findings.append(_finding(
+            "tslint", position.get("line", 0) + 1, position.get("character", 0) + 1, failure.get("ruleName"),
+            failure.get("ruleSeverity", "warning").lower(), failure.get("failure", "")
+        ))
+    return findings
+
+
+def _parse_cppcheck_line(line: str) -> Optional[Dict[str, Any]]:
+    match = _CPPCHECK_LINE_RE.match(line)
+    if not match:
+        return None
+    return _finding(
+        "cppcheck", match.group("line"), None, None,
+        _CPPCHECK_SEVERITY.get(match.group("severity"), "warning"), match.group("message")
+    )
+
+
+def _parse_checkstyle_line(line: str) -> Optional[Dict[str, Any]]:
+    match = _CHECKSTYLE_LINE_RE.match(line.strip())
+    if not match:
+        return None
+    return _finding(
+        "checkstyle", match.group("line"), match.group("column"), match.group("rule"),
+        "error" if match.group("severity") == "ERROR" else "warning", match.group("message")
+    )
+
+
+def _parse_roslyn_line(line: str) -> Optional[Dict[str, Any]]:
+    match = _ROSLYN_LINE_RE.match(line.strip())
+    if not match:
+        return None
+    return _finding(
+        "roslyn", match.group("line"), match.group("column"), match.group("code"),
+        match.group("severity"), match.group("message")
+    )
+
+
+# Построчные разборщики: замечания разбираются по мере вывода (поток вывода, функция разбора строки).
+# Сообщения в формате --template cppcheck выводит в stderr.
+_LINE_PARSERS = {
+    "cppcheck": ("stderr", _parse_cppcheck_line),
+    "checkstyle": ("stdout", _parse_checkstyle_line),
+    "roslyn": ("stdout", _parse_roslyn_line)
+}
+
+# Разборщики JSON-документа, выводимого целиком после завершения анализа
+_DOCUMENT_PARSERS = {
+    "eslint": _parse_eslint,
+    "tslint": _parse_tslint
+}
+
+
+def line_parser(tool: str) -> Optional[Tuple[str, Callable[[str], Optional[Dict[str, Any]]]]]:
+    """
+    Построчный разборщик вывода инструмента.
+
+    Args:
+        tool: Имя инструмента
+
+    Returns:
+        Кортеж (имя потока "stdout" или "stderr", функция разбора строки) или None,
+        если вывод инструмента разбирается только целиком
+    """
+    return _LINE_PARSERS.get(tool)
+
+
+def parse_output(tool: str, stdout: str, stderr: str) -> List[Dict[str, Any]]:
+    """
+    Разбор полного вывода инструмента в список замечаний.
+
+    Args:
+        tool: Имя инструмента
+        stdout: Стандартный вывод
+        stderr: Вывод ошибок
+
+    Returns:
+        Список замечаний в едином формате
+
+    Raises:
+        ValueError: Если вывод не удалось разобрать
+    """
+    if tool in _LINE_PARSERS:
+        stream, parse_line = _LINE_PARSERS[tool]
+        output = stdout if stream == "stdout" else stderr
+        return [finding for finding in map(parse_line, output.splitlines()) if finding is not None]
+
+    parser = _DOCUMENT_PARSERS.get(tool)
+    if parser is None:
+        raise ValueError(f"Нет разборщика вывода для инструмента {tool}")
+    try:
+        return parser(stdout, stderr)
+    except (json.JSONDecodeError, AttributeError, TypeError) as e:
+        raise ValueError(f"Не удалось разобрать вывод {tool}: {str(e)}")
@@ -3,6 +3,3 @@ from backend.services.model_service import ModelService
 
 # Создаем экземпляр сервиса моделей
 model_service = ModelService()
-
-# Загружаем модели при импорте
-model_service._load_models()
\ No newline at end of file
@@ -1,9 +1,35 @@
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
 from pathlib import Path
 # Исправляем импорты, убирая относительные пути
 from backend.core.ml_analysis.model_adapter import create_adapter
-from backend.config.env import get_api_key, get_env_variable
+from backend.core.cache import get_review_cache, get_similarity_index, get_single_flight, make_review_cache_key
+from backend.core.review import (
+    changed_lines_between,
+    extract_hunks,
+    merge_hunk_reviews,
+    merge_unit_reviews,
+    parse_unified_diff,
+    reduce_chunk_reviews,
+    split_into_chunks,
+    split_into_units
+)
+from backend.core.static_analysis.analyzer import QUICK_CHECKERS, run_quick_checks, run_static_analysis
+from backend.core.static_analysis.digest import make_findings_digest
+from backend.config.env import (
+    get_api_key,
+    get_env_variable,
+    get_batch_settings,
+    get_diff_context_lines,
+    get_review_chunk_size,
+    get_static_analysis_settings,
+    get_static_review_settings
+)
+from backend.config.model_config import is_caching_enabled, get_prompt_template_version
+from backend.config.static_analysis_config import LANGUAGE_ANALYZERS
 from backend.celery_app import celery
 
 @celery.task
@@ -15,6 +41,48 @@ def load_model_task(model_id, model_config):
     except Exception as e:
         print(f"Error preloading model {model_id}: {e}")
 
+_task_service = None
+
+def _get_task_service():
+    """Model service instance shared by tasks of a worker process."""
+    global _task_service
+    if _task_service is None:
+        _task_service = ModelService()
+    return _task_service
+
+@celery.task(bind=True)
+def review_code_task(self, code, language, model_id=None, response_language="russian", mode="full"):
+    """Celery task to review code in the background and report progress."""
+    service = _get_task_service()
+    self.update_state(state="PROGRESS", meta={"progress": 0.0})
+    
+    if mode == "incremental":
+        def report_progress(done, total):
+            self.update_state(state="PROGRESS", meta={"progress": round(done / total, 3)})
+        
+        report = service.analyze_code_incremental(
+            code,
+            language,
+            model_id=model_id,
+            progress=report_progress,
+            response_language=response_language
+        )
+        return {
+            "result": ModelService._as_text(report["result"]),
+            "units": report["units"],
+            "reused_units": report["reused_units"],
+            "analyzed_units": report["analyzed_units"]
+        }
+    
+    analysis = service.analyze_code_with_metadata(
+        code,
+        language,
+        model_id=model_id,
+        response_language=response_language
+    )
+    analysis["result"] = ModelService._as_text(analysis["result"])
+    return analysis
+
 class ModelService:
     """Сервис для работы с моделями анализа кода."""
     
@@ -29,6 +97,19 @@ class ModelService:
         self.models = {}
         self.default_model = None
         self.adapters = {}
+        # Ключи кэша, которые сейчас обновляются в фоне
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+        # Пул потоков пакетного анализа и ограничения одновременных запросов к каждой модели
+        self._batch_executor = None
+        # Отдельный пул для частей больших файлов: их ждут задачи пакетного пула
+        self._chunk_executor = None
+        # Пул потоков для изменённых единиц инкрементального анализа
+        self._incremental_executor = None
+        # Пул потоков, ожидающих статический анализ, пока готовится запрос к модели
+        self._static_executor = None
+        self._model_limits = {}
+        self._batch_lock = threading.Lock()
         self.load_model_configs()
 
     def preload_models_in_background(self):
@@ -73,32 +154,741 @@ class ModelService:
         Returns:
             str: Результат анализа
         """
+        return self.analyze_code_with_metadata(code, language, model_id=model_id, **kwargs)["result"]
+    
+    def analyze_code_with_metadata(self, code: str, language: str, model_id: str = None,
+                                   static_analysis: bool = True, split_large: bool = True, **kwargs) -> Dict:
+        """
+        Анализирует код и возвращает результат вместе со сведениями о кэше.
+        
+        При промахе кэша статический анализ запускается в фоне до запроса к модели. Его
+        замечания передаются модели краткой сводкой, чтобы она не повторяла их, и возвращаются
+        вместе с отчётом модели. Результат из кэша не ждёт анализаторов: к нему добавляются
+        замечания быстрой проверки и инструментов, результаты которых уже есть в кэше.
+        
+        Args:
+            code (str): Код для анализа
+            language (str): Язык программирования
+            model_id (str, optional): Идентификатор модели
+            static_analysis (bool): Запускать статический анализ и передавать его замечания модели
+            split_large (bool): Делить код, который не помещается в контекст модели, на части
+            **kwargs: Дополнительные параметры
+            
+        Returns:
+            Dict: Результат анализа ("result"), признак попадания в кэш ("cached"),
+                признак устаревшего результата, который обновляется в фоне ("stale"),
+                для результата похожего запроса - "approximate" и оценка сходства "similarity",
+                при статическом анализе - замечания ("static_findings") и состояние инструментов ("static_tools")
+        """
         if not model_id:
             model_id = self.default_model
         
         print(f"Analyzing code with model: {model_id}")
         
+        static_runs = []
+        
+        def start_static() -> Callable[[], Optional[Dict]]:
+            # Анализаторы запускаются один раз и только когда результата нет в кэше
+            if not static_runs:
+                static_runs.append(self._start_static_analysis(code, language) if static_analysis else lambda: None)
+            return static_runs[0]
+        
+        def collect_static(analysis: Dict) -> Optional[Dict]:
+            if analysis.get("cached") and static_analysis:
+                # Устаревший результат обновляется в фоне вместе с анализаторами
+                return self._cached_static_analysis(
+                    code, language, warm=not static_runs and not analysis.get("stale")
+                )
+            return start_static()()
+        
         try:
-            if model_id not in self.models:
-                raise ValueError(f"Model {model_id} not available. Available models: {list(self.models.keys())}")
+            analysis = self._analyze_with_model(
+                code, language, model_id, start_static,
+                static_analysis and self._static_review_enabled(language), split_large, **kwargs
+            )
+            return self._attach_static_analysis(analysis, collect_static(analysis))
+        except Exception as e:
+            print(f"Error analyzing code with {model_id}: {str(e)}")
+            print("Falling back to mock model")
             
-            # Получаем адаптер для модели
-            adapter = self.get_adapter(model_id)
+            # Если произошла ошибка, используем mock-модель
+            analysis = {
+                "result": self._get_mock_analysis(code, language),
+                "cached": False,
+                "stale": False,
+                "error": str(e)
+            }
+            return self._attach_static_analysis(analysis, collect_static(analysis))
+    
+    def _analyze_with_model(self, code: str, language: str, model_id: str,
+                            start_static: Callable[[], Callable[[], Optional[Dict]]], static_digest: bool,
+                            split_large: bool = True, **kwargs) -> Dict:
+        """
+        Анализ кода моделью с использованием кэша.
+        
+        Args:
+            code (str): Код для анализа
+            language (str): Язык программирования
+            model_id (str): Идентификатор модели
+            start_static: Запуск статического анализа; возвращает функцию ожидания его результата
+            static_digest (bool): Промпт включает сводку статического анализа
+            split_large (bool): Делить большой код на части
+            **kwargs: Дополнительные параметры
             
+        Returns:
+            Dict: Результат анализа и сведения о кэше
+        """
+        if model_id not in self.models:
+            raise ValueError(f"Model {model_id} not available. Available models: {list(self.models.keys())}")
+        
+        # Без кэша замечания анализаторов нужны всегда: они готовятся, пока создаётся адаптер
+        if not is_caching_enabled():
+            start_static()
+        
+        # Получаем адаптер для модели
+        adapter = self.get_adapter(model_id)
+        
+        # Большой файл анализируется по частям
+        chunks = self._split_large_code(code, language, adapter) if split_large else None
+        if chunks is not None:
+            # Части анализируются без анализаторов, а замечания для всего файла готовятся параллельно
+            start_static()
+            return self._analyze_chunks(chunks, language, model_id, **kwargs)
+        
+        # Разрешение на запрос к модели берётся только на время вызова адаптера,
+        # а не на время ожидания анализаторов или вложенных задач
+        limit = self._get_model_limit(model_id)
+        
+        if not is_caching_enabled():
             # Не нужно извлекать response_language отдельно, так как он уже есть в kwargs
-            result = adapter.analyze_code(
-                code, 
-                language, 
-                **kwargs  # Передаем все kwargs напрямую, включая response_language
-            )
+            prompt_kwargs = self._static_prompt_kwargs(start_static()(), kwargs)
+            with limit:
+                result = adapter.analyze_code(code, language, **prompt_kwargs)
+            return {"result": result, "cached": False, "stale": False}
+        
+        cache = get_review_cache()
+        response_language = kwargs.get("response_language", "russian")
+        cache_key = make_review_cache_key(model_id, language, code, response_language, static_digest)
+        similarity_index = get_similarity_index()
+        similarity_scope = self._similarity_scope(model_id, language, response_language, static_digest)
+        
+        def compute():
+            # Модель получает сводку замечаний анализаторов, чтобы не повторять их
+            prompt_kwargs = self._static_prompt_kwargs(start_static()(), kwargs)  # Включая response_language
+            with limit:
+                result = adapter.analyze_code(code, language, **prompt_kwargs)
+            self._store_review(cache_key, result, code, language, model_id, similarity_scope)
+            return result
+        
+        def lookup():
+            entry = cache.get(cache_key)
+            return entry["result"] if entry is not None else None
+        
+        cached, stale = cache.lookup(cache_key)
+        if cached is not None:
+            print(f"Using {'stale ' if stale else ''}cached result for {model_id}")
+            if stale:
+                # Отдаём устаревший результат сразу, а свежий получаем в фоне
+                self._revalidate_in_background(cache_key, compute, lookup)
+            return {"result": cached["result"], "cached": True, "stale": stale}
+        
+        if similarity_index is not None:
+            match = similarity_index.find(similarity_scope, code, language)
+            if match is not None:
+                similar = cache.get(match.cache_key)
+                if similar is not None:
+                    print(f"Using approximate cached result for {model_id} (similarity {match.similarity:.2f})")
+                    return {
+                        "result": similar["result"],
+                        "cached": True,
+                        "stale": False,
+                        "approximate": True,
+                        "similarity": match.similarity
+                    }
+                # Результат уже вытеснен из кэша
+                similarity_index.discard(match.cache_key)
+        
+        # Промах кэша: анализаторы работают, пока запрос ждёт своей очереди к модели
+        start_static()
+        # Одновременные одинаковые запросы ждут один вызов модели
+        result = get_single_flight().do(cache_key, compute, lookup=lookup)
+        return {"result": result, "cached": False, "stale": False}
+    
+    def analyze_code_diff(self, language: str, code: str = None, diff: str = None, old_code: str = None,
+                          model_id: str = None, context: int = None, enclosing: bool = False, **kwargs) -> Dict:
+        """
+        Анализ только изменённых фрагментов кода.
+        
+        Изменения задаются unified diff или старой версией файла (old_code) вместе с новой (code).
+        Каждый фрагмент с контекстом анализируется отдельно (с кэшем и параллельно),
+        номера строк в отчёте пересчитываются в нумерацию новой версии файла.
+        
+        Args:
+            language (str): Язык программирования
+            code (str, optional): Новая версия файла
+            diff (str, optional): Unified diff одного файла
+            old_code (str, optional): Старая версия файла
+            model_id (str, optional): Идентификатор модели
+            context (int, optional): Число строк контекста вокруг изменений
+            enclosing (bool): Анализировать изменённые функции и классы целиком
+            **kwargs: Дополнительные параметры
+            
+        Returns:
+            Dict: Итоговый отчёт и сведения об анализированных фрагментах
+        """
+        if context is None:
+            context = get_diff_context_lines()
+        
+        if diff:
+            diff_lines, changed = parse_unified_diff(diff)
+            # Если передана новая версия файла, контекст берётся из неё, а не только из diff
+            lines = {number: line for number, line in enumerate(code.splitlines(), 1)} if code else diff_lines
+        elif old_code is not None and code is not None:
+            lines = {number: line for number, line in enumerate(code.splitlines(), 1)}
+            changed = changed_lines_between(old_code, code)
+        else:
+            raise ValueError("Для анализа изменений нужен diff или старая и новая версии кода")
+        
+        hunks = extract_hunks(lines, changed, language, context=context, enclosing=enclosing)
+        if not hunks:
+            return {"result": "Изменений не найдено", "hunks": [], "changed_lines": 0, "reviewed_lines": 0}
+        
+        # Фрагменты анализируются как пакет: кэш, объединение одинаковых запросов и параллельность.
+        # Фрагмент не является самостоятельным кодом, поэтому анализаторы для него не запускаются
+        report = self.analyze_batch(
+            [{"path": f"{hunk.start_line}-{hunk.end_line}", "code": hunk.source, "language": language} for hunk in hunks],
+            model_id=model_id,
+            static_analysis=False,
+            **kwargs
+        )
+        results = [item.get("result", item.get("error", "")) for item in report["files"]]
+        
+        return {
+            "result": merge_hunk_reviews(hunks, results),
+            "hunks": [dict(hunk.to_dict(), cached=item.get("cached", False)) for hunk, item in zip(hunks, report["files"])],
+            "changed_lines": len(changed),
+            "reviewed_lines": sum(hunk.end_line - hunk.start_line + 1 for hunk in hunks)
+        }
+    
+    def _split_large_code(self, code: str, language: str, adapter) -> Optional[List]:
+        """
+        Разбиение кода, который не помещается в контекст модели, на части.
+        
+        Args:
+            code: Исходный код
+            language: Язык программирования
+            adapter: Адаптер модели
+            
+        Returns:
+            Части кода или None, если код анализируется целиком
+        """
+        chunk_size = get_review_chunk_size()
+        # Локальные модели ограничены max_length токенов на промпт и ответ (около 4 символов на токен)
+        max_length = getattr(adapter, "model_params", {}).get("max_length")
+        if max_length:
+            chunk_size = min(chunk_size, max_length * 2)
+        
+        if len(code) <= chunk_size:
+            return None
+        chunks = split_into_chunks(code, language, chunk_size)
+        return chunks if len(chunks) > 1 else None
+    
+    def _analyze_chunks(self, chunks: List, language: str, model_id: str, **kwargs) -> Dict:
+        """
+        Анализ частей большого файла: параллельный анализ частей и объединение отчётов.
+        
+        Args:
+            chunks: Части кода
+            language: Язык программирования
+            model_id: Идентификатор модели
+            **kwargs: Дополнительные параметры
+            
+        Returns:
+            Dict: Итоговый отчёт, признак использования кэша для всех частей и описание частей
+        """
+        print(f"Chunked review: {len(chunks)} chunks for model {model_id}")
+        # Части ждёт задача пакетного пула, поэтому они анализируются в своём пуле и повторно не делятся
+        report = self._analyze_files(
+            [{"path": chunk.name, "code": chunk.source, "language": language} for chunk in chunks],
+            model_id,
+            self._get_chunk_executor(),
+            static_analysis=False,
+            split_large=False,
+            **kwargs
+        )
+        results = [item.get("result", item.get("error", "")) for item in report["files"]]
+        
+        return {
+            "result": reduce_chunk_reviews(chunks, results),
+            "cached": all(item.get("cached") for item in report["files"]),
+            "stale": False,
+            "chunks": [dict(chunk.to_dict(), cached=item.get("cached", False)) for chunk, item in zip(chunks, report["files"])]
+        }
+    
+    def _get_model_limit(self, model_id: str) -> threading.BoundedSemaphore:
+        """Семафор, ограничивающий число одновременных запросов к модели."""
+        with self._batch_lock:
+            limit = self._model_limits.get(model_id)
+            if limit is None:
+                limit = threading.BoundedSemaphore(get_batch_settings()["model_concurrency"])
+                self._model_limits[model_id] = limit
+            return limit
+    
+    def _get_batch_executor(self) -> ThreadPoolExecutor:
+        """Общий пул потоков для пакетного анализа."""
+        with self._batch_lock:
+            if self._batch_executor is None:
+                self._batch_executor = ThreadPoolExecutor(
+                    max_workers=get_batch_settings()["max_workers"], thread_name_prefix="batch-review"
+                )
+            return self._batch_executor
+    
+    def _get_chunk_executor(self) -> ThreadPoolExecutor:
+        """Общий пул потоков для частей больших файлов."""
+        with self._batch_lock:
+            if self._chunk_executor is None:
+                self._chunk_executor = ThreadPoolExecutor(
+                    max_workers=get_batch_settings()["max_workers"], thread_name_prefix="chunk-review"
+                )
+            return self._chunk_executor
+    
+    def _get_incremental_executor(self) -> ThreadPoolExecutor:
+        """Общий пул потоков для изменённых единиц инкрементального анализа."""
+        with self._batch_lock:
+            if self._incremental_executor is None:
+                self._incremental_executor = ThreadPoolExecutor(
+                    max_workers=get_batch_settings()["max_workers"], thread_name_prefix="incremental-review"
+                )
+            return self._incremental_executor
+    
+    def _get_static_executor(self) -> ThreadPoolExecutor:
+        """Общий пул потоков для статического анализа, выполняемого одновременно с запросом к модели."""
+        with self._batch_lock:
+            if self._static_executor is None:
+                self._static_executor = ThreadPoolExecutor(
+                    max_workers=get_batch_settings()["max_workers"], thread_name_prefix="static-review"
+                )
+            return self._static_executor
+    
+    def _start_static_analysis(self, code: str, language: str) -> Callable[[], Optional[Dict]]:
+        """
+        Запуск статического анализа в фоне.
+        
+        Args:
+            code: Исходный код
+            language: Язык программирования
             
+        Returns:
+            Функция ожидания результата: замечания ("findings") и состояние инструментов ("tools")
+            или None, если анализ отключён или язык не поддерживается. Ожидание ограничено
+            STATIC_REVIEW_WAIT секундами; если анализаторы не успели, возвращаются
+            замечания быстрой проверки.
+        """
+        if not self._static_review_enabled(language):
+            return lambda: None
+        
+        settings = get_static_review_settings()
+        future = self._get_static_executor().submit(run_static_analysis, code, language)
+        collected = []
+        lock = threading.Lock()
+        
+        def collect() -> Dict:
+            with lock:
+                if not collected:
+                    try:
+                        collected.append(future.result(timeout=settings["wait"]))
+                    except FutureTimeoutError:
+                        print(f"Static analysis did not finish in {settings['wait']}s, using quick checks only")
+                        collected.append({"findings": run_quick_checks(code, language), "tools": [], "partial": True})
+                    except Exception as e:
+                        print(f"Error running static analysis: {str(e)}")
+                        collected.append({"findings": run_quick_checks(code, language), "tools": [], "partial": True})
+                return collected[0]
+        
+        return collect
+    
+    @staticmethod
+    def _static_review_enabled(language: str) -> bool:
+        """Проверка, что для языка запускается статический анализ и его сводка попадает в промпт."""
+        normalized_language = (language or "").lower()
+        return get_static_review_settings()["enabled"] and (
+            normalized_language in LANGUAGE_ANALYZERS or normalized_language in QUICK_CHECKERS
+        )
+    
+    @staticmethod
+    def _similarity_scope(model_id: str, language: str, response_language: str, static_digest: bool) -> str:
+        """Область поиска похожих запросов: совпадают модель, языки, версия промптов и наличие сводки анализаторов."""
+        scope = f"{get_prompt_template_version()}:{model_id}:{language}:{response_language}"
+        return f"{scope}:static" if static_digest else scope
+    
+    def _cached_static_analysis(self, code: str, language: str, warm: bool = True) -> Optional[Dict]:
+        """
+        Замечания статического анализа для результата из кэша без ожидания анализаторов.
+        
+        Args:
+            code: Исходный код
+            language: Язык программирования
+            warm: Запустить в фоне инструменты, результатов которых нет в кэше анализаторов
+            
+        Returns:
+            Замечания быстрой проверки и инструментов из кэша ("findings") и состояние
+            инструментов ("tools") или None, если анализ для языка не выполняется
+        """
+        if not self._static_review_enabled(language):
+            return None
+        static = run_static_analysis(code, language, cached_only=True)
+        if warm and static.get("partial") and get_static_analysis_settings()["cache_enabled"]:
+            # Следующий запрос получит полный список замечаний из кэша
+            self._get_static_executor().submit(run_static_analysis, code, language)
+        return static
+    
+    @staticmethod
+    def _static_prompt_kwargs(static: Optional[Dict], kwargs: Dict) -> Dict:
+        """Параметры адаптера со сводкой замечаний статического анализа для промпта."""
+        if not static:
+            return kwargs
+        digest = make_findings_digest(static["findings"], get_static_review_settings()["max_findings"])
+        return dict(kwargs, static_digest=digest) if digest else kwargs
+    
+    @staticmethod
+    def _attach_static_analysis(analysis: Dict, static: Optional[Dict]) -> Dict:
+        """Добавление замечаний статического анализа к отчёту модели."""
+        if static is not None:
+            analysis["static_findings"] = static["findings"]
+            analysis["static_tools"] = static["tools"]
+        return analysis
+    
+    def analyze_batch(self, files: List[Dict], model_id: str = None, **kwargs) -> Dict:
+        """
+        Пакетный анализ нескольких файлов.
+        
+        Результаты из кэша берутся одним пакетным чтением, остальные файлы анализируются
+        параллельно в общем пуле потоков с ограничением числа одновременных запросов к модели.
+        Одинаковые файлы объединяются в один вызов модели.
+        
+        Args:
+            files (List[Dict]): Файлы с полями path, code, language
+            model_id (str, optional): Идентификатор модели
+            **kwargs: Дополнительные параметры
+            
+        Returns:
+            Dict: Результаты по файлам ("files") и сводка ("summary")
+        """
+        return self._analyze_files(files, model_id or self.default_model, self._get_batch_executor(), **kwargs)
+    
+    def _analyze_files(self, files: List[Dict], model_id: str, executor: ThreadPoolExecutor, **kwargs) -> Dict:
+        """
+        Анализ нескольких файлов или частей в заданном пуле потоков.
+        
+        Задачи пула не должны ждать задач того же пула, иначе при занятых потоках
+        анализ останавливается.
+        
+        Args:
+            files (List[Dict]): Файлы с полями path, code, language
+            model_id (str): Идентификатор модели
+            executor (ThreadPoolExecutor): Пул потоков для анализа
+            **kwargs: Дополнительные параметры
+            
+        Returns:
+            Dict: Результаты по файлам ("files") и сводка ("summary")
+        """
+        started = time.monotonic()
+        results = [None] * len(files)
+        
+        # Сначала одним запросом к кэшу находим уже проанализированные файлы
+        pending = list(range(len(files)))
+        if is_caching_enabled():
+            response_language = kwargs.get("response_language", "russian")
+            static_analysis = kwargs.get("static_analysis", True)
+            keys = {}
+            for index, item in enumerate(files):
+                # Ошибка в одном файле попадает в его результат и не прерывает пакет
+                try:
+                    keys[index] = make_review_cache_key(
+                        model_id, item["language"], item["code"], response_language,
+                        static_analysis and self._static_review_enabled(item["language"])
+                    )
+                except Exception as e:
+                    results[index] = {"path": item.get("path"), "success": False, "error": str(e)}
+            try:
+                cached = get_review_cache().get_many(list(keys.values()))
+            except Exception as e:
+                print(f"Ошибка пакетного чтения кэша: {str(e)}")
+                cached = {}
+            pending = []
+            for index, key in keys.items():
+                entry = cached.get(key)
+                if entry is None:
+                    pending.append(index)
+                    continue
+                results[index] = {
+                    "path": files[index].get("path"),
+                    "success": True,
+                    "result": self._as_text(entry["result"]),
+                    "cached": True,
+                    "duration": 0.0
+                }
+        
+        def review(index: int) -> Dict:
+            item = files[index]
+            file_started = time.monotonic()
+            analysis = self.analyze_code_with_metadata(item["code"], item["language"], model_id=model_id, **kwargs)
+            result = {
+                "path": item.get("path"),
+                "success": "error" not in analysis,
+                "result": self._as_text(analysis["result"]),
+                "cached": analysis.get("cached", False),
+                "duration": round(time.monotonic() - file_started, 3)
+            }
+            if analysis.get("stale"):
+                result["stale"] = True
+            if analysis.get("approximate"):
+                result["approximate"] = True
+                result["similarity"] = round(analysis["similarity"], 3)
+            if "error" in analysis:
+                result["error"] = analysis["error"]
             return result
+        
+        futures = {executor.submit(review, index): index for index in pending}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                results[index] = {"path": files[index].get("path"), "success": False, "error": str(e)}
+        
+        succeeded = sum(1 for result in results if result["success"])
+        summary = {
+            "total": len(files),
+            "succeeded": succeeded,
+            "failed": len(files) - succeeded,
+            "cached": sum(1 for result in results if result.get("cached")),
+            "analyzed": len(pending),
+            "duration": round(time.monotonic() - started, 3),
+            # Суммарное время последовательного анализа для сравнения с фактическим
+            "total_file_duration": round(sum(result.get("duration", 0.0) for result in results), 3)
+        }
+        print(f"Batch review: {summary}")
+        return {"files": results, "summary": summary}
+    
+    def _store_review(self, cache_key: str, result, code: str, language: str, model_id: str,
+                      similarity_scope: str) -> None:
+        """
+        Сохранение результата анализа в кэш и в индекс похожих запросов.
+        
+        Args:
+            cache_key: Ключ кэша
+            result: Результат анализа
+            code: Исходный код
+            language: Язык программирования
+            model_id: Идентификатор модели
+            similarity_scope: Область сравнения похожих запросов
+        """
+        get_review_cache().set(cache_key, {
+            "result": result,
+            "timestamp": time.time(),
+            "language": language,
+            "model": model_id
+        })
+        similarity_index = get_similarity_index()
+        if similarity_index is not None:
+            similarity_index.add(similarity_scope, code, language, cache_key)
+    
+    def stream_review(self, code: str, language: str, model_id: str = None, **kwargs) -> Iterator[Dict]:
+        """
+        Потоковый анализ кода: фрагменты ответа модели возвращаются по мере генерации.
+        
+        Результат из кэша возвращается одним фрагментом. Собранный из фрагментов
+        результат сохраняется в кэш так же, как при обычном анализе. Замечания
+        статического анализа передаются событием static до ответа модели.
+        
+        Args:
+            code (str): Код для анализа
+            language (str): Язык программирования
+            model_id (str, optional): Идентификатор модели
+            **kwargs: Дополнительные параметры
+            
+        Yields:
+            Dict: События с полями "event" (start, static, token, done, error) и "data"
+        """
+        model_id = model_id or self.default_model
+        if model_id not in self.models:
+            yield {"event": "error", "data": {"error": f"Model {model_id} not available. Available models: {list(self.models.keys())}"}}
+            return
+        
+        try:
+            chunked = self._split_large_code(code, language, self.get_adapter(model_id)) is not None
+        except Exception:
+            # Ошибка создания адаптера обрабатывается ниже вместе с ошибками анализа
+            chunked = False
+        if chunked:
+            # Части большого файла анализируются параллельно, отчёт передаётся целиком
+            yield {"event": "start", "data": {"model": model_id, "cached": False}}
+            analysis = self.analyze_code_with_metadata(code, language, model_id=model_id, **kwargs)
+            if "static_findings" in analysis:
+                yield {"event": "static", "data": {"findings": analysis["static_findings"], "tools": analysis["static_tools"]}}
+            yield {"event": "token", "data": {"text": self._as_text(analysis["result"])}}
+            yield {"event": "done", "data": {"cached": analysis.get("cached", False), "stale": False, "chunks": len(analysis.get("chunks", []))}}
+            return
+        
+        if is_caching_enabled():
+            response_language = kwargs.get("response_language", "russian")
+            static_digest = self._static_review_enabled(language)
+            cache_key = make_review_cache_key(model_id, language, code, response_language, static_digest)
+            similarity_index = get_similarity_index()
+            similarity_scope = self._similarity_scope(model_id, language, response_language, static_digest)
+            cached, _ = get_review_cache().lookup(cache_key)
+            if cached is not None or (
+                similarity_index is not None and similarity_index.find(similarity_scope, code, language) is not None
+            ):
+                # Результат уже есть - обычный путь учтёт устаревание и похожие запросы
+                analysis = self.analyze_code_with_metadata(code, language, model_id=model_id, **kwargs)
+                yield {"event": "start", "data": {"model": model_id, "cached": True}}
+                if "static_findings" in analysis:
+                    yield {"event": "static", "data": {"findings": analysis["static_findings"], "tools": analysis["static_tools"]}}
+                yield {"event": "token", "data": {"text": self._as_text(analysis["result"])}}
+                done = {"cached": True, "stale": analysis.get("stale", False)}
+                if analysis.get("approximate"):
+                    done.update(approximate=True, similarity=round(analysis["similarity"], 3))
+                yield {"event": "done", "data": done}
+                return
+        else:
+            cache_key = None
+        
+        # Анализаторы работают, пока создаётся адаптер
+        collect_static = self._start_static_analysis(code, language)
+        yield {"event": "start", "data": {"model": model_id, "cached": False}}
+        parts = []
+        try:
+            adapter = self.get_adapter(model_id)
+            static = collect_static()
+            if static is not None:
+                yield {"event": "static", "data": {"findings": static["findings"], "tools": static["tools"]}}
+            prompt_kwargs = self._static_prompt_kwargs(static, kwargs)
+            stream = getattr(adapter, "stream_code", None)
+            if stream is not None:
+                chunks = stream(code, language, **prompt_kwargs)
+            else:
+                # Адаптер без потоковой генерации - отдаём результат целиком
+                chunks = [self._as_text(adapter.analyze_code(code, language, **prompt_kwargs))]
+            
+            for text in chunks:
+                parts.append(text)
+                yield {"event": "token", "data": {"text": text}}
         except Exception as e:
-            print(f"Error analyzing code with {model_id}: {str(e)}")
-            print("Falling back to mock model")
+            print(f"Error streaming analysis with {model_id}: {str(e)}")
+            if parts:
+                # Часть ответа уже отправлена - заменить её заглушкой нельзя
+                yield {"event": "error", "data": {"error": str(e)}}
+                return
+            yield {"event": "token", "data": {"text": self._as_text(self._get_mock_analysis(code, language))}}
+            yield {"event": "done", "data": {
+                "cached": False,
+                "stale": False,
+                "warning": f"Произошла ошибка при анализе модели, используется заглушка: {str(e)}"
+            }}
+            return
+        
+        if cache_key is not None:
+            self._store_review(cache_key, "".join(parts), code, language, model_id, similarity_scope)
+        yield {"event": "done", "data": {"cached": False, "stale": False}}
+    
+    @staticmethod
+    def _as_text(result) -> str:
+        """Приведение результата анализа к строке."""
+        if isinstance(result, str):
+            return result
+        if isinstance(result, (dict, list)):
+            return json.dumps(result, ensure_ascii=False)
+        return str(result)
+    
+    def _revalidate_in_background(self, cache_key: str, compute, lookup) -> None:
+        """
+        Фоновое обновление устаревшей записи кэша.
+        
+        Args:
+            cache_key: Ключ кэша
+            compute: Функция, выполняющая анализ и сохраняющая результат в кэш
+            lookup: Функция поиска свежего результата в общем кэше
+        """
+        with self._revalidating_lock:
+            if cache_key in self._revalidating:
+                return
+            self._revalidating.add(cache_key)
+        
+        def refresh():
+            try:
+                get_single_flight().do(cache_key, compute, lookup=lookup)
+            except Exception as e:
+                print(f"Error revalidating cached result {cache_key}: {str(e)}")
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.discard(cache_key)
+        
+        threading.Thread(target=refresh, daemon=True).start()
+        
+    def analyze_code_incremental(self, code: str, language: str, model_id: str = None,
+                                 progress: Optional[Callable[[int, int], None]] = None, **kwargs) -> Dict:
+        """
+        Инкрементальный анализ кода по функциям и классам.
+        
+        Код разбивается на верхнеуровневые единицы, для неизменённых единиц
+        используются кэшированные результаты, и только изменённые отправляются модели
+        параллельно в отдельном пуле потоков.
+        
+        Args:
+            code (str): Код для анализа
+            language (str): Язык программирования
+            model_id (str, optional): Идентификатор модели
+            progress (Callable, optional): Вызывается с числом обработанных и общим числом единиц
+            **kwargs: Дополнительные параметры
             
-            # Если произошла ошибка, используем mock-модель
-            return self._get_mock_analysis(code, language)
+        Returns:
+            Dict: Итоговый отчёт и сведения об использовании кэша по единицам
+        """
+        model_id = model_id or self.default_model
+        units = split_into_units(code, language)
+        
+        # Разбивать нечего или некуда сохранять результаты - обычный анализ
+        if len(units) == 1 or not is_caching_enabled():
+            return {
+                "result": self.analyze_code(code, language, model_id=model_id, **kwargs),
+                "units": [dict(unit.to_dict(), cached=False) for unit in units],
+                "reused_units": 0,
+                "analyzed_units": len(units)
+            }
+        
+        response_language = kwargs.get("response_language", "russian")
+        keys = [make_review_cache_key(model_id, language, unit.source, response_language) for unit in units]
+        cached = get_review_cache().get_many(keys)
+        
+        results = [cached[key]["result"] if key in cached else None for key in keys]
+        units_info = [dict(unit.to_dict(), cached=key in cached) for unit, key in zip(units, keys)]
+        reused = sum(1 for info in units_info if info["cached"])
+        if progress is not None and reused:
+            progress(reused, len(units))
+        
+        # Анализаторы сообщили бы об именах из других единиц как о неопределённых
+        executor = self._get_incremental_executor()
+        futures = {
+            executor.submit(
+                self.analyze_code, unit.source, language, model_id=model_id, static_analysis=False, **kwargs
+            ): index
+            for index, (unit, key) in enumerate(zip(units, keys)) if key not in cached
+        }
+        for done, future in enumerate(as_completed(futures), reused + 1):
+            results[futures[future]] = future.result()
+            if progress is not None:
+                progress(done, len(units))
+        
+        print(f"Incremental review: {reused} of {len(units)} units reused from cache")
+        
+        return {
+            "result": merge_unit_reviews(units, results),
+            "units": units_info,
+            "reused_units": reused,
+            "analyzed_units": len(units) - reused
+        }
         
     def _get_mock_analysis(self, code, language):
         """
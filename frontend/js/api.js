@@ -1,4 +1,4 @@
-import { displayResult, displayError, showLoading, hideLoading, updateModelSelector } from './ui.js';
+import { displayResult, displayPartialResult, displayError, formatStaticFindings, showLoading, hideLoading, updateModelSelector } from './ui.js';
 
 export function loadModels() {
     console.log("Loading models...");
@@ -26,6 +26,12 @@ export function analyzeCode(code, language, model, responseLanguage) {
 
     showLoading();
 
+    // Потоковый анализ: текст отображается по мере генерации
+    if (window.ReadableStream && window.TextDecoder) {
+        analyzeCodeStream(code, language, model, responseLanguage);
+        return;
+    }
+
     fetch('/api/review', {
         method: 'POST',
         headers: {
@@ -52,7 +58,8 @@ export function analyzeCode(code, language, model, responseLanguage) {
         console.log("API response data:", data);
         if (data.success) {
             console.log("Success, displaying result");
-            displayResult(data.result);
+            const staticText = formatStaticFindings(data.static_findings);
+            displayResult(staticText ? staticText + data.result : data.result);
         } else {
             console.error("API returned error:", data.error);
             throw new Error(data.error || 'Неизвестная ошибка');
@@ -64,3 +71,86 @@ export function analyzeCode(code, language, model, responseLanguage) {
         displayError(error.message);
     });
 }
+
+function analyzeCodeStream(code, language, model, responseLanguage) {
+    let resultText = '';
+    let staticText = '';
+    let firstToken = true;
+
+    const handleEvent = (event, data) => {
+        if (event === 'static_quick' || event === 'static') {
+            // Быстрые замечания приходят раньше ответа модели, полный список анализаторов заменяет их
+            hideLoading();
+            staticText = formatStaticFindings(data.findings);
+            displayPartialResult(staticText);
+        } else if (event === 'token') {
+            if (firstToken) {
+                hideLoading();
+                firstToken = false;
+            }
+            resultText += data.text;
+            displayPartialResult(staticText + resultText);
+        } else if (event === 'done') {
+            hideLoading();
+            if (data.warning) {
+                console.warn(data.warning);
+            }
+            displayResult(staticText + resultText);
+        } else if (event === 'error') {
+            throw new Error(data.error || 'Неизвестная ошибка');
+        }
+    };
+
+    fetch('/api/review/stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            code: code,
+            language: language,
+            model: model,
+            response_language: responseLanguage
+        })
+    })
+    .then(async response => {
+        console.log("Review stream response status:", response.status);
+        if (!response.ok) {
+            const data = await response.json();
+            throw new Error(`Ошибка сервера: ${response.status}${data.error ? ' - ' + data.error : ''}`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+
+            // События SSE разделены пустой строкой
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                let event = 'message';
+                let data = '';
+                rawEvent.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) {
+                        event = line.slice(7);
+                    } else if (line.startsWith('data: ')) {
+                        data += line.slice(6);
+                    }
+                });
+                handleEvent(event, data ? JSON.parse(data) : {});
+            }
+        }
+    })
+    .catch(error => {
+        hideLoading();
+        console.error("Error analyzing code:", error);
+        displayError(error.message);
+    });
+}
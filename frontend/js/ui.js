@@ -40,6 +40,31 @@ export function displayResult(result) {
     resultContainer.scrollIntoView({ behavior: 'smooth' });
 }
 
+export function displayPartialResult(text) {
+    // Промежуточный результат потокового анализа: без прокрутки и отладочного вывода
+    const resultContainer = document.getElementById('result-container');
+    const resultElement = document.getElementById('result');
+    try {
+        resultElement.innerHTML = marked.parse(text);
+    } catch (e) {
+        resultElement.textContent = text;
+    }
+    resultContainer.style.display = 'block';
+}
+
+export function formatStaticFindings(findings) {
+    // Замечания статического анализа в виде markdown-списка перед отчётом модели
+    if (!findings || findings.length === 0) {
+        return '';
+    }
+    const lines = findings.map(finding => {
+        const location = finding.line ? `Строка ${finding.line}` : 'Файл';
+        const code = finding.symbol || finding.code || finding.tool;
+        return `- **${location}** \`${code}\`: ${finding.message}`;
+    });
+    return `### Статический анализ\n\n${lines.join('\n')}\n\n`;
+}
+
 export function displayError(message) {
     const errorElement = document.getElementById('error');
     errorElement.textContent = message;
@@ -26,7 +26,11 @@ def app(monkeypatch):
 
     # It's important to mock before the app is created
     # because ModelService is instantiated at the module level in routes.
-    monkeypatch.setattr('backend.api.routes.model_service', MockModelService())
+    service = MockModelService()
+    monkeypatch.setattr('backend.api.routes.model_service', service)
+    monkeypatch.setattr('backend.services.model_service', service)
+    # Rate limiter counters are kept in memory so tests don't need a Redis server.
+    monkeypatch.setenv('REDIS_URL', 'memory://')
 
     app = create_app()
     app.config.update({
@@ -0,0 +1,40 @@
+from backend.core.static_analysis.ast_checker import check_python
+
+CODE = '''import os
+import sys
+from typing import List
+
+__all__ = ["sys"]
+
+
+def collect(items=[], seen=dict()) -> "List[int]":
+    try:
+        list = items
+    except:
+        pass
+    return list
+'''
+
+
+def test_common_problems_are_found():
+    """Неиспользуемый импорт, голый except, изменяемые значения по умолчанию и переопределение встроенных имён."""
+    findings = check_python(CODE)
+
+    assert [(finding["line"], finding["symbol"]) for finding in findings] == [
+        (1, "unused-import"),
+        (8, "mutable-default"),
+        (8, "mutable-default"),
+        (10, "shadowed-builtin"),
+        (11, "bare-except"),
+    ]
+    assert all(finding["tool"] == "ast" for finding in findings)
+
+
+def test_long_function_and_syntax_error():
+    body = "".join(f"    x{n} = {n}\n" for n in range(5))
+
+    assert [finding["symbol"] for finding in check_python(f"def f():\n{body}", max_function_lines=3)] == ["long-function"]
+    assert check_python(f"def f():\n{body}", max_function_lines=10) == []
+
+    findings = check_python("def f(:\n    pass\n")
+    assert [(finding["symbol"], finding["severity"], finding["line"]) for finding in findings] == [("syntax-error", "error", 1)]
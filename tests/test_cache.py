@@ -0,0 +1,163 @@
+import time
+
+from backend.core.cache import DiskCache, MemoryCache, RedisCache, SegmentCache, TieredCache
+
+
+def _entry(result, timestamp=None):
+    return {"result": result, "timestamp": timestamp or time.time(), "language": "python"}
+
+
+def test_memory_cache_evicts_least_recently_used():
+    """LRU-уровень вытесняет самую давно использованную запись."""
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", _entry("A"))
+    cache.set("b", _entry("B"))
+    cache.get("a")
+    cache.set("c", _entry("C"))
+
+    assert cache.get("b") is None
+    assert cache.get("a")["result"] == "A"
+    assert cache.get("c")["result"] == "C"
+
+
+def test_memory_cache_respects_byte_limit():
+    """Суммарный размер записей не превышает лимит."""
+    cache = MemoryCache(max_entries=100, max_bytes=200)
+    for i in range(10):
+        cache.set(str(i), _entry("x" * 50))
+
+    assert cache.total_bytes <= 200
+    assert len(cache) < 10
+
+
+def test_expired_entries_are_misses(tmp_path):
+    """Оба уровня используют один TTL."""
+    old = time.time() - 120
+    memory = MemoryCache(ttl=60)
+    disk = DiskCache(tmp_path, ttl=60)
+    memory.set("k", _entry("old", old))
+    disk.set("k", _entry("old", old))
+
+    assert memory.get("k") is None
+    assert disk.get("k") is None
+    assert not (tmp_path / "k.json").exists()
+
+
+def test_disk_cache_evicts_oldest_files(tmp_path):
+    """Дисковый уровень удаляет старые файлы при превышении лимита."""
+    disk = DiskCache(tmp_path, max_bytes=300)
+    for i in range(10):
+        disk.set(f"key{i}", _entry("y" * 50))
+
+    assert disk.total_bytes <= 300
+    assert disk.get("key0") is None
+    assert disk.get("key9")["result"] == "y" * 50
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path):
+    """Попадание в дисковый уровень поднимает запись в память."""
+    disk = DiskCache(tmp_path)
+    disk.set("k", _entry("R"))
+    cache = TieredCache(MemoryCache(), disk)
+
+    assert cache.get("k")["result"] == "R"
+    assert cache.memory.get("k")["result"] == "R"
+
+
+class FakeRedis:
+    """Минимальная замена клиента Redis для тестов."""
+
+    def __init__(self):
+        self.data = {}
+        self.executed = 0
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        client = self
+
+        class Pipeline:
+            def __init__(self):
+                self.keys = []
+
+            def get(self, key):
+                self.keys.append(key)
+
+            def execute(self):
+                client.executed += 1
+                return [client.data.get(key) for key in self.keys]
+
+        return Pipeline()
+
+
+def test_redis_cache_compresses_and_batches_reads():
+    """Значения в Redis сжаты, а чтение нескольких ключей идёт одним конвейером."""
+    client = FakeRedis()
+    cache = RedisCache("redis://unused", client=client)
+    cache.set("a", _entry("A" * 1000))
+    cache.set("b", _entry("B"))
+
+    assert len(client.data["review-cache:a"]) < 1000
+    found = cache.get_many(["a", "b", "missing"])
+    assert set(found) == {"a", "b"}
+    assert client.executed == 1
+
+
+def test_segment_cache_survives_reopen_and_compaction(tmp_path):
+    """Записи сегмента читаются после переоткрытия, а уплотнение удаляет мёртвые данные."""
+    path = tmp_path / "reviews.seg"
+    cache = SegmentCache(path, compaction_interval=0)
+    for i in range(5):
+        cache.set("k", _entry(f"v{i}"))
+    cache.set("old", _entry("old", time.time() - 7200))
+    cache.set("gone", _entry("gone"))
+    cache.delete("gone")
+    cache.close()
+
+    cache = SegmentCache(path, compaction_interval=0)
+    assert cache.get("k")["result"] == "v4"
+    assert cache.get("old") is None
+    assert cache.get("gone") is None
+
+    size_before = cache.file_size
+    assert cache.needs_compaction()
+    cache.compact()
+    assert cache.file_size < size_before
+    assert len(cache) == 1
+    assert cache.get("k")["result"] == "v4"
+
+
+def test_segment_cache_sees_writes_of_other_instances(tmp_path):
+    """Записи другого процесса подхватываются при промахе индекса."""
+    path = tmp_path / "reviews.seg"
+    reader = SegmentCache(path, compaction_interval=0)
+    writer = SegmentCache(path, compaction_interval=0)
+    writer.set("k", _entry("shared"))
+
+    assert reader.get("k")["result"] == "shared"
+
+    writer.compact()
+    writer.set("k2", _entry("after"))
+    assert reader.get("k2")["result"] == "after"
+
+
+def test_tiered_cache_reports_stale_entries_within_grace_window():
+    """Запись старше TTL, но в окне хранения, возвращается только через lookup с признаком stale."""
+    cache = TieredCache(MemoryCache(ttl=3600 + 600), ttl=3600)
+    cache.set("fresh", _entry("F"))
+    cache.set("stale", _entry("S", time.time() - 3700))
+    cache.set("gone", _entry("G", time.time() - 5000))
+
+    assert cache.lookup("fresh") == (cache.get("fresh"), False)
+    assert cache.get("stale") is None
+    entry, stale = cache.lookup("stale")
+    assert entry["result"] == "S" and stale
+    assert cache.lookup("gone") == (None, False)
+    assert set(cache.get_many(["fresh", "stale"])) == {"fresh"}
@@ -0,0 +1,39 @@
+from backend.core.cache import make_review_cache_key, normalize_code
+
+
+def test_python_key_ignores_formatting_and_comments():
+    """Отступы, пробелы и комментарии не меняют ключ Python-кода."""
+    original = "def add(a, b):\n    # сумма\n    return a + b\n"
+    reformatted = "    def add(a,b):   \n\n        return a+b  # другой комментарий\n"
+
+    assert make_review_cache_key("gpt-4o", "python", original) == make_review_cache_key("gpt-4o", "python", reformatted)
+
+
+def test_python_key_changes_with_code():
+    """Изменение литерала меняет ключ."""
+    assert make_review_cache_key("gpt-4o", "python", "x = 1") != make_review_cache_key("gpt-4o", "python", "x = 2")
+
+
+def test_python_invalid_syntax_falls_back_to_tokens():
+    """Для некорректного кода используется токенизатор."""
+    assert normalize_code("if x:\n  y = (1 +  # c\n", "python") == normalize_code("if x:\n  y = (1 +\n", "python")
+
+
+def test_generic_tokenizer_keeps_strings_and_drops_comments():
+    """Для других языков комментарии удаляются, а строки сохраняются как есть."""
+    a = 'function f() {\n  /* doc */ return "a  b"; // note\n}'
+    b = 'function f(){ return "a  b"; }'
+
+    assert normalize_code(a, "javascript") == normalize_code(b, "javascript")
+    assert normalize_code(a, "javascript") != normalize_code('function f(){ return "a b"; }', "javascript")
+
+
+def test_key_includes_model_response_language_and_prompt_version(monkeypatch):
+    """Модель, язык ответа, сводка статического анализа и версия промптов входят в ключ."""
+    base = make_review_cache_key("gpt-4o", "python", "x = 1", "russian")
+
+    assert make_review_cache_key("deepseek-v3", "python", "x = 1", "russian") != base
+    assert make_review_cache_key("gpt-4o", "python", "x = 1", "english") != base
+    assert make_review_cache_key("gpt-4o", "python", "x = 1", "russian", static_digest=True) != base
+    monkeypatch.setenv("PROMPT_TEMPLATE_VERSION", "3")
+    assert make_review_cache_key("gpt-4o", "python", "x = 1", "russian") != base
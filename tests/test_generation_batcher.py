@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+tokenizers = pytest.importorskip("tokenizers")
+
+from backend.core.ml_analysis.generation_batcher import GenerationBatcher
+
+PARAMS = {"max_length": 40, "do_sample": False}
+
+
+@pytest.fixture(scope="module")
+def model_and_tokenizer():
+    """Маленькая случайная модель GPT-2 и словарный токенизатор без загрузки из сети."""
+    vocab = {f"w{i}": i for i in range(100)}
+    vocab.update({"<eos>": 100, "<unk>": 101})
+    tokenizer_object = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocab, unk_token="<unk>"))
+    tokenizer_object.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    tokenizer = transformers.PreTrainedTokenizerFast(tokenizer_object=tokenizer_object, eos_token="<eos>", unk_token="<unk>")
+    torch.manual_seed(0)
+    config = transformers.GPT2Config(vocab_size=102, n_positions=64, n_embd=32, n_layer=2, n_head=2,
+                                     bos_token_id=100, eos_token_id=100)
+    return transformers.GPT2LMHeadModel(config).eval(), tokenizer
+
+
+class CountingModel:
+    """Модель, которая запоминает размеры пакетов generate."""
+
+    def __init__(self, model):
+        self.model = model
+        self.config = model.config
+        self.batch_sizes = []
+
+    def generate(self, input_ids, **kwargs):
+        self.batch_sizes.append(input_ids.shape[0])
+        return self.model.generate(input_ids, **kwargs)
+
+
+def generate_alone(model, tokenizer, prompt):
+    inputs = tokenizer(prompt, return_tensors="pt")
+    with torch.no_grad():
+        output = model.generate(inputs["input_ids"], attention_mask=inputs["attention_mask"], pad_token_id=100, **PARAMS)
+    return tokenizer.decode(output[0][inputs["input_ids"].shape[1]:], skip_special_tokens=True).strip()
+
+
+def run_concurrently(batcher, prompts):
+    results = [None] * len(prompts)
+
+    def request(index):
+        results[index] = batcher.generate(prompts[index])
+
+    threads = [threading.Thread(target=request, args=(index,)) for index in range(len(prompts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_requests_share_one_generate_call(model_and_tokenizer):
+    """Одновременные промпты разной длины обрабатываются одним пакетом с теми же ответами, что и по одному."""
+    model, tokenizer = model_and_tokenizer
+    prompts = [" ".join(f"w{(index * 7 + position) % 100}" for position in range(3 + index * 4)) for index in range(4)]
+    expected = [generate_alone(model, tokenizer, prompt) for prompt in prompts]
+
+    counting = CountingModel(model)
+    batcher = GenerationBatcher(counting, tokenizer, generate_kwargs=PARAMS, window=0.5)
+
+    assert run_concurrently(batcher, prompts) == expected
+    assert counting.batch_sizes == [4]
+
+
+def test_token_budget_limits_batch(model_and_tokenizer):
+    """Запрос, который не помещается в бюджет токенов пакета, переходит в следующий пакет."""
+    model, tokenizer = model_and_tokenizer
+    counting = CountingModel(model)
+    # Три промпта по 10 токенов: в бюджет 25 помещаются только два
+    batcher = GenerationBatcher(counting, tokenizer, generate_kwargs=PARAMS, window=0.5, max_batch_tokens=25)
+
+    run_concurrently(batcher, [" ".join(["w1"] * 10)] * 3)
+
+    assert sorted(counting.batch_sizes) == [1, 2]
@@ -0,0 +1,110 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.core.ml_analysis.hedging import HedgeBudget, HedgedRequest, HedgePool
+from backend.core.ml_analysis.upstream_health import UpstreamHealthTracker
+
+SERVERS = [{"url": "https://slow"}, {"url": "https://fast"}, {"url": "https://spare"}]
+
+
+def make_hedged(budget=None, **kwargs):
+    executor = ThreadPoolExecutor(max_workers=4)
+    params = {"min_delay": 0.01, "default_delay": 0.05}
+    params.update(kwargs)
+    return HedgedRequest(
+        executor, HedgePool(4), budget or HedgeBudget(ratio=0, burst=1), UpstreamHealthTracker(), **params
+    )
+
+
+def test_slow_primary_is_hedged_and_first_answer_wins():
+    """Дубль к следующему серверу отправляется после задержки, побеждает первый ответ."""
+    calls = []
+
+    def attempt(server):
+        calls.append(server["url"])
+        time.sleep(1.0 if server["url"] == "https://slow" else 0.01)
+        return server["url"]
+
+    started = time.monotonic()
+    result, server = make_hedged().run(SERVERS, attempt)
+
+    assert result == "https://fast"
+    assert server["url"] == "https://fast"
+    assert calls == ["https://slow", "https://fast"]
+    assert time.monotonic() - started < 0.5
+
+
+def test_hedges_are_limited_by_budget():
+    """Без бюджета медленный сервер не дублируется."""
+    calls = []
+
+    def attempt(server):
+        calls.append(server["url"])
+        time.sleep(0.2)
+        return server["url"]
+
+    result, _ = make_hedged(budget=HedgeBudget(ratio=0, burst=0)).run(SERVERS, attempt)
+
+    assert result == "https://slow"
+    assert calls == ["https://slow"]
+
+
+def test_failure_moves_to_next_server_without_spending_budget():
+    """Ошибка сервера сразу переводит запрос на следующий сервер."""
+    budget = HedgeBudget(ratio=0, burst=1)
+
+    def attempt(server):
+        if server["url"] != "https://spare":
+            raise ConnectionError(server["url"])
+        return "ok"
+
+    assert make_hedged(budget=budget, default_delay=5).run(SERVERS, attempt)[0] == "ok"
+    assert budget.try_acquire()
+
+
+def test_all_failures_raise_last_error():
+    def attempt(server):
+        raise ConnectionError(server["url"])
+
+    with pytest.raises(ConnectionError, match="spare"):
+        make_hedged().run(SERVERS, attempt)
+
+
+def test_hedge_delay_uses_latency_percentile():
+    hedged = make_hedged(percentile=50, min_delay=0.1, default_delay=7)
+    assert hedged.hedge_delay("https://slow") == 7
+
+    for latency in (0.5, 1.0, 2.0, 3.0, 4.0):
+        hedged.health.record_success("https://slow", latency)
+    assert hedged.hedge_delay("https://slow") == 2.0
+
+
+def test_pools_saturated_by_losers_do_not_trigger_hedges():
+    """Очередь к пулу, занятому проигравшими запросами, не считается задержкой, а без свободного потока дубль не отправляется."""
+    executor = ThreadPoolExecutor(max_workers=1)
+    hedge_pool = HedgePool(1)
+    release = threading.Event()
+    # Проигравшие запросы предыдущих вызовов ещё ждут ответа медленных серверов
+    executor.submit(time.sleep, 0.2)
+    assert hedge_pool.try_submit(release.wait) is not None
+    budget = HedgeBudget(ratio=0, burst=1)
+    hedged = HedgedRequest(executor, hedge_pool, budget, UpstreamHealthTracker(), min_delay=0.01, default_delay=0.05)
+    calls = []
+
+    def attempt(server):
+        calls.append(server["url"])
+        time.sleep(0.1 if server["url"] == "https://slow" else 0.01)
+        return server["url"]
+
+    try:
+        result, _ = hedged.run(SERVERS, attempt)
+    finally:
+        release.set()
+
+    assert result == "https://slow"
+    assert calls == ["https://slow"]
+    # Неотправленный дубль не расходует бюджет
+    assert budget.try_acquire()
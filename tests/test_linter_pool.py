@@ -0,0 +1,34 @@
+import pytest
+
+from backend.core.static_analysis.linter_pool import LinterPool, flake8_options, pylint_options
+
+CODE = "import os\n\n\ndef add(a, b):\n    return a + b\n"
+
+
+def test_options_are_built_from_config():
+    """Списки из конфигурации передаются анализаторам через запятую, имена flake8 - через подчёркивание."""
+    options = pylint_options({"disable": ["fixme", "no-member"], "max-line-length": 100})
+
+    assert "--disable=fixme,no-member" in options
+    assert "--max-line-length=100" in options
+    assert flake8_options({"max-line-length": 100, "ignore": ["E203"]}) == {"max_line_length": 100, "ignore": ["E203"]}
+
+
+def test_pool_lints_code_without_temp_files():
+    """Рабочие процессы возвращают разобранные замечания обоих анализаторов и переиспользуются."""
+    pytest.importorskip("pylint")
+    pytest.importorskip("flake8")
+
+    pool = LinterPool(workers=1)
+    try:
+        first = {tool: pool.submit(tool, CODE).result(timeout=60) for tool in ("pylint", "flake8")}
+        second = {tool: pool.submit(tool, "def f():\n    return undefined\n").result(timeout=60) for tool in ("pylint", "flake8")}
+    finally:
+        pool.shutdown()
+
+    assert [finding["symbol"] for finding in first["pylint"]] == ["unused-import"]
+    assert [finding["code"] for finding in first["flake8"]] == ["F401"]
+    # Результат предыдущего запроса не попадает в следующий
+    assert [finding["symbol"] for finding in second["pylint"]] == ["undefined-variable"]
+    assert [finding["code"] for finding in second["flake8"]] == ["F821"]
+    assert second["flake8"][0]["severity"] == "error"
@@ -0,0 +1,72 @@
+import sys
+import threading
+import time
+
+from backend.services.model_service import ModelService
+
+
+class SlowAdapter:
+    """Адаптер, запросы к которому выполняются заметное время."""
+
+    def analyze_code(self, code, language, **kwargs):
+        time.sleep(0.05)
+        return f"Замечание к {len(code.splitlines())} строкам"
+
+
+class MockModelService(ModelService):
+    def load_model_configs(self):
+        self.models = {"mock-model": {"id": "mock-model", "name": "Mock Model", "type": "mock", "is_default": True}}
+        self.default_model = "mock-model"
+
+    def get_adapter(self, model_id=None):
+        return SlowAdapter()
+
+
+def test_batch_of_large_files_does_not_deadlock(monkeypatch):
+    """Части больших файлов не ждут разрешений и потоков, занятых самими файлами."""
+    monkeypatch.setenv("ENABLE_CACHE", "False")
+    monkeypatch.setenv("STATIC_REVIEW_ENABLED", "False")
+    monkeypatch.setenv("BATCH_MODEL_CONCURRENCY", "2")
+    monkeypatch.setenv("BATCH_MAX_WORKERS", "2")
+    monkeypatch.setenv("REVIEW_CHUNK_SIZE", "200")
+    service = MockModelService()
+    source = "".join(f"def function_{n}(value):\n    return value * {n}\n\n\n" for n in range(20))
+    files = [{"path": f"module_{n}.py", "code": source, "language": "python"} for n in range(4)]
+    reports = []
+
+    worker = threading.Thread(target=lambda: reports.append(service.analyze_batch(files)), daemon=True)
+    worker.start()
+    worker.join(timeout=30)
+
+    assert reports, "пакетный анализ больших файлов не завершился"
+    assert reports[0]["summary"]["succeeded"] == 4
+
+
+def test_batch_reports_cache_key_errors_per_file(monkeypatch):
+    """Ошибка построения ключа кэша для одного файла не прерывает весь пакет."""
+    monkeypatch.setenv("ENABLE_CACHE", "True")
+    monkeypatch.setenv("STATIC_REVIEW_ENABLED", "False")
+    module = sys.modules["backend.services.model_service"]
+
+    def make_key(model_id, language, code, *args):
+        if not isinstance(code, str):
+            raise TypeError("code must be str")
+        return f"{model_id}:{language}:{code}"
+
+    class StubCache:
+        def get_many(self, keys):
+            return {key: {"result": "Из кэша"} for key in keys}
+
+    monkeypatch.setattr(module, "make_review_cache_key", make_key)
+    monkeypatch.setattr(module, "get_review_cache", StubCache)
+    service = MockModelService()
+
+    report = service.analyze_batch([
+        {"path": "a.py", "code": "x = 1", "language": "python"},
+        {"path": "b.py", "code": ["x = 1"], "language": "python"},
+    ])
+
+    assert report["files"][0] == {"path": "a.py", "success": True, "result": "Из кэша", "cached": True, "duration": 0.0}
+    assert report["files"][1] == {"path": "b.py", "success": False, "error": "code must be str"}
+    assert report["summary"]["succeeded"] == 1
+    assert report["summary"]["failed"] == 1
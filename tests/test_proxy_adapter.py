@@ -0,0 +1,140 @@
+import httpx
+import pytest
+
+from backend.core.ml_analysis import proxy_adapter
+from backend.core.ml_analysis.proxy_adapter import ProxyOpenAIAdapter
+from backend.core.ml_analysis.upstream_health import UpstreamHealthTracker
+from backend.core.ml_analysis.upstream_prober import UpstreamProber
+
+
+@pytest.fixture
+def adapter(monkeypatch):
+    """Прокси-адаптер без сетевых обращений."""
+    monkeypatch.setenv("PROXY_API_KEY", "test-key")
+    monkeypatch.setattr(proxy_adapter, "get_upstream_prober", lambda: UpstreamProber(UpstreamHealthTracker(), interval=0))
+    return ProxyOpenAIAdapter(model_id="gpt-4o-proxy")
+
+
+def test_clients_are_pooled_per_server(adapter):
+    """Клиент создаётся один раз для каждой комбинации URL, ключа и заголовков."""
+    first = adapter._get_client("https://example.com/v1", "key", {"X-Title": "bot"})
+
+    assert adapter._get_client("https://example.com/v1", "key", {"X-Title": "bot"}) is first
+    assert adapter._get_client("https://example.com/v1", "other-key", {"X-Title": "bot"}) is not first
+    assert adapter._get_client(adapter.base_url, adapter.api_key, adapter.headers) is adapter.client
+
+
+def test_adapter_creation_does_not_touch_network(monkeypatch):
+    """Адаптер только регистрирует серверы для фоновой проверки."""
+    prober = UpstreamProber(UpstreamHealthTracker(), interval=0)
+    monkeypatch.setenv("PROXY_API_KEY", "test-key")
+    monkeypatch.setattr(proxy_adapter, "get_upstream_prober", lambda: prober)
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("сетевое обращение при создании адаптера")
+
+    monkeypatch.setattr(httpx.Client, "send", no_network)
+    adapter = ProxyOpenAIAdapter(model_id="gpt-4o-proxy")
+
+    assert set(prober._targets) == {server["url"] for server in adapter._build_servers(adapter.api_key)}
+
+
+def test_probe_results_feed_upstream_ordering():
+    """Недоступный по результатам проверки сервер исключается из порядка опроса."""
+    health = UpstreamHealthTracker()
+    prober = UpstreamProber(health, interval=0)
+    responses = {"https://up/v1/models": 401}
+
+    def handler(request):
+        status = responses.get(str(request.url))
+        if status is None:
+            raise httpx.ConnectError("unreachable", request=request)
+        return httpx.Response(status)
+
+    original = httpx.AsyncClient.__init__
+
+    def init(self, *args, **kwargs):
+        original(self, *args, transport=httpx.MockTransport(handler), **kwargs)
+
+    prober.register("https://up/v1", "key")
+    prober.register("https://down/v1", "key")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(httpx.AsyncClient, "__init__", init)
+        prober.probe_now()
+
+    assert health.snapshot()["https://up/v1"]["probe"]["reachable"]
+    assert [server["url"] for server in health.order([{"url": "https://down/v1"}, {"url": "https://up/v1"}])] == ["https://up/v1"]
+
+
+class FakeChunk:
+    def __init__(self, text):
+        delta = type("Delta", (), {"content": text})()
+        self.choices = [type("Choice", (), {"delta": delta})()]
+
+
+class FakeStream:
+    def __init__(self, texts, error=None):
+        self.texts = texts
+        self.error = error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        for text in self.texts:
+            yield FakeChunk(text)
+        if self.error is not None:
+            raise self.error
+
+
+def fake_client(stream_or_error):
+    def create(**kwargs):
+        assert kwargs["stream"] is True
+        if isinstance(stream_or_error, Exception):
+            raise stream_or_error
+        return stream_or_error
+
+    completions = type("Completions", (), {"create": staticmethod(create)})()
+    return type("Client", (), {"chat": type("Chat", (), {"completions": completions})()})()
+
+
+def test_stream_fails_over_before_first_token(adapter, monkeypatch):
+    """До первого фрагмента ответа запрос переключается на следующий сервер."""
+    health = UpstreamHealthTracker()
+    monkeypatch.setattr(proxy_adapter, "get_upstream_health", lambda: health)
+    servers = [server["url"] for server in adapter._build_servers(adapter.api_key)]
+    clients = {
+        servers[0]: fake_client(ConnectionError("refused")),
+        servers[1]: fake_client(FakeStream(["## Обзор", "\n", "ok"]))
+    }
+    monkeypatch.setattr(adapter, "_get_client", lambda url, key, headers: clients.get(url, fake_client(FakeStream([]))))
+
+    assert list(adapter.stream_code("x = 1", "python")) == ["## Обзор", "\n", "ok"]
+    assert health.snapshot()[servers[0]]["error_rate"] == 1.0
+    assert health.snapshot()[servers[1]]["error_rate"] == 0.0
+
+
+def test_stream_error_after_first_token_is_raised(adapter, monkeypatch):
+    """После начала ответа ошибка не скрывается переключением на другой сервер."""
+    monkeypatch.setattr(proxy_adapter, "get_upstream_health", lambda: UpstreamHealthTracker())
+    monkeypatch.setattr(
+        adapter, "_get_client",
+        lambda url, key, headers: fake_client(FakeStream(["partial"], error=ConnectionError("reset")))
+    )
+
+    received = []
+    with pytest.raises(ConnectionError):
+        for text in adapter.stream_code("x = 1", "python"):
+            received.append(text)
+    assert received == ["partial"]
+
+
+def test_recreated_adapter_reuses_pooled_clients(adapter, monkeypatch):
+    """Пересозданный при изменении модели адаптер использует те же клиенты, а не открывает новый пул."""
+    monkeypatch.setattr(proxy_adapter, "get_upstream_prober", lambda: UpstreamProber(UpstreamHealthTracker(), interval=0))
+    recreated = ProxyOpenAIAdapter(model_id="gpt-4o-proxy")
+
+    assert recreated.client is adapter.client
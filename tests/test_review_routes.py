@@ -0,0 +1,191 @@
+import sys
+
+import pytest
+from celery.exceptions import TimeoutError as CeleryTimeoutError
+
+
+class FakeAsyncResult:
+    """Результат задачи Celery с заданным состоянием."""
+
+    states = {}
+    waits = []
+
+    def __init__(self, job_id, app=None):
+        self.state, self.result = self.states.get(job_id, ("PENDING", None))
+        self.info = self.result
+
+    def get(self, timeout=None, propagate=True):
+        FakeAsyncResult.waits.append((timeout, propagate))
+        if self.state not in ("SUCCESS", "FAILURE", "REVOKED"):
+            raise CeleryTimeoutError("The operation timed out.")
+        return self.result
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    monkeypatch.setattr("celery.result.AsyncResult", FakeAsyncResult)
+    monkeypatch.setattr(FakeAsyncResult, "states", {})
+    monkeypatch.setattr(FakeAsyncResult, "waits", [])
+    return FakeAsyncResult
+
+
+def test_create_review_job_queues_task(client, monkeypatch):
+    """Задача ставится в очередь, ответ сразу содержит её идентификатор."""
+    submitted = []
+
+    class FakeJob:
+        id = "job-1"
+
+    class FakeTask:
+        @staticmethod
+        def delay(*args, **kwargs):
+            submitted.append((args, kwargs))
+            return FakeJob()
+
+    monkeypatch.setattr(sys.modules["backend.services.model_service"], "review_code_task", FakeTask)
+
+    response = client.post("/api/review/jobs", json={"code": "x = 1", "language": "python", "model_id": "mock-model"})
+
+    assert response.status_code == 202
+    assert response.get_json() == {
+        "success": True,
+        "job_id": "job-1",
+        "status": "pending",
+        "status_url": "/api/review/jobs/job-1",
+    }
+    assert submitted == [(("x = 1", "python"), {
+        "model_id": "mock-model", "response_language": "russian", "mode": "full"
+    })]
+
+
+def test_pending_job_waits_no_longer_than_max_wait(client, jobs, monkeypatch):
+    """Долгий опрос ждёт результат через бэкенд Celery не дольше REVIEW_JOB_MAX_WAIT."""
+    monkeypatch.setenv("REVIEW_JOB_MAX_WAIT", "2")
+
+    response = client.get("/api/review/jobs/job-1?wait=60")
+
+    assert response.get_json() == {"success": True, "job_id": "job-1", "status": "pending", "progress": 0.0}
+    assert jobs.waits == [(2.0, False)]
+
+
+def test_job_status_without_wait_does_not_block(client, jobs):
+    jobs.states["job-1"] = ("STARTED", None)
+
+    response = client.get("/api/review/jobs/job-1")
+
+    assert response.get_json()["status"] == "started"
+    assert jobs.waits == []
+
+
+def test_job_reports_progress(client, jobs):
+    jobs.states["job-1"] = ("PROGRESS", {"progress": 0.5})
+
+    response = client.get("/api/review/jobs/job-1?wait=1")
+
+    assert response.get_json() == {"success": True, "job_id": "job-1", "status": "progress", "progress": 0.5}
+
+
+def test_successful_job_returns_result(client, jobs):
+    jobs.states["job-1"] = ("SUCCESS", {"review": "Замечаний нет", "model": "mock-model"})
+
+    response = client.get("/api/review/jobs/job-1?wait=1")
+
+    assert response.get_json() == {
+        "success": True,
+        "job_id": "job-1",
+        "status": "success",
+        "progress": 1.0,
+        "review": "Замечаний нет",
+        "model": "mock-model",
+    }
+
+
+def test_failed_job_returns_error(client, jobs):
+    jobs.states["job-1"] = ("FAILURE", RuntimeError("Модель недоступна"))
+
+    response = client.get("/api/review/jobs/job-1?wait=1")
+
+    assert response.get_json() == {
+        "success": True,
+        "job_id": "job-1",
+        "status": "failure",
+        "progress": 1.0,
+        "error": "Модель недоступна",
+    }
+    assert jobs.waits == [(1.0, False)]
+
+
+def test_invalid_wait_is_rejected(client, jobs):
+    response = client.get("/api/review/jobs/job-1?wait=soon")
+
+    assert response.status_code == 400
+
+
+class EchoAdapter:
+    """Адаптер, возвращающий число строк кода; файл с кодом "fail" вызывает ошибку."""
+
+    def analyze_code(self, code, language, **kwargs):
+        if code == "fail":
+            raise RuntimeError("Модель недоступна")
+        return f"Проверено строк: {len(code.splitlines())}"
+
+
+@pytest.fixture
+def batch_service(monkeypatch):
+    from backend.services import model_service
+
+    monkeypatch.setenv("ENABLE_CACHE", "False")
+    monkeypatch.setenv("STATIC_REVIEW_ENABLED", "False")
+    monkeypatch.setattr(model_service, "get_adapter", lambda model_id=None: EchoAdapter())
+    return model_service
+
+
+def test_batch_reports_invalid_files_per_index(client, batch_service):
+    """Некорректные и упавшие файлы получают ошибку на своей позиции, остальные анализируются."""
+    response = client.post("/api/review/batch", json={"files": [
+        {"path": "ok.py", "code": "x = 1\ny = 2", "language": "python"},
+        {"path": "empty.py", "code": "", "language": "python"},
+        {"path": "list.py", "code": ["x = 1"], "language": "python"},
+        {"path": "lang.py", "code": "x = 1", "language": 3},
+        {"path": ["bad"], "code": "x = 1", "language": "python"},
+        "not a file",
+        {"path": "fail.py", "code": "fail", "language": "python"},
+    ]})
+
+    assert response.status_code == 200
+    data = response.get_json()
+    files = data["files"]
+    assert files[0]["success"] is True
+    assert files[0]["result"] == "Проверено строк: 2"
+    assert [file["success"] for file in files] == [True, False, False, False, False, False, False]
+    assert files[1]["error"] == "Отсутствует код или язык программирования"
+    assert files[2]["error"] == "Код и язык программирования должны быть строками"
+    assert files[3]["error"] == "Код и язык программирования должны быть строками"
+    assert files[4] == {"path": None, "success": False, "error": "Путь к файлу должен быть строкой"}
+    assert files[5] == {"path": None, "success": False, "error": "Отсутствует код или язык программирования"}
+    assert files[6]["path"] == "fail.py"
+    assert "error" in files[6]
+
+    summary = data["summary"]
+    assert summary["total"] == 7
+    assert summary["succeeded"] == 1
+    assert summary["failed"] == 6
+    assert summary["cached"] == 0
+    assert summary["analyzed"] == 2
+
+
+def test_batch_over_max_files_is_rejected(client, batch_service, monkeypatch):
+    monkeypatch.setenv("BATCH_MAX_FILES", "2")
+
+    response = client.post("/api/review/batch", json={"files": [
+        {"path": f"{n}.py", "code": "x = 1", "language": "python"} for n in range(3)
+    ]})
+
+    assert response.status_code == 413
+    assert response.get_json()["success"] is False
+
+
+def test_batch_requires_file_list(client, batch_service):
+    response = client.post("/api/review/batch", json={"files": {"path": "a.py"}})
+
+    assert response.status_code == 400
@@ -0,0 +1,167 @@
+from backend.core.review import (
+    changed_lines_between,
+    extract_hunks,
+    merge_hunk_reviews,
+    merge_unit_reviews,
+    parse_unified_diff,
+    reduce_chunk_reviews,
+    split_into_chunks,
+    split_into_units
+)
+
+PYTHON_SOURCE = '''import os
+
+CONST = 1
+
+
+@decorator
+def first(a):
+    return a + CONST
+
+
+class Second:
+    def method(self):
+        return os.sep
+'''
+
+JAVA_SOURCE = '''import java.util.List;
+
+public class Greeter {
+    public String greet(String name) {
+        return "Hello, {" + name;
+    }
+}
+
+interface Named {
+    String name();
+}
+'''
+
+
+def test_python_split_into_top_level_units():
+    """Python-код делится на функции, классы и код модуля."""
+    units = split_into_units(PYTHON_SOURCE, "python")
+
+    assert [(unit.kind, unit.name) for unit in units] == [
+        ("module", "<module>"), ("function", "first"), ("class", "Second")
+    ]
+    first = units[1]
+    assert first.start_line == 6
+    assert first.source.startswith("@decorator")
+
+
+def test_brace_languages_split_by_top_level_blocks():
+    """C-подобный код делится по блокам верхнего уровня, скобки в строках игнорируются."""
+    units = split_into_units(JAVA_SOURCE, "java")
+
+    assert [(unit.kind, unit.name) for unit in units] == [
+        ("module", "<module>"), ("class", "Greeter"), ("class", "Named")
+    ]
+    assert units[1].end_line == 7
+
+
+def test_unparsable_code_is_single_unit():
+    """Код, который не удалось разобрать, остаётся одной единицей."""
+    units = split_into_units("def broken(:\n    pass", "python")
+
+    assert len(units) == 1
+    assert units[0].source == "def broken(:\n    pass"
+
+
+def test_merge_keeps_unit_order_and_line_ranges():
+    """Итоговый отчёт содержит разделы по единицам с диапазонами строк."""
+    units = split_into_units(PYTHON_SOURCE, "python")
+    report = merge_unit_reviews(units, ["imports ok", "first ok", {"issues": []}])
+
+    assert report.index("first ok") < report.index('{"issues": []}')
+    assert "`first` (строки 6-8)" in report
+
+
+DIFF = """--- a/service.py
++++ b/service.py
+@@ -10,7 +10,8 @@ class Service:
+     def load(self):
+         data = read()
+-        return data
++        if not data:
++            return None
++        return parse(data)
+ 
+     def save(self):
+         write(self.data)
+"""
+
+
+def test_unified_diff_changed_lines_map_to_new_file():
+    """Изменённые строки и контекст берутся в нумерации новой версии файла."""
+    lines, changed = parse_unified_diff(DIFF)
+
+    assert changed == {12, 13, 14}
+    hunks = extract_hunks(lines, changed, "python", context=1)
+    assert [(hunk.start_line, hunk.end_line) for hunk in hunks] == [(11, 15)]
+    assert hunks[0].source.splitlines()[0] == "        data = read()"
+
+
+def test_old_and_new_versions_use_enclosing_function():
+    """В режиме функции фрагментом становится изменённая функция целиком."""
+    old = PYTHON_SOURCE
+    new = PYTHON_SOURCE.replace("a + CONST", "a - CONST")
+    changed = changed_lines_between(old, new)
+    lines = dict(enumerate(new.splitlines(), 1))
+
+    hunks = extract_hunks(lines, changed, "python", context=0, enclosing=True)
+
+    assert [(hunk.start_line, hunk.end_line) for hunk in hunks] == [(6, 8)]
+
+
+def test_hunk_reviews_reference_new_file_lines():
+    """Номера строк в ответе модели пересчитываются в нумерацию файла."""
+    lines, changed = parse_unified_diff(DIFF)
+    hunks = extract_hunks(lines, changed, "python", context=1)
+
+    report = merge_hunk_reviews(hunks, ["В строке 3 возможен None; lines 2-4"])
+
+    assert "## Изменения в строках 11-15" in report
+    assert "В строке 13 возможен None; lines 12-14" in report
+
+
+def test_large_file_is_split_at_declaration_boundaries():
+    """Части не разрывают функции и вместе покрывают весь файл."""
+    source = "import os\n\n" + "\n\n".join(
+        f"def f{i}():\n" + "\n".join(f"    x{j} = {j}" for j in range(5)) for i in range(30)
+    )
+
+    chunks = split_into_chunks(source, "python", 400)
+
+    assert len(chunks) > 1
+    assert "\n".join(chunk.source for chunk in chunks) == source
+    assert all(chunk.source.lstrip().startswith(("import", "def")) for chunk in chunks)
+    assert all(len(chunk.source) <= 400 for chunk in chunks)
+
+
+def test_chunk_reviews_are_deduplicated_and_renumbered():
+    """Одинаковые замечания разных частей объединяются, строки указываются по файлу."""
+    source = "\n".join(f"x{i} = {i}" for i in range(20))
+    chunks = split_into_chunks(source, "python", 60)
+
+    report = reduce_chunk_reviews(chunks, [
+        "## Качество кода\n- Нет docstring модуля\n- В строке 2 лишняя переменная"
+        for _ in chunks
+    ])
+
+    assert report.count("Нет docstring модуля") == 1
+    assert f"В строке {chunks[1].start_line + 1} лишняя переменная" in report
+
+
+def test_unit_reviews_reference_file_lines_after_move():
+    """Отчёт по единице, в том числе взятый из кэша после перемещения функции, ссылается на строки файла."""
+    moved = "import os\n\n\nclass Second:\n    def method(self):\n        return os.sep\n\nCONST = 1\n\n\n" \
+            "@decorator\ndef first(a):\n    return a + CONST\n"
+    units = split_into_units(moved, "python")
+    assert [(unit.name, unit.start_line) for unit in units] == [("<module>", 1), ("Second", 4), ("first", 11)]
+
+    report = merge_unit_reviews(units, ["Неиспользуемый импорт в строке 1, константа в строке 5", "строка 2", "lines 2-3"])
+
+    assert "Неиспользуемый импорт в строке 1, константа в строке 8" in report
+    assert "строка 5" in report.split("`Second`")[1]
+    assert "lines 12-13" in report
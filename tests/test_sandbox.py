@@ -0,0 +1,35 @@
+import signal
+import subprocess
+import sys
+
+import pytest
+
+from backend.core.static_analysis.sandbox import ResourceLimitExceeded, limit_process, limited, signal_exit_limit
+
+resource = pytest.importorskip("resource")
+
+
+def test_process_is_stopped_by_cpu_limit():
+    """Зациклившийся процесс останавливается по лимиту процессорного времени."""
+    process = subprocess.Popen([sys.executable, "-c", "while True: pass"])
+    limit_process(process.pid, 1, None)
+
+    assert process.wait(timeout=10) in (-signal.SIGXCPU, -signal.SIGKILL)
+    assert signal_exit_limit(process.returncode, memory_limited=False).limit == "cpu"
+
+
+def test_limits_inside_worker_are_lifted_after_the_request():
+    """В рабочем процессе лимиты действуют только на время запроса."""
+    limits = resource.getrlimit(resource.RLIMIT_AS), resource.getrlimit(resource.RLIMIT_CPU)
+
+    with pytest.raises(ResourceLimitExceeded) as memory:
+        with limited(None, 64):
+            bytearray(512 * 1024 * 1024)
+    with pytest.raises(ResourceLimitExceeded) as cpu:
+        with limited(1, None):
+            while True:
+                pass
+
+    assert (memory.value.limit, cpu.value.limit) == ("memory", "cpu")
+    assert (resource.getrlimit(resource.RLIMIT_AS), resource.getrlimit(resource.RLIMIT_CPU)) == limits
+    assert len(bytearray(128 * 1024 * 1024)) == 128 * 1024 * 1024
@@ -0,0 +1,67 @@
+from backend.core.cache import SimilarityIndex
+
+TEMPLATE = """
+def compute_total(items, tax_rate):
+    total = 0
+    for item in items:
+        if item.price > 0:
+            total += item.price * item.quantity
+    discount = total * 0.05 if total > 1000 else 0
+    return (total - discount) * (1 + tax_rate)
+"""
+
+
+def test_near_duplicate_is_found_in_same_scope():
+    """Код с изменённым литералом находится в той же области."""
+    index = SimilarityIndex(threshold=0.6)
+    index.add("gpt-4o:python", TEMPLATE, "python", "key-1")
+
+    match = index.find("gpt-4o:python", TEMPLATE.replace("1000", "2000"), "python")
+    assert match is not None
+    assert match.cache_key == "key-1"
+    assert 0.6 <= match.similarity < 1.0
+
+    assert index.find("deepseek-v3:python", TEMPLATE, "python") is None
+
+
+def test_unrelated_and_short_code_is_not_matched():
+    """Другой код и слишком короткие фрагменты не считаются похожими."""
+    index = SimilarityIndex(threshold=0.8)
+    index.add("scope", TEMPLATE, "python", "key-1")
+
+    assert index.find("scope", "class Parser:\n    def parse(self, text):\n        return text.split(',')\n", "python") is None
+    assert index.signature("x = 1", "python") is None
+
+
+def test_index_is_bounded_and_persisted(tmp_path):
+    """Индекс ограничен по размеру и восстанавливается из файла."""
+    path = tmp_path / "similarity_index.json"
+    index = SimilarityIndex(max_entries=2, path=path)
+    for i in range(3):
+        index.add("scope", TEMPLATE.replace("0.05", str(i)), "python", f"key-{i}")
+    index.save()
+
+    restored = SimilarityIndex(max_entries=2, path=path)
+    assert len(restored) == 2
+    assert restored.find("scope", TEMPLATE.replace("0.05", "2"), "python").cache_key == "key-2"
+
+
+def test_indexes_of_several_processes_are_merged(tmp_path, monkeypatch):
+    """Сохранение индекса одним процессом не затирает записи, добавленные другим."""
+    from backend.core.cache import similarity
+
+    path = tmp_path / "similarity_index.json"
+    monkeypatch.setattr(similarity.os, "getpid", lambda: 101)
+    first = SimilarityIndex(path=path)
+    monkeypatch.setattr(similarity.os, "getpid", lambda: 102)
+    second = SimilarityIndex(path=path)
+
+    second.add("scope", TEMPLATE, "python", "key-second")
+    second.save()
+    monkeypatch.setattr(similarity.os, "getpid", lambda: 101)
+    first.add("scope", TEMPLATE.replace("item", "entry"), "python", "key-first")
+    first.save()
+
+    restored = SimilarityIndex(path=path)
+    assert restored.find("scope", TEMPLATE, "python").cache_key == "key-second"
+    assert restored.find("scope", TEMPLATE.replace("item", "entry"), "python").cache_key == "key-first"
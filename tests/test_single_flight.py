@@ -0,0 +1,71 @@
+import threading
+import time
+
+from backend.core.cache import SingleFlight
+
+
+def test_concurrent_duplicates_share_one_call():
+    """Одновременные вызовы с одним ключом выполняются один раз."""
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return "review"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["review"] * 10
+
+
+def test_waiters_receive_leader_error():
+    """Ошибка ведущего вызова передаётся всем ожидающим."""
+    flight = SingleFlight()
+    errors = []
+
+    def failing():
+        time.sleep(0.05)
+        raise ValueError("upstream down")
+
+    def run():
+        try:
+            flight.do("k", failing)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=run) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == ["upstream down"] * 3
+
+
+class LockedRedis:
+    """Redis, в котором блокировку уже держит другой процесс."""
+
+    def set(self, key, value, nx=False, px=None):
+        return False
+
+    def eval(self, *args):
+        return 0
+
+
+def test_waits_for_result_of_other_process():
+    """Без блокировки процесс берёт результат другого процесса из общего кэша."""
+    flight = SingleFlight(redis_client=LockedRedis(), poll_interval=0.01)
+    polls = []
+
+    def lookup():
+        polls.append(1)
+        return "shared" if len(polls) >= 3 else None
+
+    assert flight.do("k", lambda: "own", lookup=lookup) == "shared"
@@ -0,0 +1,129 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from backend.core.cache import MemoryCache, TieredCache
+from backend.core.static_analysis import analyzer
+from backend.core.static_analysis.analyzer import StaticAnalyzer
+from backend.core.static_analysis import tools
+from backend.core.static_analysis.tools import line_parser
+
+
+def fake_tool(delay, lines):
+    """Команда, которая выводит замечания в формате cppcheck после задержки."""
+    script = f"import sys, time; time.sleep({delay}); sys.stderr.write({lines!r})"
+    return [sys.executable, "-c", script]
+
+
+def test_tools_run_concurrently_and_findings_are_merged(monkeypatch):
+    """Инструменты языка запускаются одновременно, замечания объединяются и сортируются по строкам."""
+    commands = {
+        "first": fake_tool(0.5, "a.cpp:7:style:Variable unused\n"),
+        "second": fake_tool(0.5, "a.cpp:2:error:Null pointer dereference\n"),
+    }
+    monkeypatch.setitem(analyzer.LANGUAGE_ANALYZERS, "cpp", ["first", "second"])
+    monkeypatch.setattr(analyzer, "build_command", lambda tool, *args: commands[tool])
+    monkeypatch.setattr(analyzer, "line_parser", lambda tool: line_parser("cppcheck"))
+
+    started = time.monotonic()
+    result = StaticAnalyzer(max_processes=4, cache_enabled=False).analyze("int main() {}", "cpp")
+
+    assert time.monotonic() - started < 0.9
+    assert [(finding["line"], finding["severity"]) for finding in result["findings"]] == [(2, "error"), (7, "convention")]
+    assert [status["status"] for status in result["tools"]] == ["ok", "ok"]
+
+
+def test_slow_tool_is_killed_after_its_timeout(monkeypatch):
+    """Инструмент, превысивший своё ограничение времени, не задерживает остальные."""
+    commands = {
+        "fast": fake_tool(0, "a.cpp:1:warning:Fast finding\n"),
+        "slow": fake_tool(10, ""),
+    }
+    monkeypatch.setitem(analyzer.LANGUAGE_ANALYZERS, "cpp", ["fast", "slow"])
+    monkeypatch.setitem(analyzer.STATIC_ANALYZER_TIMEOUTS, "slow", 0.3)
+    monkeypatch.setattr(analyzer, "build_command", lambda tool, *args: commands[tool])
+    monkeypatch.setattr(analyzer, "line_parser", lambda tool: line_parser("cppcheck"))
+
+    started = time.monotonic()
+    result = StaticAnalyzer(max_processes=4, cache_enabled=False).analyze("int main() {}", "cpp")
+
+    assert time.monotonic() - started < 2
+    assert [finding["message"] for finding in result["findings"]] == ["Fast finding"]
+    assert {status["tool"]: status["status"] for status in result["tools"]} == {"fast": "ok", "slow": "timeout"}
+
+
+def test_findings_before_timeout_are_kept(monkeypatch):
+    """Замечания, выведенные до остановки инструмента, возвращаются с отметкой о неполном результате."""
+    script = "import sys, time; sys.stderr.write('a.cpp:3:warning:Early finding\\n'); sys.stderr.flush(); time.sleep(10)"
+    monkeypatch.setitem(analyzer.LANGUAGE_ANALYZERS, "cpp", ["hanging"])
+    monkeypatch.setitem(analyzer.STATIC_ANALYZER_TIMEOUTS, "hanging", 0.5)
+    monkeypatch.setattr(analyzer, "build_command", lambda tool, *args: [sys.executable, "-c", script])
+    monkeypatch.setattr(analyzer, "line_parser", lambda tool: line_parser("cppcheck"))
+
+    result = StaticAnalyzer(cache_enabled=False).analyze("int main() {}", "cpp")
+
+    assert [finding["message"] for finding in result["findings"]] == ["Early finding"]
+    assert result["tools"][0]["status"] == "timeout"
+    assert result["tools"][0]["limit"] == "wall_clock"
+    assert result["tools"][0]["partial"] is True
+
+
+def test_results_are_cached_by_content(monkeypatch, tmp_path):
+    """Повторный анализ того же кода не запускает инструмент, изменённый код анализируется заново."""
+    counter = tmp_path / "runs"
+    script = f"open({str(counter)!r}, 'a').write('.'); import sys; sys.stderr.write('a.cpp:1:warning:Finding\\n')"
+    monkeypatch.setitem(analyzer.LANGUAGE_ANALYZERS, "cpp", ["counted"])
+    monkeypatch.setattr(analyzer, "build_command", lambda tool, *args: [sys.executable, "-c", script])
+    monkeypatch.setattr(analyzer, "line_parser", lambda tool: line_parser("cppcheck"))
+    monkeypatch.setattr(analyzer, "get_review_cache", lambda: cache)
+    cache = TieredCache(MemoryCache())
+
+    static_analyzer = StaticAnalyzer()
+    first = static_analyzer.analyze("int main() {}\n", "cpp")
+    second = static_analyzer.analyze("int main() {}\r\n", "cpp")
+    static_analyzer.analyze("int main() { return 1; }", "cpp")
+
+    assert counter.read_text() == ".."
+    assert second["findings"] == first["findings"]
+    assert second["tools"][0]["cached"] is True
+
+
+def test_code_is_passed_over_stdin_without_temp_files(monkeypatch):
+    """Инструменту, читающему stdin, код передаётся без временного каталога."""
+    script = "import sys; [sys.stderr.write(f'-:{n}:warning:{line}') for n, line in enumerate(sys.stdin, 1)]"
+    monkeypatch.setitem(analyzer.LANGUAGE_ANALYZERS, "cpp", ["piped"])
+    monkeypatch.setattr(analyzer, "build_command", lambda tool, *args: [sys.executable, "-c", script])
+    monkeypatch.setattr(analyzer, "line_parser", lambda tool: line_parser("cppcheck"))
+    monkeypatch.setattr(analyzer, "supports_stdin", lambda tool: True)
+    monkeypatch.setattr(analyzer.tempfile, "TemporaryDirectory", None)
+
+    result = StaticAnalyzer(cache_enabled=False).analyze("int a;\nint b;\n", "cpp")
+
+    assert [(finding["line"], finding["message"]) for finding in result["findings"]] == [(1, "int a;"), (2, "int b;")]
+
+
+def test_unsupported_language():
+    result = StaticAnalyzer().analyze("puts 1", "ruby")
+
+    assert result["findings"] == []
+    assert result["tools"][0]["status"] == "unsupported"
+
+
+@pytest.mark.parametrize("version, flags, config", [
+    ("v8.57.0", ["--no-eslintrc"], "eslintrc.json"),
+    ("v9.12.0", ["--no-config-lookup"], "eslint.config.js"),
+])
+def test_eslint_options_follow_major_version(monkeypatch, version, flags, config):
+    """ESLint 9 запускается с конфигурацией eslint.config.js вместо удалённого --no-eslintrc."""
+    monkeypatch.setattr(tools, "tool_version", lambda tool, settings: version)
+    monkeypatch.setattr(tools.shutil, "which", lambda name: f"/usr/bin/{name}")
+
+    command = tools.build_command("eslint", Path("app.js"), {})
+
+    assert command[0] == "eslint"
+    assert flags[0] in command
+    config_path = Path(command[command.index("-c") + 1])
+    assert config_path.name == config
+    assert config_path.exists()
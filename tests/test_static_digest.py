@@ -0,0 +1,35 @@
+from backend.core.static_analysis.digest import deduplicate_findings, make_findings_digest
+
+
+def finding(tool, line, severity, symbol, code=None, message="Сообщение"):
+    return {"tool": tool, "line": line, "column": 0, "code": code, "symbol": symbol, "severity": severity, "message": message}
+
+
+def test_same_issue_from_several_tools_is_reported_once():
+    """Неиспользуемый импорт от pylint, flake8 и проверки по AST попадает в сводку один раз."""
+    findings = [
+        finding("pylint", 1, "warning", "unused-import", "W0611"),
+        finding("flake8", 1, "warning", None, "F401"),
+        finding("ast", 1, "warning", "unused-import", "AST001"),
+        finding("ast", 3, "warning", "mutable-default", "AST003"),
+        finding("pylint", 3, "warning", "dangerous-default-value", "W0102"),
+    ]
+
+    assert [(item["tool"], item["line"]) for item in deduplicate_findings(findings)] == [("pylint", 1), ("ast", 3)]
+
+
+def test_digest_keeps_most_severe_findings_and_lists_them_by_line():
+    findings = [finding("pylint", line, "convention", f"rule-{line}") for line in range(1, 6)]
+    findings.append(finding("pylint", 9, "error", "undefined-variable", message="Undefined   variable 'x'"))
+
+    digest = make_findings_digest(findings, max_findings=3)
+
+    lines = [line for line in digest.splitlines() if line.startswith("- ")]
+    assert lines == [
+        "- L1 convention rule-1: Сообщение",
+        "- L2 convention rule-2: Сообщение",
+        "- L9 error undefined-variable: Undefined variable 'x'",
+        "- ... and 3 more of lower severity",
+    ]
+    assert "Do not repeat" in digest
+    assert make_findings_digest([]) == ""
@@ -0,0 +1,56 @@
+from backend.core.ml_analysis import upstream_health
+from backend.core.ml_analysis.upstream_health import CLOSED, HALF_OPEN, OPEN, UpstreamHealthTracker
+
+SERVERS = [{"url": "https://primary"}, {"url": "https://fallback-a"}, {"url": "https://fallback-b"}]
+
+
+def test_order_prefers_fastest_healthy_upstream():
+    """Серверы упорядочиваются по задержке, неизвестные остаются в порядке конфигурации."""
+    tracker = UpstreamHealthTracker()
+    tracker.record_success("https://primary", 3.0)
+    tracker.record_success("https://fallback-b", 0.5)
+
+    assert [server["url"] for server in tracker.order(SERVERS)] == [
+        "https://fallback-b", "https://primary", "https://fallback-a"
+    ]
+
+
+def test_circuit_opens_after_consecutive_failures_and_is_skipped():
+    """После серии ошибок сервер пропускается."""
+    tracker = UpstreamHealthTracker(failure_threshold=2)
+    tracker.record_failure("https://primary", 30.0)
+    tracker.record_failure("https://primary", 30.0)
+
+    assert tracker.snapshot()["https://primary"]["state"] == OPEN
+    assert "https://primary" not in [server["url"] for server in tracker.order(SERVERS)]
+
+
+def test_half_open_probe_closes_or_reopens_circuit(monkeypatch):
+    """После паузы пропускается один пробный запрос, его результат определяет состояние."""
+    now = [1000.0]
+    monkeypatch.setattr(upstream_health.time, "monotonic", lambda: now[0])
+    tracker = UpstreamHealthTracker(failure_threshold=1, open_timeout=30)
+    tracker.record_failure("https://primary", 1.0)
+
+    assert not tracker.allow_request("https://primary")
+    now[0] += 31
+    assert tracker.allow_request("https://primary")
+    assert tracker.snapshot()["https://primary"]["state"] == HALF_OPEN
+    assert not tracker.allow_request("https://primary")
+
+    tracker.record_failure("https://primary", 1.0)
+    assert tracker.snapshot()["https://primary"]["state"] == OPEN
+
+    now[0] += 31
+    assert tracker.allow_request("https://primary")
+    tracker.record_success("https://primary", 0.2)
+    assert tracker.snapshot()["https://primary"]["state"] == CLOSED
+
+
+def test_all_open_falls_back_to_configured_order():
+    """Если все выключатели разомкнуты, серверы пробуются в исходном порядке."""
+    tracker = UpstreamHealthTracker(failure_threshold=1)
+    for server in SERVERS:
+        tracker.record_failure(server["url"], 1.0)
+
+    assert tracker.order(SERVERS) == SERVERS